@@ -3,17 +3,42 @@
 import requests
 import argparse
 import codecs
+import io
+import sys
+import logging
+from multiprocessing.pool import ThreadPool
+from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE
 from rdflib import Graph, URIRef, RDF, OWL
 from rdflib.namespace import Namespace
 from orcid2vivo_app.vivo_uri import HashIdentifierStrategy
-from orcid2vivo_app.vivo_namespace import VIVO, FOAF, VCARD
+from orcid2vivo_app.vivo_namespace import VIVO, FOAF, VCARD, VIVO_KB_GRAPH
 from orcid2vivo_app.affiliations import AffiliationsCrosswalk
 from orcid2vivo_app.bio import BioCrosswalk
 from orcid2vivo_app.fundings import FundingCrosswalk
-from orcid2vivo_app.works import WorksCrosswalk
-from orcid2vivo_app.utility import sparql_insert, clean_orcid
+from orcid2vivo_app.works import WorksCrosswalk, WorkRegistry
+from orcid2vivo_app.utility import sparql_insert, clean_orcid, prune_orcid_summary_pairs
+from orcid2vivo_app.sink import NTriplesSink, TeeSink, HashSink
+from orcid2vivo_app.triple_store import STORE_NAME
+from orcid2vivo_app.context import CrosswalkContext
+from orcid2vivo_app.shared_entities import SharedEntities, SHARED_CLASSES
 import orcid2vivo_app.vivo_namespace as ns
 
+log = logging.getLogger(__name__)
+
+# Formats that are written as triples are produced
+STREAMING_FORMATS = ("nt", "nquads")
+STREAMING_BUFFER_SIZE = 64 * 1024
+
+# Sections of an orcid profile that can be crosswalked
+SECTIONS = ("bio", "works", "affiliations", "fundings")
+# Parts of an orcid record that are fetched for each section. Works needs the person for the family name.
+SECTION_PATHS = {
+    "bio": ("person",),
+    "works": ("person", "works"),
+    "affiliations": ("educations",),
+    "fundings": ("fundings",)
+}
+
 
 class SimpleCreateEntitiesStrategy():
     """
@@ -43,6 +68,14 @@ class SimpleCreateEntitiesStrategy():
             return False
         return True
 
+    @property
+    def cache_key(self):
+        """
+        Identifies the decisions made by this strategy, so that cached crosswalk output is only reused when the
+        decisions would be the same.
+        """
+        return "simple", self.skip_person
+
     def to_uri(self, clazz, attrs, general_clazz=None):
         uri = self._identifier_strategy.to_uri(clazz, attrs, general_clazz=None)
         # Need to remember vcard uri for this person so that can skip.
@@ -51,38 +84,125 @@ class SimpleCreateEntitiesStrategy():
         return uri
 
 
+class IndexedCreateEntitiesStrategy(SimpleCreateEntitiesStrategy):
+    """
+    A strategy that does not create shared entities (e.g., organizations and journals) that are already in VIVO,
+    according to a UriIndex of the entities in VIVO.
+
+    Otherwise, same as SimpleCreateEntitiesStrategy.
+    """
+    def __init__(self, identifier_strategy, uri_index, skip_person=False, person_uri=None):
+        SimpleCreateEntitiesStrategy.__init__(self, identifier_strategy, skip_person=skip_person,
+                                              person_uri=person_uri)
+        self.uri_index = uri_index
+
+    def should_create(self, clazz, uri):
+        if clazz in SHARED_CLASSES and uri in self.uri_index:
+            return False
+        return SimpleCreateEntitiesStrategy.should_create(self, clazz, uri)
+
+    @property
+    def cache_key(self):
+        return "indexed", self.skip_person, self.uri_index.checksum
+
+
 class PersonCrosswalk():
-    def __init__(self, identifier_strategy, create_strategy):
+    def __init__(self, identifier_strategy, create_strategy, context=None):
         self.identifier_strategy = identifier_strategy
         self.create_strategy = create_strategy
-        self.bio_crosswalker = BioCrosswalk(identifier_strategy, create_strategy)
-        self.affiliations_crosswalker = AffiliationsCrosswalk(identifier_strategy, create_strategy)
-        self.funding_crosswalker = FundingCrosswalk(identifier_strategy, create_strategy)
-        self.works_crosswalker = WorksCrosswalk(identifier_strategy, create_strategy)
+        self.context = context or CrosswalkContext()
+        self.bio_crosswalker = BioCrosswalk(identifier_strategy, create_strategy, self.context)
+        self.affiliations_crosswalker = AffiliationsCrosswalk(identifier_strategy, create_strategy, self.context)
+        self.funding_crosswalker = FundingCrosswalk(identifier_strategy, create_strategy, self.context)
+        self.works_crosswalker = WorksCrosswalk(identifier_strategy, create_strategy, self.context)
 
-    def crosswalk(self, orcid_id, person_uri, person_class=None, confirmed_orcid_id=False):
+    def crosswalk(self, orcid_id, person_uri, person_class=None, confirmed_orcid_id=False, sink=None, sections=None):
+        """
+        Fetch an orcid profile and crosswalk it.
+        :param sink: a Graph or other sink (see orcid2vivo_app.sink) to add triples to. Default is a new Graph.
+        :param sections: the sections (see SECTIONS) to fetch and crosswalk. Default is all sections.
+        :return: the graph or sink, the orcid profile, and the person uri.
+        """
 
         # Create an RDFLib Graph
-        graph = Graph(namespace_manager=ns.ns_manager)
+        graph = sink if sink is not None else self._new_graph()
 
-        # 0000-0003-3441-946X
-        clean_orcid_id = clean_orcid(orcid_id)
-        orcid_profile = fetch_orcid_profile(clean_orcid_id)
+        orcid_profile = self._crosswalk(orcid_id, person_uri, person_class, confirmed_orcid_id,
+                                        dict((section, graph) for section in check_sections(sections)))
+
+        return graph, orcid_profile, person_uri
 
-        # Determine the class to use for the person
-        person_clazz = FOAF.Person
-        if person_class:
-            person_clazz = getattr(VIVO, person_class)
+    def crosswalk_sections(self, orcid_id, person_uri, person_class=None, confirmed_orcid_id=False, sections=None,
+                           orcid_profile=None, works=None):
+        """
+        Fetch an orcid profile and crosswalk it, with a separate graph for each section.
+        :param sections: the sections (see SECTIONS) to fetch and crosswalk. Default is all sections.
+        :param orcid_profile: an orcid profile that has already been fetched (with at least the sections). Default is
+        to fetch the profile.
+        :param works: the records for the works of orcid_profile that have already been fetched (see
+        WorksCrosswalk.fetch_works()). Default is to fetch them.
+        :return: a map of section to graph, the orcid profile, the person uri, and a map of section to an
+        order-independent fingerprint of the graph (see sink.HashSink).
+        """
+        section_graphs = dict((section, self._new_graph()) for section in check_sections(sections))
+        hash_sinks = dict((section, HashSink()) for section in section_graphs)
 
-        # ORCID
-        PersonCrosswalk._add_orcid_id(person_uri, clean_orcid_id, graph, confirmed_orcid_id)
+        orcid_profile = self._crosswalk(orcid_id, person_uri, person_class, confirmed_orcid_id, section_graphs,
+                                        orcid_profile=orcid_profile, hash_sinks=hash_sinks, works=works)
 
-        self.bio_crosswalker.crosswalk(orcid_profile, person_uri, graph, person_class=person_clazz)
-        self.works_crosswalker.crosswalk(orcid_profile, person_uri, graph)
-        self.affiliations_crosswalker.crosswalk(orcid_profile, person_uri, graph)
-        self.funding_crosswalker.crosswalk(orcid_profile, person_uri, graph)
+        return section_graphs, orcid_profile, person_uri, dict((section, hash_sink.hexdigest())
+                                                               for section, hash_sink in hash_sinks.items())
 
-        return graph, orcid_profile, person_uri
+    def _new_graph(self):
+        return Graph(store=STORE_NAME, namespace_manager=self.context.ns_manager)
+
+    def _crosswalk(self, orcid_id, person_uri, person_class, confirmed_orcid_id, section_graphs, orcid_profile=None,
+                   hash_sinks=None, works=None):
+        """
+        :param hash_sinks: a map of section to HashSink, which is kept to the triples in the section's graph as they
+        are added (and removed). The sections must have separate graphs.
+        """
+        # 0000-0003-3441-946X
+        clean_orcid_id = clean_orcid(orcid_id)
+        if orcid_profile is None:
+            orcid_profile = fetch_orcid_profile(clean_orcid_id, session=self.context.session,
+                                                sections=section_graphs.keys(), keep_profile=self.context.keep_profile)
+
+        # Where the crosswalkers add triples
+        section_sinks = section_graphs
+        if hash_sinks is not None:
+            section_sinks = dict((section, TeeSink(graph, hash_sinks[section]))
+                                 for section, graph in section_graphs.items())
+
+        if "bio" in section_sinks:
+            # Determine the class to use for the person
+            person_clazz = FOAF.Person
+            if person_class:
+                person_clazz = getattr(VIVO, person_class)
+
+            # ORCID
+            PersonCrosswalk._add_orcid_id(person_uri, clean_orcid_id, section_sinks["bio"], confirmed_orcid_id)
+
+            self.bio_crosswalker.crosswalk(orcid_profile, person_uri, section_sinks["bio"],
+                                           person_class=person_clazz)
+        if "works" in section_sinks:
+            self.works_crosswalker.crosswalk(orcid_profile, person_uri, section_sinks["works"], works=works)
+        if "affiliations" in section_sinks:
+            self.affiliations_crosswalker.crosswalk(orcid_profile, person_uri, section_sinks["affiliations"])
+        if "fundings" in section_sinks:
+            self.funding_crosswalker.crosswalk(orcid_profile, person_uri, section_sinks["fundings"])
+
+        # Move the defining triples of shared entities out of the graphs for the person
+        if self.context.shared_entities is not None:
+            if hash_sinks is not None:
+                for section, graph in section_graphs.items():
+                    for triple in self.context.shared_entities.extract(graph):
+                        hash_sinks[section].remove(triple)
+            else:
+                for graph in set(section_graphs.values()):
+                    self.context.shared_entities.extract(graph)
+
+        return orcid_profile
 
     @staticmethod
     def _add_orcid_id(person_uri, orcid_id, graph, confirmed):
@@ -93,46 +213,223 @@ class PersonCrosswalk():
             graph.add((orcid_id_uriref, VIVO.confirmedOrcidId, person_uri))
 
 
-def fetch_orcid_profile(orcid_id):
+def fetch_orcid_profile(orcid_id, session=requests, sections=None, keep_profile=False):
+    """
+    Fetch an orcid profile.
+    :param sections: the sections (see SECTIONS) that the profile is needed for. If only some sections, only the
+    parts of the record needed for those sections are fetched. Default is all sections.
+    :param keep_profile: return the profile as fetched. Default is to omit bookkeeping that is not crosswalked
+    (e.g., source) while decoding (see utility.prune_orcid_summary_pairs).
+    """
     orcid = clean_orcid(orcid_id)
-    r = requests.get('https://pub.orcid.org/v2.0/%s' % orcid,
-                     headers={"Accept": "application/json"})
+    sections = check_sections(sections)
+    if set(sections) == set(SECTIONS):
+        return _fetch_orcid(orcid, session, keep_profile)
+
+    orcid_profile = {"activities-summary": {}}
+    for path in sorted(set(path for section in sections for path in SECTION_PATHS[section])):
+        part = _fetch_orcid("%s/%s" % (orcid, path), session, keep_profile)
+        if path == "person":
+            orcid_profile["person"] = part
+        else:
+            orcid_profile["activities-summary"][path] = part
+    return orcid_profile
+
+
+def _fetch_orcid(path, session, keep_profile=False):
+    r = session.get('https://pub.orcid.org/v2.0/%s' % path,
+                    headers={"Accept": "application/json"})
     if r:
-        return r.json()
+        return r.json() if keep_profile else r.json(object_pairs_hook=prune_orcid_summary_pairs)
     else:
-        raise Exception("Request to fetch ORCID profile for %s returned %s" % (orcid, r.status_code))
+        raise Exception("Request to fetch ORCID profile for %s returned %s" % (path, r.status_code))
+
+
+def check_sections(sections=None):
+    """
+    Returns the sections, or all sections if not provided.
+    :raise ValueError: if a section is unknown.
+    """
+    if not sections:
+        return SECTIONS
+    for section in sections:
+        if section not in SECTIONS:
+            raise ValueError("%s is not a section. Sections are %s." % (section, ", ".join(SECTIONS)))
+    return tuple(sections)
+
+
+def parse_sections(value):
+    """
+    Parses a comma separated list of sections, e.g., bio,affiliations.
+    """
+    try:
+        return check_sections([section.strip() for section in value.split(",") if section.strip()])
+    except ValueError, e:
+        raise argparse.ArgumentTypeError(str(e))
 
 
 def set_namespace(namespace=None):
-    # Set default VIVO namespace
+    # Set default VIVO namespace. This changes module globals, so rather than calling this when crosswalking,
+    # provide a CrosswalkContext for the namespace.
     if namespace:
         ns.D = Namespace(namespace)
         ns.ns_manager.bind('d', ns.D, replace=True)
 
 
-def default_execute(orcid_id, namespace=None, person_uri=None, person_id=None, skip_person=False, person_class=None,
-                    confirmed_orcid_id=False):
-    # Set namespace
-    set_namespace(namespace)
+class BatchCrosswalk():
+    """
+    Crosswalks a batch of people with the default strategies.
+
+    The people share a CrosswalkContext, so the HTTP session and caches are shared between them.
+    """
+    def __init__(self, namespace=None, skip_person=False, session=None, work_cache=None, share_entities=False,
+                 uri_index=None, dedupe_works=False, keep_profile=False):
+        """
+        :param namespace: VIVO namespace for all of the people.
+        :param skip_person: default for skip_person for all of the people.
+        :param session: a requests Session. Default is to make requests without a session.
+        :param work_cache: a SubgraphCache for the triples of individual works. Default is to not cache works.
+        :param share_entities: move the defining triples of entities shared between people (e.g., publishers and
+        journals) from the graphs for people to self.shared_entities. The graphs must be Graphs, not other sinks.
+        :param uri_index: a UriIndex of the entities already in VIVO, which are then not created. Default is to
+        create all entities.
+        :param dedupe_works: describe works that are shared by people in the batch (e.g., co-authors) once, keyed on
+        their ORCID and Crossref records. The registry of descriptions is self.work_registry.
+        :param keep_profile: return orcid profiles as fetched. Default is to omit bookkeeping that is not crosswalked.
+        """
+        self.skip_person = skip_person
+        self.uri_index = uri_index
+        self.context = CrosswalkContext(namespace, session=session, work_cache=work_cache, keep_profile=keep_profile)
+        self.shared_entities = None
+        if share_entities:
+            self.shared_entities = SharedEntities(self.context.ns_manager)
+            self.context.shared_entities = self.shared_entities
+        self.work_registry = None
+        if dedupe_works:
+            self.work_registry = WorkRegistry()
+            self.context.work_registry = self.work_registry
+        self.identifier_strategy = HashIdentifierStrategy(self.context)
+
+    def execute(self, orcid_id, person_uri=None, person_id=None, skip_person=None, person_class=None,
+                confirmed_orcid_id=False, sink=None, sections=None):
+        """
+        Crosswalk a single person.
+        :return: the graph or sink, the orcid profile, and the person uri.
+        """
+        crosswalker, this_person_uri = self._person_crosswalker(orcid_id, person_uri, person_id, skip_person)
+        return crosswalker.crosswalk(orcid_id, this_person_uri, person_class=person_class,
+                                     confirmed_orcid_id=confirmed_orcid_id, sink=sink, sections=sections)
 
-    this_identifier_strategy = HashIdentifierStrategy()
-    this_person_uri = URIRef(person_uri) if person_uri \
-        else this_identifier_strategy.to_uri(FOAF.Person, {"id": person_id or orcid_id})
+    def execute_sections(self, orcid_id, person_uri=None, person_id=None, skip_person=None, person_class=None,
+                         confirmed_orcid_id=False, sections=None, orcid_profile=None, works=None):
+        """
+        Crosswalk a single person, with a separate graph for each section.
+        :param orcid_profile: an orcid profile that has already been fetched. Default is to fetch the profile.
+        :param works: the records for the works of orcid_profile that have already been fetched (see fetch_works()).
+        Default is to fetch them.
+        :return: a map of section to graph, the orcid profile, the person uri, and a map of section to fingerprint of
+        the graph.
+        """
+        crosswalker, this_person_uri = self._person_crosswalker(orcid_id, person_uri, person_id, skip_person)
+        return crosswalker.crosswalk_sections(orcid_id, this_person_uri, person_class=person_class,
+                                              confirmed_orcid_id=confirmed_orcid_id, sections=sections,
+                                              orcid_profile=orcid_profile, works=works)
 
-    # this_create_strategy will implement both create strategy and identifier strategy
-    this_create_strategy = SimpleCreateEntitiesStrategy(this_identifier_strategy, skip_person=skip_person,
-                                                        person_uri=this_person_uri)
+    def fetch_works(self, orcid_profile):
+        """
+        Fetches the work records and Crossref records needed to crosswalk the works of an orcid profile.
+        :return: a map of work path to (work, Crossref record), for execute_sections().
+        """
+        return WorksCrosswalk(self.identifier_strategy, None, self.context).fetch_works(orcid_profile)
+
+    def _person_crosswalker(self, orcid_id, person_uri, person_id, skip_person):
+        this_person_uri = URIRef(person_uri) if person_uri \
+            else self.identifier_strategy.to_uri(FOAF.Person, {"id": person_id or orcid_id})
+
+        # this_create_strategy will implement both create strategy and identifier strategy
+        this_skip_person = self.skip_person if skip_person is None else skip_person
+        if self.uri_index is not None:
+            this_create_strategy = IndexedCreateEntitiesStrategy(self.identifier_strategy, self.uri_index,
+                                                                 skip_person=this_skip_person,
+                                                                 person_uri=this_person_uri)
+        else:
+            this_create_strategy = SimpleCreateEntitiesStrategy(self.identifier_strategy,
+                                                                skip_person=this_skip_person,
+                                                                person_uri=this_person_uri)
+
+        crosswalker = PersonCrosswalk(create_strategy=this_create_strategy, identifier_strategy=this_create_strategy,
+                                      context=self.context)
+        return crosswalker, this_person_uri
+
+    def execute_many(self, person_specs, workers=1):
+        """
+        Crosswalk many people.
+        :param person_specs: an iterable of orcid ids or of dicts of keyword arguments for execute().
+        :param workers: number of people to crosswalk concurrently.
+        :return: a generator of (person_spec, (graph, orcid profile, person uri), None) or
+        (person_spec, None, exception), in the order that the people are finished.
+        """
+        if workers > 1:
+            pool = ThreadPool(workers)
+            try:
+                for result in pool.imap_unordered(self._execute_spec, person_specs):
+                    yield result
+            finally:
+                pool.terminate()
+        else:
+            for person_spec in person_specs:
+                yield self._execute_spec(person_spec)
+
+    def _execute_spec(self, person_spec):
+        try:
+            if isinstance(person_spec, basestring):
+                return person_spec, self.execute(person_spec), None
+            return person_spec, self.execute(**person_spec), None
+        except Exception, e:
+            log.exception("Crosswalking %s failed", person_spec)
+            # Kept so that the exception can be raised again with its original traceback
+            e.__traceback__ = sys.exc_info()[2]
+            return person_spec, None, e
 
-    crosswalker = PersonCrosswalk(create_strategy=this_create_strategy, identifier_strategy=this_create_strategy)
-    return crosswalker.crosswalk(orcid_id, this_person_uri, person_class=person_class,
-                                 confirmed_orcid_id=confirmed_orcid_id)
+
+def default_execute(orcid_id, namespace=None, person_uri=None, person_id=None, skip_person=False, person_class=None,
+                    confirmed_orcid_id=False, sink=None, sections=None, keep_profile=False):
+    return BatchCrosswalk(namespace, keep_profile=keep_profile).execute(
+        orcid_id, person_uri=person_uri, person_id=person_id, skip_person=skip_person, person_class=person_class,
+        confirmed_orcid_id=confirmed_orcid_id, sink=sink, sections=sections)
+
+
+def default_execute_many(person_specs, namespace=None, skip_person=False, workers=1, on_error=None):
+    """
+    Crosswalk many people with the default strategies, sharing an HTTP session and caches.
+    :param person_specs: an iterable of orcid ids or of dicts with keys orcid_id, person_uri, person_id,
+    skip_person, person_class, confirmed_orcid_id, and/or sections.
+    :param workers: number of people to crosswalk concurrently.
+    :param on_error: a function that is called with the person spec and exception when crosswalking a person fails.
+    If not provided, the exception is raised.
+    :return: a generator of (graph, orcid profile, person uri) in the order that the people are finished.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=max(workers, DEFAULT_POOLSIZE))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    batch = BatchCrosswalk(namespace, skip_person=skip_person, session=session)
+    for person_spec, result, exception in batch.execute_many(person_specs, workers=workers):
+        if exception is not None:
+            if on_error is None:
+                raise type(exception), exception, getattr(exception, "__traceback__", None)
+            on_error(person_spec, exception)
+        else:
+            yield result
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument("orcid_id")
-    parser.add_argument("--format", default="turtle", choices=["xml", "n3", "turtle", "nt", "pretty-xml", "trix"],
-                        help="The RDF format for serializing. Default is turtle.")
+    parser.add_argument("orcid_id", nargs="+", help="One or more orcid ids.")
+    parser.add_argument("--format", default="turtle",
+                        choices=["xml", "n3", "turtle", "nt", "nquads", "pretty-xml", "trix"],
+                        help="The RDF format for serializing. Default is turtle. nt and nquads are written as they "
+                             "are produced.")
     parser.add_argument("--file", help="Filepath to which to serialize.")
     parser.add_argument("--endpoint", dest="endpoint",
                         help="Endpoint for SPARQL Update of VIVO instance,e.g., http://localhost/vivo/api/sparqlUpdate."
@@ -153,26 +450,70 @@ if __name__ == '__main__':
     parser.add_argument("--skip-person", dest="skip_person", action="store_true",
                         help="Skip adding triples declaring the person and the person's name.")
     parser.add_argument("--confirmed", action="store_true", help="Mark the orcid id as confirmed.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of people to crosswalk concurrently when multiple orcid ids are provided. "
+                             "Default is 1.")
+    parser.add_argument("--sections", type=parse_sections, default=SECTIONS,
+                        help="Comma separated sections to crosswalk, e.g., bio,affiliations. Sections are %s. "
+                             "Default is all sections." % ", ".join(SECTIONS))
 
     # Parse
     args = parser.parse_args()
 
+    if args.endpoint and (not args.username or not args.password):
+        raise Exception("If an endpoint is specified, --username and --password must be provided.")
+    if len(args.orcid_id) > 1 and (args.person_id or args.person_uri):
+        raise Exception("--person-id and --person-uri can only be used with a single orcid id.")
+
+    # N-Triples and N-Quads are written as the triples are produced rather than serialized from a graph.
+    sinks = []
+    out = None
+    nt_sink = None
+    if args.format in STREAMING_FORMATS and (args.file or not args.endpoint):
+        out = io.open(args.file, "wb", buffering=STREAMING_BUFFER_SIZE) if args.file \
+            else io.open(sys.stdout.fileno(), "wb", buffering=STREAMING_BUFFER_SIZE, closefd=False)
+        nt_sink = NTriplesSink(out, context=VIVO_KB_GRAPH if args.format == "nquads" else None)
+        sinks.append(nt_sink)
+    g = None
+    if args.endpoint or out is None:
+        g = Graph(store=STORE_NAME, namespace_manager=CrosswalkContext(args.namespace).ns_manager)
+        sinks.append(g)
+
     # Excute with default strategies
-    (g, p, per_uri) = default_execute(args.orcid_id, namespace=args.namespace, person_uri=args.person_uri,
-                                      person_id=args.person_id, skip_person=args.skip_person,
-                                      person_class=args.person_class, confirmed_orcid_id=args.confirmed)
+    main_sink = sinks[0] if len(sinks) == 1 else TeeSink(*sinks)
+    try:
+        if len(args.orcid_id) == 1:
+            (sink, p, per_uri) = default_execute(args.orcid_id[0], namespace=args.namespace,
+                                                 person_uri=args.person_uri, person_id=args.person_id,
+                                                 skip_person=args.skip_person, person_class=args.person_class,
+                                                 confirmed_orcid_id=args.confirmed, sink=main_sink,
+                                                 sections=args.sections)
+        else:
+            main_person_specs = [{"orcid_id": main_orcid_id, "person_class": args.person_class,
+                                  "confirmed_orcid_id": args.confirmed, "sections": args.sections}
+                                 for main_orcid_id in args.orcid_id]
+            # People are crosswalked concurrently, so each person's graph is written once the person is finished.
+            # Memory is bounded by a person rather than by the whole output; triples shared by people (e.g.,
+            # organizations) may be written more than once, which does not change the RDF.
+            for (person_g, p, per_uri) in default_execute_many(main_person_specs, namespace=args.namespace,
+                                                               skip_person=args.skip_person, workers=args.workers):
+                for triple in person_g:
+                    main_sink.add(triple)
+                if nt_sink is not None:
+                    nt_sink.reset()
+    finally:
+        if out is not None:
+            out.close()
 
     # Write to file
-    if args.file:
+    if args.file and out is None:
         with codecs.open(args.file, "w") as out:
             g.serialize(format=args.format, destination=out)
 
     # Post to SPARQL Update
     if args.endpoint:
-        if not args.username or not args.password:
-            raise Exception("If an endpoint is specified, --username and --password must be provided.")
         sparql_insert(g, args.endpoint, args.username, args.password)
 
     # If not writing to file to posting to SPARQL Update then serialize to stdout
-    if not args.file and not args.endpoint:
+    if not args.file and not args.endpoint and out is None:
         print g.serialize(format=args.format)
@@ -3,13 +3,14 @@ from rdflib import RDFS, RDF, Literal
 from vivo_namespace import FOAF
 from vivo_uri import to_hash_identifier
 from utility import add_date, add_date_interval
-import orcid2vivo_app.vivo_namespace as ns
+from context import CrosswalkContext
 
 
 class AffiliationsCrosswalk:
-    def __init__(self, identifier_strategy, create_strategy):
+    def __init__(self, identifier_strategy, create_strategy, context=None):
         self.identifier_strategy = identifier_strategy
         self.create_strategy = create_strategy
+        self.context = context or CrosswalkContext()
 
     def crosswalk(self, orcid_profile, person_uri, graph):
         # Education
@@ -29,7 +30,7 @@ class AffiliationsCrosswalk:
                     if "address" in education["organization"]:
                         city = education["organization"]["address"]["city"]
                         state = education["organization"]["address"]["region"]
-                    address_uri = ns.D[to_hash_identifier("geo", (city, state))]
+                    address_uri = self.context.namespace[to_hash_identifier("geo", (city, state))]
                     graph.add((address_uri, RDF.type, VIVO.GeographicLocation))
                     graph.add((organization_uri, OBO.RO_0001025, address_uri))
                     graph.add((address_uri, RDFS.label, Literal("%s, %s" % (city, state))))
@@ -51,8 +52,10 @@ class AffiliationsCrosswalk:
 
                 # Interval
                 add_date_interval(educational_process_uri, graph, self.identifier_strategy,
-                                  add_date(start_date_year, graph, self.identifier_strategy),
-                                  add_date(end_date_year, graph, self.identifier_strategy))
+                                  add_date(start_date_year, graph, self.identifier_strategy,
+                                           date_registry=self.context.dates),
+                                  add_date(end_date_year, graph, self.identifier_strategy,
+                                           date_registry=self.context.dates))
 
                 if "role-title" in education:
                     degree_name = education["role-title"]
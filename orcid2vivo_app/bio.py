@@ -2,12 +2,14 @@ from vivo_namespace import VIVO
 from rdflib import RDFS, RDF, Literal, XSD
 from utility import join_if_not_empty
 from vivo_namespace import VCARD, OBO, FOAF
+from context import CrosswalkContext
 
 
 class BioCrosswalk:
-    def __init__(self, identifier_strategy, create_strategy):
+    def __init__(self, identifier_strategy, create_strategy, context=None):
         self.identifier_strategy = identifier_strategy
         self.create_strategy = create_strategy
+        self.context = context or CrosswalkContext()
 
     def crosswalk(self, orcid_profile, person_uri, graph, person_class=FOAF.Person):
 
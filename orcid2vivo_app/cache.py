@@ -0,0 +1,134 @@
+import collections
+import logging
+import os
+import threading
+import shelve
+
+log = logging.getLogger(__name__)
+
+# Key under which the settings of a persisted SubgraphCache are kept
+SETTINGS_KEY = "__settings__"
+# Suffixes of the files of the dbm implementations used by shelve
+DBM_SUFFIXES = ("", ".db", ".dat", ".dir", ".bak", ".pag")
+
+
+class LRUCache:
+    """
+    A thread safe mapping, bounded in size, that discards the least recently used entries.
+
+    Counts hits and misses.
+    """
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the value for the key or default if not cached.
+        """
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries[key] = value
+            self.hits += 1
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        """
+        Returns hits / (hits + misses), or 0.0 if there have been no lookups.
+        """
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+
+class SubgraphCache:
+    """
+    A thread safe cache of subgraphs (tuples of triples), keyed by a digest of the inputs that produced them. Users
+    that store other kinds of entries should distinguish them by key prefix.
+
+    If a filepath is provided, the cache is persisted (with shelve) so that it can be used by later runs. Otherwise,
+    it is kept in memory, bounded in size.
+
+    Counts hits and misses.
+    """
+    def __init__(self, filepath=None, maxsize=10000, settings=None):
+        """
+        :param settings: anything else that the cached subgraphs depend on, e.g., the crosswalk version. A persisted
+        cache that was written with other settings is cleared, since none of its entries can be used.
+        """
+        self.filepath = filepath
+        self.hits = 0
+        self.misses = 0
+        self._entries = shelve.open(filepath, protocol=2) if filepath else LRUCache(maxsize)
+        if filepath and settings is not None and self._entries.get(SETTINGS_KEY) != settings:
+            log.info("Clearing %s, since settings changed", filepath)
+            self._entries.close()
+            # Removed rather than emptied, so that the space is reclaimed. (Depending on the dbm, the file may
+            # have a suffix or be several files.)
+            for suffix in DBM_SUFFIXES:
+                if os.path.exists(filepath + suffix):
+                    os.remove(filepath + suffix)
+            self._entries = shelve.open(filepath, protocol=2)
+            self._entries[SETTINGS_KEY] = settings
+        self._lock = threading.Lock()
+
+    def get(self, key, count=True):
+        """
+        Returns the tuple of triples for the key or None if not cached.
+        :param count: count the lookup as a hit or miss.
+        """
+        with self._lock:
+            triples = self._entries.get(key)
+            if count:
+                if triples is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            return triples
+
+    def __setitem__(self, key, triples):
+        with self._lock:
+            self._entries[key] = tuple(triples)
+
+    def __len__(self):
+        return len(self._entries) - (1 if SETTINGS_KEY in self._entries else 0)
+
+    @property
+    def hit_rate(self):
+        """
+        Returns hits / (hits + misses), or 0.0 if there have been no lookups.
+        """
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+    def close(self):
+        if self.filepath:
+            with self._lock:
+                self._entries.close()
+
+    # Methods to make this a Context Manager.
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
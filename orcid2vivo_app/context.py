@@ -0,0 +1,45 @@
+from rdflib.namespace import Namespace
+import requests
+import vivo_namespace as ns
+from cache import LRUCache
+from utility import DateRegistry
+
+CROSSREF_CACHE_SIZE = 10000
+NAME_CACHE_SIZE = 100000
+
+
+class CrosswalkContext:
+    """
+    State for a crosswalk that would otherwise be global.
+
+    Carries the VIVO namespace, so that crosswalks for different namespaces can run concurrently.
+
+    Also carries the HTTP session and caches. A context may be shared by the crosswalks for a batch of people
+    (with the same namespace), in which case these are shared as well.
+    """
+    def __init__(self, namespace=None, session=None, work_cache=None, shared_entities=None, work_registry=None,
+                 keep_profile=False):
+        """
+        :param namespace: the VIVO namespace. Default is vivo_namespace.D.
+        :param session: a requests Session for HTTP requests. Default is to make requests without a session.
+        :param work_cache: a SubgraphCache for the triples of individual works. Default is to not cache works.
+        :param shared_entities: a SharedEntities to move the defining triples of shared entities to. Default is to
+        leave them in the graphs for people.
+        :param work_registry: a WorkRegistry to describe works that are shared by people once. Default is to describe
+        works for each person.
+        :param keep_profile: keep the orcid profile as fetched. Default is to omit bookkeeping that is not crosswalked
+        (see utility.prune_orcid_summary_pairs) from the profile, which is smaller for people with many works.
+        """
+        self.namespace = Namespace(namespace) if namespace else ns.D
+        self.ns_manager = ns.ns_manager if self.namespace == ns.D else ns.get_ns_manager(self.namespace)
+        self.session = session or requests
+        # DOI to Crossref record
+        self.crossref_records = LRUCache(CROSSREF_CACHE_SIZE)
+        # Contributor name to (first name, surname)
+        self.names = LRUCache(NAME_CACHE_SIZE)
+        self.work_cache = work_cache
+        self.shared_entities = shared_entities
+        self.work_registry = work_registry
+        self.keep_profile = keep_profile
+        # Dates, so that each date's triples are only computed once
+        self.dates = DateRegistry()
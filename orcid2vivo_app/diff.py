@@ -0,0 +1,39 @@
+import itertools
+from rdflib import BNode
+
+
+def has_bnodes(graph):
+    """
+    Returns True if a subject or object in the graph is a blank node.
+    """
+    for s, p, o in graph:
+        if isinstance(s, BNode) or isinstance(o, BNode):
+            return True
+    return False
+
+
+def sorted_diff(old_lines, new_lines):
+    """
+    Diffs two sorted iterables of lines (e.g., of N-Triples) by merging them, so in constant memory.
+
+    Duplicate lines are ignored.
+    :return: a generator of (False, line) for lines only in old_lines and (True, line) for lines only in new_lines.
+    """
+    old_iter = _distinct(old_lines)
+    new_iter = _distinct(new_lines)
+    old_line = next(old_iter, None)
+    new_line = next(new_iter, None)
+    while old_line is not None or new_line is not None:
+        if new_line is None or (old_line is not None and old_line < new_line):
+            yield False, old_line
+            old_line = next(old_iter, None)
+        elif old_line is None or new_line < old_line:
+            yield True, new_line
+            new_line = next(new_iter, None)
+        else:
+            old_line = next(old_iter, None)
+            new_line = next(new_iter, None)
+
+
+def _distinct(sorted_lines):
+    return (line for line, _ in itertools.groupby(sorted_lines))
@@ -0,0 +1,50 @@
+import hashlib
+import json
+
+
+def profile_fingerprints(orcid_profile, sections, settings=None):
+    """
+    Fingerprints the parts of an orcid profile that each section is crosswalked from, so that a later run can tell
+    which sections changed.
+
+    The items fingerprinted are the person for bio; each work-summary (and the person's family name) for works;
+    each education-summary for affiliations; and each funding-summary for fundings.
+    :param sections: the sections to fingerprint.
+    :param settings: anything else that determines the crosswalk, e.g., the namespace and person uri. Changing the
+    settings changes all of the fingerprints.
+    :return: a map of section to a map of item (e.g., put-code) to fingerprint.
+    """
+    settings_json = _normalize(settings)
+    activities = orcid_profile.get("activities-summary", {})
+    fingerprints = {}
+    for section in sections:
+        items = {}
+        if section == "bio":
+            items["person"] = orcid_profile.get("person")
+        elif section == "works":
+            items["family-name"] = orcid_profile.get("person", {}).get("name", {}).get("family-name")
+            for group in (activities.get("works") or {}).get("group", []):
+                for summary in group["work-summary"]:
+                    items[str(summary.get("put-code"))] = summary
+        elif section == "affiliations":
+            for summary in (activities.get("educations") or {}).get("education-summary", []):
+                items[str(summary.get("put-code"))] = summary
+        elif section == "fundings":
+            for group in (activities.get("fundings") or {}).get("group", []):
+                for summary in group["funding-summary"]:
+                    items[str(summary.get("put-code"))] = summary
+        fingerprints[section] = dict((item, hashlib.md5(settings_json + _normalize(value)).hexdigest())
+                                     for item, value in items.items())
+    return fingerprints
+
+
+def changed_items(fingerprints, previous_fingerprints):
+    """
+    Returns the items that were added, removed or changed.
+    """
+    return set(item for item in set(fingerprints) | set(previous_fingerprints)
+               if fingerprints.get(item) != previous_fingerprints.get(item))
+
+
+def _normalize(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
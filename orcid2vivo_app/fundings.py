@@ -1,12 +1,14 @@
 from vivo_namespace import VIVO, OBO, FOAF, VCARD
 from rdflib import RDF, RDFS, XSD, Literal
 from utility import add_date, add_date_interval
+from context import CrosswalkContext
 
 
 class FundingCrosswalk:
-    def __init__(self, identifier_strategy, create_strategy):
+    def __init__(self, identifier_strategy, create_strategy, context=None):
         self.identifier_strategy = identifier_strategy
         self.create_strategy = create_strategy
+        self.context = context or CrosswalkContext()
 
     def crosswalk(self, orcid_profile, person_uri, graph):
         if "fundings" in orcid_profile["activities-summary"]:
@@ -39,8 +41,10 @@ class FundingCrosswalk:
                         (end_year, end_month, end_day) = FundingCrosswalk._get_date_parts("end-date", funding)
 
                         add_date_interval(grant_uri, graph, self.identifier_strategy,
-                                          add_date(start_year, graph, self.identifier_strategy, start_month, start_day),
-                                          add_date(end_year, graph, self.identifier_strategy, end_month, end_day))
+                                          add_date(start_year, graph, self.identifier_strategy, start_month, start_day,
+                                                   date_registry=self.context.dates),
+                                          add_date(end_year, graph, self.identifier_strategy, end_month, end_day,
+                                                   date_registry=self.context.dates))
 
                         # Award amount
                         funding_amount = funding.get("amount")
@@ -0,0 +1,158 @@
+import heapq
+import sys
+import threading
+import time
+from Queue import Queue
+
+__all__ = ['Stage', 'Pipeline']
+
+# Marks the end of the items in a queue
+_END = object()
+
+
+class Stage:
+    """
+    A step of a Pipeline, performed for each item by a number of worker threads.
+
+    Records the time that the workers spent working, so that the slowest stage can be identified.
+    """
+    def __init__(self, name, func, workers=1, ordered=False):
+        """
+        :param func: a function that is called with an item. Its return value is ignored.
+        :param workers: number of items to process concurrently.
+        :param ordered: process items in the order in which they entered the pipeline. Must have a single worker.
+        """
+        if ordered and workers != 1:
+            raise ValueError("An ordered stage must have a single worker")
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.ordered = ordered
+        # Items processed
+        self.count = 0
+        # Seconds spent in func
+        self.busy = 0.0
+        # Seconds spent waiting for the next stage to accept an item (i.e., backpressure)
+        self.blocked = 0.0
+        self._lock = threading.Lock()
+
+    def utilization(self, elapsed):
+        """
+        Returns the fraction of the time that the workers were busy.
+        """
+        return self.busy / (elapsed * self.workers) if elapsed else 0.0
+
+    def _record(self, processed, busy, blocked):
+        with self._lock:
+            if processed:
+                self.count += 1
+            self.busy += busy
+            self.blocked += blocked
+
+
+class Pipeline:
+    """
+    Passes items through stages, connected by bounded queues, so that stages work on different items at the same
+    time and a stage that gets ahead waits for the stages after it. The number of items in the pipeline is bounded,
+    including items that wait for their turn in an ordered stage.
+
+    An item for which a stage raises an exception skips the remaining stages.
+    """
+    def __init__(self, stages, maxsize=None):
+        """
+        :param maxsize: number of items that may wait for each stage. Default is twice the workers of the stage.
+        """
+        self.stages = stages
+        self.maxsize = maxsize
+        self.elapsed = 0.0
+
+    def run(self, items):
+        """
+        Returns a generator of (item, exception), in the order that the items finish the pipeline. Exception is None
+        if all of the stages succeeded.
+
+        If iterating over items raises an exception, it is raised once the items before it have finished.
+        """
+        start = time.time()
+        queues = [Queue(self.maxsize or stage.workers * 2) for stage in self.stages]
+        out_queue = Queue()
+        # Items in the pipeline, released as they finish, so that an ordered stage does not collect items without
+        # limit while it waits for a slow item
+        in_flight = threading.Semaphore(sum(queue.maxsize + stage.workers
+                                            for queue, stage in zip(queues, self.stages)))
+        # The exc_info of an exception raised by items
+        feed_exc_info = []
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0], in_flight, feed_exc_info))]
+        for i, stage in enumerate(self.stages):
+            next_queue = queues[i + 1] if i + 1 < len(queues) else out_queue
+            remaining = [stage.workers]
+            remaining_lock = threading.Lock()
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(target=self._work,
+                                                args=(stage, queues[i], next_queue, remaining, remaining_lock)))
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        try:
+            while True:
+                entry = out_queue.get()
+                if entry is _END:
+                    break
+                (seq, item, exception) = entry
+                in_flight.release()
+                yield item, exception
+        finally:
+            self.elapsed = time.time() - start
+        if feed_exc_info:
+            raise feed_exc_info[0], feed_exc_info[1], feed_exc_info[2]
+
+    @staticmethod
+    def _feed(items, queue, in_flight, feed_exc_info):
+        try:
+            for seq, item in enumerate(items):
+                in_flight.acquire()
+                queue.put((seq, item, None))
+        except Exception:
+            feed_exc_info.extend(sys.exc_info())
+        finally:
+            # Otherwise the pipeline would wait for more items forever
+            queue.put(_END)
+
+    @staticmethod
+    def _work(stage, queue, next_queue, remaining, remaining_lock):
+        # Entries waiting for their turn in an ordered stage, as a heap by sequence number
+        waiting = []
+        next_seq = 0
+        while True:
+            entry = queue.get()
+            if entry is _END:
+                # Let the other workers of the stage see the end
+                queue.put(_END)
+                break
+            if not stage.ordered:
+                Pipeline._process(stage, entry, next_queue)
+                continue
+            heapq.heappush(waiting, entry)
+            while waiting and waiting[0][0] == next_seq:
+                Pipeline._process(stage, heapq.heappop(waiting), next_queue)
+                next_seq += 1
+        with remaining_lock:
+            remaining[0] -= 1
+            if not remaining[0]:
+                next_queue.put(_END)
+
+    @staticmethod
+    def _process(stage, entry, next_queue):
+        (seq, item, exception) = entry
+        processed = exception is None
+        busy = 0.0
+        if processed:
+            start = time.time()
+            try:
+                stage.func(item)
+            except Exception, e:
+                exception = e
+            busy = time.time() - start
+        start = time.time()
+        next_queue.put((seq, item, exception))
+        stage._record(processed, busy, time.time() - start)
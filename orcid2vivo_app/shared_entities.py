@@ -0,0 +1,83 @@
+import threading
+from rdflib import RDF, Graph
+from vivo_namespace import VIVO, BIBO, FOAF, SKOS, ns_manager
+from triple_store import STORE_NAME
+
+# Classes of entities that are commonly shared between people: publishers, funders and other organizations; journals
+# and other periodicals; subjects; degrees; and geographic locations.
+SHARED_CLASSES = (
+    FOAF.Organization,
+    BIBO.Journal,
+    BIBO.Magazine,
+    VIVO.Newsletter,
+    BIBO.Newspaper,
+    SKOS.Concept,
+    VIVO.AcademicDegree,
+    VIVO.GeographicLocation
+)
+
+
+class SharedEntities:
+    """
+    Registry of the defining triples (the triples of which they are the subject, e.g., type and label) of entities
+    that are shared between people in a batch.
+
+    The defining triples are moved from the graphs for people to the registry, so that the graphs for people carry
+    only the links to the entities and the defining triples can be loaded once for the batch.
+
+    Thread safe.
+    """
+    def __init__(self, namespace_manager=None):
+        self.namespace_manager = namespace_manager or ns_manager
+        self._triples = set()
+        self._new_triples = set()
+        self._lock = threading.Lock()
+
+    def extract(self, graph):
+        """
+        Removes the defining triples of shared entities from a graph and adds them to the registry.
+
+        Returns the triples removed.
+        """
+        entity_triples = []
+        for entity_uri in SharedEntities.entity_uris(graph):
+            entity_triples.extend(graph.triples((entity_uri, None, None)))
+            graph.remove((entity_uri, None, None))
+        with self._lock:
+            for triple in entity_triples:
+                if triple not in self._triples:
+                    self._triples.add(triple)
+                    self._new_triples.add(triple)
+        return entity_triples
+
+    @staticmethod
+    def entity_uris(graph):
+        """
+        Returns the uris of the shared entities in a graph.
+        """
+        return set(entity_uri for clazz in SHARED_CLASSES for entity_uri in graph.subjects(RDF.type, clazz))
+
+    def pop_new(self):
+        """
+        Returns a graph of the defining triples added to the registry since the last pop.
+        """
+        with self._lock:
+            new_triples = self._new_triples
+            self._new_triples = set()
+        graph = Graph(store=STORE_NAME, namespace_manager=self.namespace_manager)
+        for triple in new_triples:
+            graph.add(triple)
+        return graph
+
+    def restore(self, graph):
+        """
+        Returns triples popped from the registry, e.g., because they were not loaded, so that they are popped again.
+        """
+        with self._lock:
+            self._new_triples.update(graph)
+
+    def __contains__(self, triple):
+        return triple in self._triples
+
+    def __len__(self):
+        return len(self._triples)
@@ -0,0 +1,159 @@
+from rdflib import Graph
+from rdflib.plugins.serializers.nt import _nt_row
+from rdflib.plugins.serializers.nquads import _nq_row
+import vivo_namespace as ns
+import hashlib
+
+# Crosswalkers only ever call add((s, p, o)) on what they are given, so anything with that method can receive
+# their output. An rdflib Graph qualifies, but maintains indexes that are wasted when the output is only going
+# to be serialized, hashed, or compared.
+
+
+def to_nt_row(triple):
+    """
+    Returns the N-Triples line (including the newline) for a triple.
+    """
+    return _nt_row(triple)
+
+
+def to_nt_terms(triple):
+    """
+    Returns the N-Triples for each of the terms of a triple.
+    """
+    return tuple(to_nt_row(triple)[:-3].split(" ", 2))
+
+
+def triple_digest(triple):
+    """
+    Returns the md5 digest of the N-Triples line for a triple.
+    """
+    return hashlib.md5(to_nt_row(triple).encode("utf-8")).digest()
+
+
+class GraphSink:
+    """
+    A sink that adds to an rdflib Graph.
+    """
+    def __init__(self, graph=None, namespace_manager=None):
+        self.graph = graph if graph is not None else Graph(namespace_manager=namespace_manager or ns.ns_manager)
+
+    def add(self, triple):
+        self.graph.add(triple)
+
+    def __len__(self):
+        return len(self.graph)
+
+    def __iter__(self):
+        return iter(self.graph)
+
+    def __contains__(self, triple):
+        return triple in self.graph
+
+
+class SetSink:
+    """
+    A sink that collects triples in a set.
+    """
+    def __init__(self):
+        self.triples = set()
+
+    def add(self, triple):
+        self.triples.add(triple)
+
+    def to_graph(self, namespace_manager=None):
+        """
+        Returns an rdflib Graph containing the collected triples.
+        """
+        graph = Graph(namespace_manager=namespace_manager or ns.ns_manager)
+        for triple in self.triples:
+            graph.add(triple)
+        return graph
+
+    def __len__(self):
+        return len(self.triples)
+
+    def __iter__(self):
+        return iter(self.triples)
+
+    def __contains__(self, triple):
+        return triple in self.triples
+
+
+class NTriplesSink:
+    """
+    A sink that writes each triple to a stream as N-Triples as soon as it is added.
+
+    If a context is provided, writes N-Quads instead.
+
+    Triples that have already been written are skipped until reset() is called. Only a digest of each triple is
+    kept, but these grow with the triples written, so call reset() between people to keep memory bounded by a person
+    rather than by the whole output.
+    """
+    def __init__(self, stream, context=None, encoding="utf-8"):
+        self.stream = stream
+        self.context = context
+        self.encoding = encoding
+        self._digests = set()
+        self._count = 0
+
+    def add(self, triple):
+        row = _nq_row(triple, self.context) if self.context is not None else to_nt_row(triple)
+        encoded_row = row.encode(self.encoding, "replace")
+        digest = hashlib.md5(encoded_row).digest()
+        if digest not in self._digests:
+            self._digests.add(digest)
+            self.stream.write(encoded_row)
+            self._count += 1
+
+    def reset(self):
+        """
+        Forgets the triples that have been written, so that they are written again if added again.
+        """
+        self._digests = set()
+
+    def __len__(self):
+        """
+        Returns the number of triples written.
+        """
+        return self._count
+
+
+class HashSink:
+    """
+    A sink that accumulates an order-independent hash of the distinct triples added.
+
+    The hash is the sum (modulo 2^128) of the md5 of each triple's N-Triples line.
+    """
+    def __init__(self):
+        self.value = 0
+        self._digests = set()
+
+    def add(self, triple):
+        digest = triple_digest(triple)
+        if digest not in self._digests:
+            self._digests.add(digest)
+            self.value = (self.value + int(digest.encode("hex"), 16)) % 2 ** 128
+
+    def remove(self, triple):
+        digest = triple_digest(triple)
+        if digest in self._digests:
+            self._digests.remove(digest)
+            self.value = (self.value - int(digest.encode("hex"), 16)) % 2 ** 128
+
+    def hexdigest(self):
+        return "%032x" % self.value
+
+    def __len__(self):
+        return len(self._digests)
+
+
+class TeeSink:
+    """
+    A sink that adds to each of several sinks.
+    """
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def add(self, triple):
+        for sink in self.sinks:
+            sink.add(triple)
@@ -0,0 +1,400 @@
+import os
+import gzip
+import heapq
+import logging
+from rdflib import Graph
+from vivo_namespace import ns_manager
+from triple_store import STORE_NAME
+from sink import to_nt_row, to_nt_terms
+from diff import sorted_diff
+
+log = logging.getLogger(__name__)
+
+
+class TurtleSnapshots:
+    """
+    The graphs last loaded for people, as kept by earlier versions as a Turtle file per person and section in
+    data_path, e.g., 0000-0003-1527-0030.works.ttl, or per person for all sections, e.g., 0000-0003-1527-0030.ttl.
+
+    Only read to migrate them (see NTriplesSnapshots.migrate()).
+    """
+    def __init__(self, data_path):
+        self.data_path = data_path
+
+    def _filepath(self, orcid_id, section=None):
+        if section:
+            return os.path.join(self.data_path, "%s.%s.ttl" % (orcid_id.lower(), section))
+        return os.path.join(self.data_path, "%s.ttl" % orcid_id.lower())
+
+    @staticmethod
+    def _parse(filepath):
+        log.debug("Loading previous graph %s", filepath)
+        graph = Graph(namespace_manager=ns_manager)
+        graph.parse(filepath, format="turtle")
+        return graph
+
+
+class NTriplesSnapshots:
+    """
+    The graphs last loaded for people, kept as a gzipped file of sorted N-Triples per person and section in data_path,
+    e.g., 0000-0003-1527-0030.works.nt.gz.
+
+    Since the lines are sorted, a snapshot can be diffed against a new graph by merging (see diff.sorted_diff)
+    without parsing it.
+
+    A file for all sections (e.g., 0000-0003-1527-0030.nt.gz, migrated from earlier versions) is returned as the graph
+    for the None section until sections are saved for the person.
+    """
+    def __init__(self, data_path):
+        self.data_path = data_path
+
+    def saved_sections(self, orcid_id, sections):
+        """
+        Returns the sections that have been saved, as for load() but without reading the files.
+        """
+        saved_sections = set(section for section in sections if os.path.exists(self._filepath(orcid_id, section)))
+        if not saved_sections and os.path.exists(self._filepath(orcid_id)):
+            saved_sections.add(None)
+        return saved_sections
+
+    def load(self, orcid_id, sections):
+        """
+        Returns a map of section to the graph last saved for the section.
+
+        Sections that have not been saved are omitted.
+        """
+        return dict((section, parse_nt_lines(self.lines(orcid_id, section)))
+                    for section in self.saved_sections(orcid_id, sections))
+
+    def lines(self, orcid_id, section=None):
+        """
+        Returns an iterator of the sorted N-Triples lines (utf-8 encoded) last saved for the section.
+        """
+        with gzip.open(self._filepath(orcid_id, section), "rb") as f:
+            for line in f:
+                yield line
+
+    def save(self, orcid_id, section_graphs):
+        """
+        Saves the graphs for sections and removes the file for all sections, if any.
+        """
+        for section, graph in section_graphs.items():
+            filepath = self._filepath(orcid_id, section)
+            log.debug("Saving new graph %s", filepath)
+            self._write(filepath, sorted_nt_lines(graph))
+        filepath = self._filepath(orcid_id)
+        if os.path.exists(filepath):
+            log.debug("Removing graph %s", filepath)
+            os.remove(filepath)
+
+    def diff(self, orcid_id, section_graphs, saved_sections):
+        """
+        Diffs new graphs for sections against the last saved graphs, by merging their sorted lines.
+        :param section_graphs: a map of section to new graph. Other saved sections are unchanged.
+        :param saved_sections: the sections that have been saved (see saved_sections()).
+        :return: the graph of triples to add and the graph of triples to delete.
+        """
+        unchanged_sections = [section for section in saved_sections
+                              if section is not None and section not in section_graphs]
+        previous_lines = heapq.merge(*[self.lines(orcid_id, section) for section in saved_sections])
+        lines = heapq.merge(*([sorted_nt_lines(section_graph) for section_graph in section_graphs.values()]
+                              + [self.lines(orcid_id, section) for section in unchanged_sections]))
+        delete_lines = []
+        add_lines = []
+        for added, line in sorted_diff(previous_lines, lines):
+            (add_lines if added else delete_lines).append(line)
+        return parse_nt_lines(add_lines), parse_nt_lines(delete_lines)
+
+    def remove(self, orcid_id, sections):
+        """
+        Removes all of the saved graphs for orcid id.
+        """
+        for section in [None] + list(sections):
+            filepath = self._filepath(orcid_id, section)
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+    def migrate(self, orcid_id=None, sections=()):
+        """
+        Converts the Turtle snapshots kept by earlier versions (see TurtleSnapshots) to N-Triples snapshots.
+        :param orcid_id: only convert the snapshots for this orcid id. Default is all snapshots.
+        :param sections: the sections that may have been saved for orcid id.
+        :return: the number of files converted.
+        """
+        if orcid_id is None:
+            ttl_filepaths = [os.path.join(self.data_path, filename) for filename in sorted(os.listdir(self.data_path))
+                             if filename.endswith(".ttl")]
+        else:
+            # Avoid listing the data directory, which is done for every person
+            ttl_snapshots = TurtleSnapshots(self.data_path)
+            ttl_filepaths = [ttl_snapshots._filepath(orcid_id, section) for section in [None] + list(sections)]
+        count = 0
+        for ttl_filepath in ttl_filepaths:
+            if os.path.exists(ttl_filepath):
+                log.info("Migrating %s", ttl_filepath)
+                self._write("%s.nt.gz" % ttl_filepath[:-4], sorted_nt_lines(TurtleSnapshots._parse(ttl_filepath)))
+                os.remove(ttl_filepath)
+                count += 1
+        return count
+
+    def __iter__(self):
+        """
+        Returns an iterator of all of the saved graphs.
+        """
+        for filename in sorted(os.listdir(self.data_path)):
+            if filename.endswith(".nt.gz"):
+                with gzip.open(os.path.join(self.data_path, filename), "rb") as f:
+                    yield parse_nt_lines(f)
+
+    def _filepath(self, orcid_id, section=None):
+        if section:
+            return os.path.join(self.data_path, "%s.%s.nt.gz" % (orcid_id.lower(), section))
+        return os.path.join(self.data_path, "%s.nt.gz" % orcid_id.lower())
+
+    @staticmethod
+    def _write(filepath, lines):
+        # Written to a temporary file that replaces the file once complete, so that a crash while writing cannot
+        # leave a truncated file
+        tmp_filepath = "%s.tmp" % filepath
+        with gzip.open(tmp_filepath, "wb") as out:
+            out.writelines(lines)
+        os.rename(tmp_filepath, filepath)
+
+
+class SqliteSnapshots:
+    """
+    The graphs last loaded for people, kept as rows of a SQLite database (e.g., the loader's), so that everything is
+    in one file.
+
+    Terms are dictionary-encoded (as N-Triples) and triples are indexed by orcid id, so new graphs are diffed against
+    the last graphs in SQL with EXCEPT. Triples are also indexed by object, e.g., to find the people that link to an
+    organization.
+
+    Rows without a section (e.g., migrated from a file for all sections) are returned as the graph for the None
+    section until sections are saved for the person.
+    """
+    def __init__(self, conn):
+        """
+        :param conn: a sqlite3 Connection.
+        """
+        self._conn = conn
+        self._create_tables()
+
+    def _create_tables(self):
+        c = self._conn.cursor()
+        c.execute("""
+            create table if not exists snapshot_terms (id integer primary key, term text unique);
+        """)
+        c.execute("""
+            create table if not exists snapshot_sections (orcid_id, section);
+        """)
+        c.execute("""
+            create table if not exists snapshot_triples (orcid_id, section, s integer, p integer, o integer);
+        """)
+        c.execute("""
+            create index if not exists snapshot_triples_orcid_id on snapshot_triples (orcid_id, section);
+        """)
+        c.execute("""
+            create index if not exists snapshot_triples_o on snapshot_triples (o);
+        """)
+        self._conn.commit()
+
+    def saved_sections(self, orcid_id, sections):
+        """
+        Returns the sections that have been saved, as for load() but without reading the triples.
+        """
+        c = self._conn.cursor()
+        c.execute("""
+            select section from snapshot_sections where orcid_id=?
+        """, (orcid_id.lower(),))
+        saved = set(row[0] for row in c.fetchall())
+        saved_sections = set(section for section in sections if section in saved)
+        if not saved_sections and None in saved:
+            saved_sections.add(None)
+        return saved_sections
+
+    def load(self, orcid_id, sections):
+        """
+        Returns a map of section to the graph last saved for the section.
+
+        Sections that have not been saved are omitted.
+        """
+        section_graphs = {}
+        for section in self.saved_sections(orcid_id, sections):
+            c = self._conn.cursor()
+            c.execute("""
+                select s, p, o from snapshot_triples where orcid_id=? and section is ?
+            """, (orcid_id.lower(), section))
+            section_graphs[section] = self._parse(c.fetchall())
+        return section_graphs
+
+    def save(self, orcid_id, section_graphs):
+        """
+        Saves the graphs for sections and removes the rows for all sections, if any.
+        """
+        orcid_id = orcid_id.lower()
+        c = self._conn.cursor()
+        for section, graph in section_graphs.items():
+            log.debug("Saving new graph for %s %s", orcid_id, section)
+            self._load_new_triples(graph)
+            c.execute("""
+                delete from snapshot_triples where orcid_id=? and section is ?
+            """, (orcid_id, section))
+            c.execute("""
+                delete from snapshot_sections where orcid_id=? and section is ?
+            """, (orcid_id, section))
+            c.execute("""
+                insert into snapshot_triples (orcid_id, section, s, p, o) select ?, ?, s, p, o from new_triples
+            """, (orcid_id, section))
+            c.execute("""
+                insert into snapshot_sections (orcid_id, section) values (?, ?)
+            """, (orcid_id, section))
+        if any(section is not None for section in section_graphs):
+            c.execute("""
+                delete from snapshot_triples where orcid_id=? and section is null
+            """, (orcid_id,))
+            c.execute("""
+                delete from snapshot_sections where orcid_id=? and section is null
+            """, (orcid_id,))
+        self._conn.commit()
+
+    def diff(self, orcid_id, section_graphs, saved_sections):
+        """
+        Diffs new graphs for sections against the last saved graphs, with EXCEPT queries.
+        :param section_graphs: a map of section to new graph. Other saved sections are unchanged.
+        :param saved_sections: the sections that have been saved (see saved_sections()).
+        :return: the graph of triples to add and the graph of triples to delete.
+        """
+        orcid_id = orcid_id.lower()
+        self._load_new_triples(*section_graphs.values())
+        c = self._conn.cursor()
+        for section in saved_sections:
+            if section is not None and section not in section_graphs:
+                c.execute("""
+                    insert into new_triples (s, p, o) select s, p, o from snapshot_triples
+                    where orcid_id=? and section=?
+                """, (orcid_id, section))
+        c.execute("""
+            select s, p, o from new_triples
+            except select s, p, o from snapshot_triples where orcid_id=?
+        """, (orcid_id,))
+        add_graph = self._parse(c.fetchall())
+        c.execute("""
+            select s, p, o from snapshot_triples where orcid_id=?
+            except select s, p, o from new_triples
+        """, (orcid_id,))
+        delete_graph = self._parse(c.fetchall())
+        self._conn.commit()
+        return add_graph, delete_graph
+
+    def orcid_ids(self, uri):
+        """
+        Returns the orcid ids of the people whose last saved graphs have a uri as a subject or object.
+        """
+        c = self._conn.cursor()
+        c.execute("""
+            select distinct orcid_id from snapshot_triples
+            where s=(select id from snapshot_terms where term=?) or o=(select id from snapshot_terms where term=?)
+        """, (uri.n3(), uri.n3()))
+        return set(row[0] for row in c.fetchall())
+
+    def migrate(self, orcid_id, file_snapshots, sections):
+        """
+        Moves the graphs for orcid id from file snapshots (see NTriplesSnapshots) to rows, if none have been saved as
+        rows.
+        :return: True if graphs were moved.
+        """
+        file_snapshots.migrate(orcid_id, sections)
+        file_section_graphs = file_snapshots.load(orcid_id, sections)
+        if not file_section_graphs or self.saved_sections(orcid_id, sections):
+            return False
+        log.info("Migrating graphs for %s", orcid_id)
+        self.save(orcid_id, file_section_graphs)
+        file_snapshots.remove(orcid_id, sections)
+        return True
+
+    def __iter__(self):
+        """
+        Returns an iterator of all of the saved graphs.
+        """
+        c = self._conn.cursor()
+        c.execute("""
+            select orcid_id, section from snapshot_sections order by orcid_id, section
+        """)
+        for orcid_id, section in c.fetchall():
+            c.execute("""
+                select s, p, o from snapshot_triples where orcid_id=? and section is ?
+            """, (orcid_id, section))
+            yield self._parse(c.fetchall())
+
+    def _load_new_triples(self, *graphs):
+        """
+        Replaces the triples in the new_triples temp table with the triples in the graphs, encoded as term ids.
+        """
+        c = self._conn.cursor()
+        c.execute("""
+            create temp table if not exists new_terms (s, p, o);
+        """)
+        c.execute("""
+            create temp table if not exists new_triples (s integer, p integer, o integer);
+        """)
+        c.execute("delete from new_terms")
+        c.execute("delete from new_triples")
+        c.executemany("""
+            insert into new_terms (s, p, o) values (?, ?, ?)
+        """, set(to_nt_terms(triple) for graph in graphs for triple in graph))
+        c.execute("""
+            insert or ignore into snapshot_terms (term)
+            select s from new_terms union select p from new_terms union select o from new_terms
+        """)
+        c.execute("""
+            insert into new_triples (s, p, o)
+            select ts.id, tp.id, tobj.id from new_terms
+            join snapshot_terms ts on ts.term=new_terms.s
+            join snapshot_terms tp on tp.term=new_terms.p
+            join snapshot_terms tobj on tobj.term=new_terms.o
+        """)
+
+    def _parse(self, id_triples):
+        """
+        Returns a graph of triples of term ids.
+        """
+        c = self._conn.cursor()
+        terms = {}
+        term_ids = list(set(term_id for id_triple in id_triples for term_id in id_triple))
+        # Stay under SQLite's limit on the number of variables
+        for i in xrange(0, len(term_ids), 500):
+            chunk = term_ids[i:i + 500]
+            c.execute("""
+                select id, term from snapshot_terms where id in (%s)
+            """ % ",".join("?" * len(chunk)), chunk)
+            terms.update(c.fetchall())
+        return parse_nt_lines(u"%s %s %s .\n" % (terms[s], terms[p], terms[o]) for s, p, o in id_triples)
+
+
+def sorted_nt_lines(graph):
+    """
+    Returns the sorted, distinct N-Triples lines (utf-8 encoded) for a graph.
+    """
+    return sorted(set(to_nt_row(triple).encode("utf-8") for triple in graph))
+
+
+def parse_nt_lines(lines):
+    """
+    Returns a graph of N-Triples lines (utf-8 encoded or unicode).
+    """
+    graph = Graph(store=STORE_NAME, namespace_manager=ns_manager)
+    graph.parse(data="".join(line.encode("utf-8") if isinstance(line, unicode) else line for line in lines),
+                format="nt")
+    return graph
+
+
+def union_graph(graphs):
+    """
+    Returns a new graph with the triples of all of the graphs.
+    """
+    graph = Graph(store=STORE_NAME, namespace_manager=ns_manager)
+    for g in graphs:
+        for triple in g:
+            graph.add(triple)
+    return graph
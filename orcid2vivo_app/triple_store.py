@@ -0,0 +1,109 @@
+from rdflib import plugin
+from rdflib.store import Store
+
+__all__ = ['AddOptimizedStore', 'STORE_NAME']
+
+STORE_NAME = "AddOptimized"
+
+
+class AddOptimizedStore(Store):
+    """
+    An in memory store for graphs that are mostly added to and then iterated over or serialized, such as the graphs
+    produced by crosswalks.
+
+    Triples are kept in a single set. Indexes by subject, predicate and object are only built the first time that a
+    pattern needs them; after that they are maintained on add and remove.
+
+    All triples belong to a single context, which is enough for utilities like rdflib.compare that wrap the store of a
+    graph in a ConjunctiveGraph. Not formula aware.
+    """
+    context_aware = True
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        super(AddOptimizedStore, self).__init__(configuration)
+        self.identifier = identifier
+        self._triples = set()
+        self._context = None
+        # Position (0, 1, 2) to index of term to set of triples. Built lazily.
+        self._indexes = {}
+        self._namespace = {}
+        self._prefix = {}
+
+    def add(self, triple, context, quoted=False):
+        if quoted:
+            raise Exception("AddOptimizedStore is not formula aware")
+        if self._context is None:
+            self._context = context
+        if triple not in self._triples:
+            self._triples.add(triple)
+            for position, index in self._indexes.iteritems():
+                index.setdefault(triple[position], set()).add(triple)
+
+    def addN(self, quads):
+        for s, p, o, c in quads:
+            self.add((s, p, o), c)
+
+    def remove(self, triple_pattern, context=None):
+        for triple in list(self._match(triple_pattern)):
+            self._triples.discard(triple)
+            for position, index in self._indexes.iteritems():
+                term_triples = index.get(triple[position])
+                if term_triples is not None:
+                    term_triples.discard(triple)
+                    if not term_triples:
+                        del index[triple[position]]
+
+    def triples(self, triple_pattern, context=None):
+        for triple in self._match(triple_pattern):
+            yield triple, self._contexts()
+
+    def _match(self, triple_pattern):
+        bound = [(position, term) for position, term in enumerate(triple_pattern) if term is not None]
+        # Iterate over everything
+        if not bound:
+            return iter(self._triples)
+        # Membership
+        if len(bound) == 3:
+            return iter([triple_pattern]) if triple_pattern in self._triples else iter([])
+        # Start from the smallest candidate set, then filter on the rest of the pattern
+        candidates = min([self._index(position).get(term, ()) for position, term in bound], key=len)
+        return iter([triple for triple in candidates
+                     if all(triple[position] == term for position, term in bound)])
+
+    def _index(self, position):
+        index = self._indexes.get(position)
+        if index is None:
+            index = {}
+            for triple in self._triples:
+                index.setdefault(triple[position], set()).add(triple)
+            self._indexes[position] = index
+        return index
+
+    def _contexts(self):
+        return (c for c in [self._context] if c is not None)
+
+    def __len__(self, context=None):
+        return len(self._triples)
+
+    def contexts(self, triple=None):
+        return self._contexts()
+
+    def bind(self, prefix, namespace):
+        self._prefix[namespace] = prefix
+        self._namespace[prefix] = namespace
+
+    def namespace(self, prefix):
+        return self._namespace.get(prefix, None)
+
+    def prefix(self, namespace):
+        return self._prefix.get(namespace, None)
+
+    def namespaces(self):
+        for prefix, namespace in self._namespace.iteritems():
+            yield prefix, namespace
+
+
+plugin.register(STORE_NAME, Store, "orcid2vivo_app.triple_store", "AddOptimizedStore")
@@ -0,0 +1,91 @@
+import hashlib
+import math
+import struct
+import codecs
+from rdflib import RDF, URIRef
+
+__all__ = ['UriIndex']
+
+RDF_TYPE_NT = " <%s> " % RDF.type
+HEADER_FORMAT = "<QII"
+
+
+class UriIndex:
+    """
+    A compact membership index of URIs, e.g., of the entities already in a VIVO instance.
+
+    Implemented as a Bloom filter, so membership is checked in constant time and memory, at the cost of a small
+    rate of false positives (a URI that was not added may be reported as present). There are no false negatives.
+    """
+    def __init__(self, capacity=1000000, error_rate=0.000001, num_bits=None, num_hashes=None, bits=None, count=0):
+        """
+        :param capacity: the number of URIs that are expected to be added.
+        :param error_rate: the rate of false positives when capacity URIs have been added.
+        """
+        self.num_bits = num_bits or int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = num_hashes or max(1, int(round(self.num_bits / float(capacity) * math.log(2))))
+        self._bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+        self._checksum = None
+
+    def _positions(self, uri):
+        h1, h2 = struct.unpack("<QQ", hashlib.md5(uri.encode("utf-8")).digest())
+        return [(h1 + i * h2) % self.num_bits for i in xrange(self.num_hashes)]
+
+    def add(self, uri):
+        for position in self._positions(uri):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+        self._checksum = None
+
+    def __contains__(self, uri):
+        for position in self._positions(uri):
+            if not self._bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        """
+        Returns the number of URIs that have been added (including duplicates).
+        """
+        return self.count
+
+    @property
+    def checksum(self):
+        """
+        Changes when URIs are added to the index, e.g., to tell whether output that depended on the index is stale.
+        """
+        if self._checksum is None:
+            self._checksum = hashlib.md5(self._bits).hexdigest()
+        return self._checksum
+
+    def add_from_nt(self, filepath):
+        """
+        Adds the subjects that are typed (i.e., have an rdf:type) in an N-Triples file, e.g., a dump of VIVO.
+
+        Read line by line, so the file can be larger than memory.
+        """
+        with codecs.open(filepath, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("<") and RDF_TYPE_NT in line:
+                    self.add(line[1:line.index(">")])
+
+    def add_from_graph(self, graph):
+        """
+        Adds the subjects that are typed in a graph.
+        """
+        for subject in set(graph.subjects(RDF.type, None)):
+            if isinstance(subject, URIRef):
+                self.add(subject)
+
+    def save(self, filepath):
+        with open(filepath, "wb") as f:
+            f.write(struct.pack(HEADER_FORMAT, self.num_bits, self.num_hashes, self.count))
+            f.write(self._bits)
+
+    @staticmethod
+    def load(filepath):
+        with open(filepath, "rb") as f:
+            num_bits, num_hashes, count = struct.unpack(HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT)))
+            bits = bytearray(f.read())
+        return UriIndex(num_bits=num_bits, num_hashes=num_hashes, bits=bits, count=count)
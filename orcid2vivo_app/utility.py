@@ -1,8 +1,39 @@
-from rdflib import RDF, RDFS, XSD, Literal
-from vivo_namespace import VIVO
+from rdflib import RDF, RDFS, XSD, Literal, URIRef, Graph
+from rdflib.plugins.serializers.nt import _quoteLiteral
+from vivo_namespace import VIVO, VIVO_KB_GRAPH
+from triple_store import STORE_NAME
+from diff import has_bnodes
 from numbers import Number
+from multiprocessing.pool import ThreadPool
 from SPARQLWrapper import SPARQLWrapper
+from SPARQLWrapper.SPARQLExceptions import QueryBadFormed, Unauthorized, EndPointNotFound
+import io
+import itertools
+import logging
 import re
+import threading
+import time
+import weakref
+
+log = logging.getLogger(__name__)
+
+# Bookkeeping in ORCID records that is not crosswalked
+ORCID_PRUNED_KEYS = frozenset(("source", "created-date", "last-modified-date", "visibility", "display-index",
+                               "history", "preferences"))
+
+# Limits on the size of a single SPARQL Update request. Larger graphs are split into chunks.
+SPARQL_MAX_TRIPLES = 5000
+SPARQL_MAX_BYTES = 1024 * 1024
+# Number of times a chunk is retried and seconds to wait before the first retry (doubled for each retry)
+SPARQL_RETRIES = 2
+SPARQL_RETRY_WAIT = 5.0
+# Local names that are written as prefixed names. (A subset of those allowed by SPARQL.)
+PREFIXED_LOCAL_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_-]*$")
+# Errors that retrying will not fix
+SPARQL_FATAL_ERRORS = (QueryBadFormed, Unauthorized, EndPointNotFound)
+
+# Endpoints that rejected an update with more than one operation
+_single_operation_endpoints = set()
 
 
 def num_to_str(num):
@@ -74,46 +105,107 @@ def month_int_to_month_str(month_int):
     return months[month_int-1]
 
 
-def add_date(year, g, identifier_strategy, month=None, day=None, label=None):
+def add_date(year, g, identifier_strategy, month=None, day=None, label=None, date_registry=None):
     """
     Adds triples for a date.
 
     Return True if date was added.
+    :param date_registry: a DateRegistry, so that the date's triples are only computed once and only added to g once.
+    """
+    if date_registry is not None:
+        return date_registry.add_date(year, g, identifier_strategy, month=month, day=day, label=label)
+    date_uri, date_triples = _date(year, identifier_strategy, month, day, label)
+    for triple in date_triples:
+        g.add(triple)
+    return date_uri
+
+
+def _date(year, identifier_strategy, month=None, day=None, label=None):
+    """
+    Returns the uri and triples for a date, or None and no triples if there is no year.
     """
     #Date
     date_uri = identifier_strategy.to_uri(VIVO.DateTimeValue, {"year": year, "month": month, "day": day})
     if year:
-        g.add((date_uri, RDF.type, VIVO.DateTimeValue))
+        triples = [(date_uri, RDF.type, VIVO.DateTimeValue)]
         #Day, month, and year
         if day and month:
-            g.add((date_uri, VIVO.dateTimePrecision, VIVO.yearMonthDayPrecision))
-            g.add((date_uri, VIVO.dateTime,
-                   Literal("%s-%02d-%02dT00:00:00" % (
-                       int(year), month_str_to_month_int(month), int(day)),
-                       datatype=XSD.dateTime)))
-            g.add((date_uri,
-                   RDFS.label,
-                   Literal(label or "%s %s, %s" % (month_int_to_month_str(month), num_to_str(day), num_to_str(year)))))
+            triples.append((date_uri, VIVO.dateTimePrecision, VIVO.yearMonthDayPrecision))
+            triples.append((date_uri, VIVO.dateTime,
+                            Literal("%s-%02d-%02dT00:00:00" % (
+                                int(year), month_str_to_month_int(month), int(day)),
+                                datatype=XSD.dateTime)))
+            triples.append((date_uri,
+                            RDFS.label,
+                            Literal(label or "%s %s, %s" % (month_int_to_month_str(month), num_to_str(day),
+                                                            num_to_str(year)))))
         #Month and year
         elif month:
-            g.add((date_uri, VIVO.dateTimePrecision, VIVO.yearMonthPrecision))
-            g.add((date_uri, VIVO.dateTime,
-                   Literal("%s-%02d-01T00:00:00" % (
-                       year, month_str_to_month_int(month)),
-                       datatype=XSD.dateTime)))
-            g.add((date_uri,
-                   RDFS.label,
-                   Literal(label or "%s %s" % (month, num_to_str(year)))))
+            triples.append((date_uri, VIVO.dateTimePrecision, VIVO.yearMonthPrecision))
+            triples.append((date_uri, VIVO.dateTime,
+                            Literal("%s-%02d-01T00:00:00" % (
+                                year, month_str_to_month_int(month)),
+                                datatype=XSD.dateTime)))
+            triples.append((date_uri,
+                            RDFS.label,
+                            Literal(label or "%s %s" % (month, num_to_str(year)))))
         else:
             #Just year
-            g.add((date_uri, VIVO.dateTimePrecision, VIVO.yearPrecision))
-            g.add((date_uri, VIVO.dateTime,
-                   Literal("%s-01-01T00:00:00" % (
-                       year),
-                       datatype=XSD.dateTime)))
-            g.add((date_uri, RDFS.label, Literal(label or num_to_str(year))))
+            triples.append((date_uri, VIVO.dateTimePrecision, VIVO.yearPrecision))
+            triples.append((date_uri, VIVO.dateTime,
+                            Literal("%s-01-01T00:00:00" % (
+                                year),
+                                datatype=XSD.dateTime)))
+            triples.append((date_uri, RDFS.label, Literal(label or num_to_str(year))))
+        return date_uri, tuple(triples)
+    return None, ()
+
+
+class DateRegistry:
+    """
+    Interns dates, so that the uri and triples for each distinct date are computed once and the triples are added to
+    each graph or sink once. Later uses of a date only need the linking triple.
+
+    Since the uri of a date is assumed to depend only on the date (as with HashIdentifierStrategy), a registry should
+    only be shared by crosswalks with the same identifier strategy and namespace, e.g., via a CrosswalkContext. Also
+    assumes that date triples are not removed from a graph after they are added.
+
+    Thread safe.
+    """
+    def __init__(self):
+        # (year, month, day, label) to (uri, triples)
+        self._dates = {}
+        # Graph or sink to keys of the dates that have been added to it
+        self._added = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def add_date(self, year, g, identifier_strategy, month=None, day=None, label=None):
+        """
+        Adds triples for a date, unless already added to g.
+
+        Returns the uri of the date or None.
+        """
+        if not year:
+            return None
+        key = (year, month, day, label)
+        with self._lock:
+            date = self._dates.get(key)
+        if date is None:
+            date = _date(year, identifier_strategy, month, day, label)
+            with self._lock:
+                date = self._dates.setdefault(key, date)
+        date_uri, date_triples = date
+        with self._lock:
+            added_keys = self._added.setdefault(g, set())
+            added = key in added_keys
+            added_keys.add(key)
+        if not added:
+            for triple in date_triples:
+                g.add(triple)
         return date_uri
-    return None
+
+    def __len__(self):
+        return len(self._dates)
 
 
 def add_date_interval(subject_uri, g, identifier_strategy, start_uri=None, end_uri=None):
@@ -133,38 +225,205 @@ def add_date_interval(subject_uri, g, identifier_strategy, start_uri=None, end_u
     return None
 
 
-def sparql_insert(graph, endpoint, username, password):
-    #Need to construct query
-    ns_lines = []
-    triple_lines = []
-    for line in graph.serialize(format="turtle").splitlines():
-        if line.startswith("@prefix"):
-            #Change from @prefix to PREFIX
-            ns_lines.append("PREFIX" + line[7:-2])
-        else:
-            triple_lines.append(line)
-    query = "\n".join(ns_lines)
-    query += "\nINSERT DATA { GRAPH <http://vitro.mannlib.cornell.edu/default/vitro-kb-2> {\n"
-    query += "\n".join(triple_lines)
-    query += "\n}}"
-    sparql_update(query, endpoint, username, password)
-
-
-def sparql_delete(graph, endpoint, username, password):
-    #Need to construct query
-    ns_lines = []
-    triple_lines = []
-    for line in graph.serialize(format="turtle").splitlines():
-        if line.startswith("@prefix"):
-            #Change from @prefix to PREFIX
-            ns_lines.append("PREFIX" + line[7:-2])
-        else:
-            triple_lines.append(line)
-    query = "\n".join(ns_lines)
-    query += "\nDELETE DATA { GRAPH <http://vitro.mannlib.cornell.edu/default/vitro-kb-2> {\n"
-    query += "\n".join(triple_lines)
-    query += "\n}}"
-    sparql_update(query, endpoint, username, password)
+def sparql_insert(graph, endpoint, username, password, max_triples=SPARQL_MAX_TRIPLES, max_bytes=SPARQL_MAX_BYTES,
+                  workers=1, prefixes=None):
+    """
+    Inserts the triples of a graph with INSERT DATA, in chunks (see chunk_graph()) that are posted and retried
+    separately.
+    :param workers: number of chunks to post concurrently.
+    :param prefixes: see sparql_data_query().
+    """
+    _sparql_update_chunks("INSERT", graph, endpoint, username, password, max_triples, max_bytes, workers, prefixes)
+
+
+def sparql_delete(graph, endpoint, username, password, max_triples=SPARQL_MAX_TRIPLES, max_bytes=SPARQL_MAX_BYTES,
+                  workers=1, prefixes=None):
+    """
+    Deletes the triples of a graph with DELETE DATA, in chunks (see chunk_graph()) that are posted and retried
+    separately.
+    :param workers: number of chunks to post concurrently.
+    :param prefixes: see sparql_data_query().
+    """
+    _sparql_update_chunks("DELETE", graph, endpoint, username, password, max_triples, max_bytes, workers, prefixes)
+
+
+def sparql_delete_insert(delete_graph, insert_graph, endpoint, username, password, max_triples=SPARQL_MAX_TRIPLES,
+                         max_bytes=SPARQL_MAX_BYTES, prefixes=None):
+    """
+    Deletes the triples of a graph and inserts the triples of another graph with a single DELETE DATA ... ;
+    INSERT DATA ... request, so that the change is applied at once.
+
+    Falls back to sparql_delete() and sparql_insert() if the graphs together exceed the limits for a chunk or the
+    request fails. An endpoint that rejects the request as bad, but accepts the separate requests, is only sent separate
+    requests after that.
+    :param prefixes: see sparql_data_query().
+    """
+    if not delete_graph or not insert_graph or endpoint in _single_operation_endpoints \
+            or len(delete_graph) + len(insert_graph) > max_triples \
+            or sum(_triple_size(triple) for graph in (delete_graph, insert_graph) for triple in graph) > max_bytes:
+        if delete_graph:
+            sparql_delete(delete_graph, endpoint, username, password, max_triples=max_triples, max_bytes=max_bytes,
+                          prefixes=prefixes)
+        if insert_graph:
+            sparql_insert(insert_graph, endpoint, username, password, max_triples=max_triples, max_bytes=max_bytes,
+                          prefixes=prefixes)
+        return
+
+    query = sparql_data_query((("DELETE", delete_graph), ("INSERT", insert_graph)), prefixes=prefixes)
+    try:
+        _sparql_update_with_retries(query, endpoint, username, password)
+    except QueryBadFormed:
+        # The triples, rather than the combined request, may be what is bad
+        sparql_delete(delete_graph, endpoint, username, password, max_triples=max_triples, max_bytes=max_bytes,
+                      prefixes=prefixes)
+        sparql_insert(insert_graph, endpoint, username, password, max_triples=max_triples, max_bytes=max_bytes,
+                      prefixes=prefixes)
+        log.warning("%s rejected combined DELETE DATA and INSERT DATA. Using separate requests.", endpoint)
+        _single_operation_endpoints.add(endpoint)
+    except Exception:
+        log.warning("Combined DELETE DATA and INSERT DATA failed. Retrying as separate requests.", exc_info=True)
+        sparql_delete(delete_graph, endpoint, username, password, max_triples=max_triples, max_bytes=max_bytes,
+                      prefixes=prefixes)
+        sparql_insert(insert_graph, endpoint, username, password, max_triples=max_triples, max_bytes=max_bytes,
+                      prefixes=prefixes)
+
+
+def _sparql_update_chunks(operation, graph, endpoint, username, password, max_triples, max_bytes, workers, prefixes):
+    chunks = chunk_graph(graph, max_triples=max_triples, max_bytes=max_bytes)
+    if len(chunks) > 1:
+        log.debug("%s DATA of %s triples in %s chunks", operation, len(graph), len(chunks))
+
+    def update_chunk(chunk):
+        _sparql_update_with_retries(sparql_data_query(((operation, chunk),), prefixes=prefixes), endpoint,
+                                    username, password)
+
+    if workers > 1 and len(chunks) > 1:
+        pool = ThreadPool(min(workers, len(chunks)))
+        try:
+            pool.map(update_chunk, chunks)
+        finally:
+            pool.terminate()
+    else:
+        for chunk in chunks:
+            update_chunk(chunk)
+
+
+def sparql_data_query(operations, prefixes=None):
+    """
+    Returns a SPARQL Update query (UTF-8 encoded) of DELETE DATA and/or INSERT DATA operations.
+
+    The triples are written directly into the query with N-Triples term syntax, rather than serialized first.
+    :param operations: a sequence of ("DELETE" or "INSERT", graph or iterable of triples).
+    :param prefixes: a map of prefix to namespace. URIs in the namespaces are written as prefixed names (if their
+    local names allow it).
+    """
+    query = io.BytesIO()
+    compact = None
+    if prefixes:
+        for prefix, namespace in sorted(prefixes.items()):
+            query.write((u"PREFIX %s: <%s>\n" % (prefix, namespace)).encode("utf-8"))
+        compact = _uri_compactor(prefixes)
+    for i, (operation, triples) in enumerate(operations):
+        if i:
+            query.write(";\n")
+        query.write("%s DATA { GRAPH <%s> {\n" % (operation, VIVO_KB_GRAPH.encode("utf-8")))
+        for (s, p, o) in triples:
+            query.write((u"%s %s %s .\n" % (_sparql_term(s, compact), _sparql_term(p, compact),
+                                            _sparql_term(o, compact))).encode("utf-8"))
+        query.write("}}")
+    return query.getvalue()
+
+
+def _sparql_term(term, compact):
+    if isinstance(term, Literal):
+        return _quoteLiteral(term)
+    if compact is not None and isinstance(term, URIRef):
+        return compact(term)
+    return term.n3()
+
+
+def _uri_compactor(prefixes):
+    # Longest namespace first, so that the most specific prefix is used
+    namespaces = sorted(((unicode(namespace), prefix) for prefix, namespace in prefixes.items()),
+                        key=lambda (namespace, prefix): -len(namespace))
+    compacted = {}
+
+    def compact(uri):
+        term = compacted.get(uri)
+        if term is None:
+            term = uri.n3()
+            for namespace, prefix in namespaces:
+                if uri.startswith(namespace) and PREFIXED_LOCAL_NAME_RE.match(uri[len(namespace):]):
+                    term = u"%s:%s" % (prefix, uri[len(namespace):])
+                    break
+            compacted[uri] = term
+        return term
+
+    return compact
+
+
+def _sparql_update_with_retries(query, endpoint, username, password, retries=SPARQL_RETRIES,
+                                retry_wait=SPARQL_RETRY_WAIT):
+    for attempt in range(retries + 1):
+        try:
+            return sparql_update(query, endpoint, username, password)
+        except Exception, e:
+            if attempt == retries or isinstance(e, SPARQL_FATAL_ERRORS):
+                raise
+            log.warning("SPARQL Update failed. Retrying.", exc_info=True)
+            time.sleep(retry_wait * 2 ** attempt)
+
+
+def chunk_graph(graph, max_triples=SPARQL_MAX_TRIPLES, max_bytes=SPARQL_MAX_BYTES):
+    """
+    Splits a graph into graphs of no more than max_triples triples and (approximately, as N-Triples) max_bytes bytes.
+
+    The triples about a subject are kept in the same chunk, unless they alone exceed the limits.
+    :return: a list of graphs. A graph that does not exceed the limits, or that has blank nodes (which can't be split
+    across requests), is returned as is.
+    """
+    triple_sizes = [(triple, _triple_size(triple)) for triple in graph]
+    if len(triple_sizes) <= max_triples and sum(size for (triple, size) in triple_sizes) <= max_bytes:
+        return [graph]
+    if has_bnodes(graph):
+        log.warning("Not splitting graph of %s triples, since it has blank nodes", len(triple_sizes))
+        return [graph]
+
+    chunks = []
+    chunk_triples = []
+    chunk_bytes = 0
+    for subject, subject_triple_sizes in itertools.groupby(sorted(triple_sizes, key=lambda t: t[0][0]),
+                                                           key=lambda t: t[0][0]):
+        subject_triple_sizes = list(subject_triple_sizes)
+        subject_bytes = sum(size for (triple, size) in subject_triple_sizes)
+        if chunk_triples and (len(chunk_triples) + len(subject_triple_sizes) > max_triples
+                              or chunk_bytes + subject_bytes > max_bytes):
+            chunks.append(chunk_triples)
+            chunk_triples = []
+            chunk_bytes = 0
+        for triple, size in subject_triple_sizes:
+            # A subject with more triples than fit in a chunk is split
+            if chunk_triples and (len(chunk_triples) + 1 > max_triples or chunk_bytes + size > max_bytes):
+                chunks.append(chunk_triples)
+                chunk_triples = []
+                chunk_bytes = 0
+            chunk_triples.append(triple)
+            chunk_bytes += size
+    if chunk_triples:
+        chunks.append(chunk_triples)
+
+    chunk_graphs = []
+    for chunk_triples in chunks:
+        chunk = Graph(store=STORE_NAME, namespace_manager=graph.namespace_manager)
+        for triple in chunk_triples:
+            chunk.add(triple)
+        chunk_graphs.append(chunk)
+    return chunk_graphs
+
+
+def _triple_size(triple):
+    # Length as an N-Triples line
+    return len(" ".join(term.n3() for term in triple)) + 3
 
 
 def sparql_update(query, endpoint, username, password):
@@ -184,6 +443,29 @@ def sparql_update(query, endpoint, username, password):
     sparql.query()
 
 
+def prune_orcid_pairs(pairs):
+    """
+    An object_pairs_hook for decoding ORCID records that omits bookkeeping (e.g., source and last-modified-date) that
+    is not crosswalked.
+
+    Since objects are pruned as they are decoded, the bookkeeping is never held for the whole record.
+    """
+    return dict(pair for pair in pairs if pair[0] not in ORCID_PRUNED_KEYS)
+
+
+def prune_orcid_summary_pairs(pairs):
+    """
+    As prune_orcid_pairs(), but keeps the last-modified-date of activities (objects with a put-code).
+
+    For decoding profiles, whose activities are summaries: a change to the full record of an activity (e.g., a work's
+    contributors) only shows in its summary as a new last-modified-date, which fingerprints must see.
+    """
+    obj = dict(pair for pair in pairs if pair[0] not in ORCID_PRUNED_KEYS or pair[0] == "last-modified-date")
+    if "last-modified-date" in obj and "put-code" not in obj:
+        del obj["last-modified-date"]
+    return obj
+
+
 def clean_orcid(value):
     """
     Minimal ORCID validation.  Allowing for orcid.org/
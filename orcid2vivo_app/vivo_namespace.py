@@ -1,5 +1,5 @@
 from rdflib.namespace import Namespace, NamespaceManager
-from rdflib import Graph
+from rdflib import Graph, URIRef
 
 #Our data namespace
 D = Namespace('http://vivo.mydomain.edu/individual/')
@@ -16,11 +16,35 @@ FOAF = Namespace('http://xmlns.com/foaf/0.1/')
 #The SKOS namespace
 SKOS = Namespace('http://www.w3.org/2004/02/skos/core#')
 
-ns_manager = NamespaceManager(Graph())
-ns_manager.bind('d', D)
-ns_manager.bind('vivo', VIVO)
-ns_manager.bind('vcard', VCARD)
-ns_manager.bind('obo', OBO)
-ns_manager.bind('bibo', BIBO)
-ns_manager.bind("foaf", FOAF)
-ns_manager.bind("skos", SKOS)
+#The graph that VIVO keeps its knowledge base in
+VIVO_KB_GRAPH = URIRef('http://vitro.mannlib.cornell.edu/default/vitro-kb-2')
+
+_ns_managers = {}
+
+
+def make_ns_manager(d_namespace):
+    """
+    Returns a namespace manager that binds d to the provided data namespace and the other prefixes.
+    """
+    manager = NamespaceManager(Graph())
+    manager.bind('d', d_namespace)
+    manager.bind('vivo', VIVO)
+    manager.bind('vcard', VCARD)
+    manager.bind('obo', OBO)
+    manager.bind('bibo', BIBO)
+    manager.bind("foaf", FOAF)
+    manager.bind("skos", SKOS)
+    return manager
+
+
+def get_ns_manager(d_namespace):
+    """
+    Returns a shared namespace manager for the provided data namespace.
+    """
+    manager = _ns_managers.get(unicode(d_namespace))
+    if manager is None:
+        manager = _ns_managers.setdefault(unicode(d_namespace), make_ns_manager(d_namespace))
+    return manager
+
+
+ns_manager = make_ns_manager(D)
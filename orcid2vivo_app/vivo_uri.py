@@ -1,4 +1,4 @@
-import vivo_namespace as ns
+from context import CrosswalkContext
 import hashlib
 import re
 import collections
@@ -21,8 +21,12 @@ class HashIdentifierStrategy():
     """
     pattern = re.compile("^.+/(.+?)(#(.+))?$")
 
-    def __init__(self):
-        pass
+    def __init__(self, context=None):
+        """
+        :param context: the CrosswalkContext that provides the namespace. Default is a context for the default
+        namespace.
+        """
+        self.context = context or CrosswalkContext()
 
     def to_uri(self, clazz, attrs, general_clazz=None):
         """
@@ -32,8 +36,8 @@ class HashIdentifierStrategy():
         :param general_clazz: a superclass of the entity that can be used to group like entities.
         :return: URI for the entity.
         """
-        return ns.D["%s-%s" % (self._class_to_prefix(general_clazz) or self._class_to_prefix(clazz),
-                    self._attrs_to_hash(attrs))]
+        return self.context.namespace["%s-%s" % (self._class_to_prefix(general_clazz) or self._class_to_prefix(clazz),
+                                                 self._attrs_to_hash(attrs))]
 
     @staticmethod
     def _class_to_prefix(clazz):
@@ -7,7 +7,20 @@ import bibtexparser
 from bibtexparser.bparser import BibTexParser
 from bibtexparser.latexenc import unicode_to_latex, unicode_to_crappy_latex1, unicode_to_crappy_latex2
 import itertools
-from utility import add_date
+import hashlib
+import json
+import threading
+from utility import add_date, prune_orcid_pairs
+from context import CrosswalkContext
+from sink import SetSink
+
+# Change when the triples produced for a work change, so that cached works are not reused.
+CROSSWALK_VERSION = "1"
+
+# Prefixes of the keys of the entries in a work cache. The entry for a work is a tuple of triples; the entry for the
+# description of a work in a work registry is (work uri, tuple of description triples).
+WORK_KEY_PREFIX = "work:"
+DESCRIPTION_KEY_PREFIX = "description:"
 
 work_type_map = {
     "BOOK": BIBO["Book"],
@@ -83,12 +96,84 @@ bibtex_type_map = {
 }
 
 
+class WorkRegistry:
+    """
+    The descriptions (all triples except for contributors) of the works crosswalked in a batch, keyed on the source
+    records that a description is crosswalked from, so that a work shared by people in the batch (e.g., co-authors) is
+    only described once. Since a description is only reused for the same source records, it is the same whichever
+    person it was first crosswalked for.
+
+    Thread safe. Counts hits, i.e., the work descriptions that did not need to be crosswalked.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        # All of the triples in the descriptions
+        self.triples = set()
+        # The triples in the descriptions that have been loaded
+        self.loaded_triples = set()
+        self._works = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns (work uri, tuple of description triples) for the key or None.
+        """
+        with self._lock:
+            work = self._works.get(key)
+            if work is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return work
+
+    def peek(self, key):
+        """
+        Returns (work uri, tuple of description triples) for the key or None, without counting.
+        """
+        return self._works.get(key)
+
+    def __setitem__(self, key, work):
+        with self._lock:
+            self._works[key] = work
+            self.triples.update(work[1])
+
+    def setdefault(self, key, work):
+        """
+        Adds the work if there is not already a work for the key.
+        """
+        with self._lock:
+            if key not in self._works:
+                self._works[key] = work
+                self.triples.update(work[1])
+
+    def __contains__(self, key):
+        return key in self._works
+
+    def mark_loaded(self, triples):
+        """
+        Records that the triples have been loaded, so that they are not loaded again for other people.
+
+        Triples that are not in a description are ignored.
+        """
+        with self._lock:
+            self.loaded_triples.update(triple for triple in triples if triple in self.triples)
+
+    def __len__(self):
+        return len(self._works)
+
+
 class WorksCrosswalk:
-    def __init__(self, identifier_strategy, create_strategy):
+    def __init__(self, identifier_strategy, create_strategy, context=None):
         self.identifier_strategy = identifier_strategy
         self.create_strategy = create_strategy
+        self.context = context or CrosswalkContext()
 
-    def crosswalk(self, orcid_profile, person_uri, graph):
+    def crosswalk(self, orcid_profile, person_uri, graph, works=None):
+        """
+        :param works: the records for the works, as returned by fetch_works(). Default is to fetch each work (and its
+        Crossref record) as it is crosswalked.
+        """
         # Work metadata may be available from the orcid profile, bibtex contained in the orcid profile, and/or crossref
         # record. The preferred order (in general) for getting metadata is crossref, bibtex, orcid.
 
@@ -97,21 +182,51 @@ class WorksCrosswalk:
         person_surname = orcid_profile.get("person", {}).get("name", {}).get("family-name", {}).get("value", "")
 
         # Publications
+        for work_summary in self._work_summaries(orcid_profile):
+            if works is not None:
+                (work, crossref_record) = works[work_summary["path"]]
+                self.crosswalk_work(work, person_uri, person_surname, graph, crossref_record=crossref_record)
+            else:
+                # Each work is fetched, crosswalked and released before the next one
+                self.crosswalk_work(WorksCrosswalk._fetch_work(work_summary["path"], session=self.context.session),
+                                    person_uri, person_surname, graph)
+
+    def fetch_works(self, orcid_profile):
+        """
+        Fetches the records needed to crosswalk the works of an orcid profile, so that fetching (which is bound by
+        I/O) can be done separately from crosswalking.
+        :return: a map of work path to (work, Crossref record). The Crossref record is None if not needed.
+        """
+        works = {}
+        for work_summary in self._work_summaries(orcid_profile):
+            work = WorksCrosswalk._fetch_work(work_summary["path"], session=self.context.session)
+            crossref_record = None
+            if work["type"] in work_type_map:
+                doi = WorksCrosswalk._get_work_identifiers(work).get("DOI")
+                crossref_record = self._get_crossref_record(doi) if doi else {}
+            works[work_summary["path"]] = (work, crossref_record)
+        return works
+
+    @staticmethod
+    def _work_summaries(orcid_profile):
         if "works" in orcid_profile["activities-summary"]:
             for work_group in orcid_profile["activities-summary"]["works"]["group"]:
-                for work in work_group["work-summary"]:
-                    self.crosswalk_work(self._fetch_work(work["path"]), person_uri, person_surname, graph)
+                for work_summary in work_group["work-summary"]:
+                    yield work_summary
 
     @staticmethod
-    def _fetch_work(path):
-        r = requests.get('https://pub.orcid.org/v2.0%s' % path,
-                         headers={"Accept": "application/json"})
+    def _fetch_work(path, session=requests):
+        r = session.get('https://pub.orcid.org/v2.0%s' % path,
+                        headers={"Accept": "application/json"})
         if r:
-            return r.json()
+            return r.json(object_pairs_hook=prune_orcid_pairs)
         else:
             raise Exception("Request to fetch %s returned %s" % (path, r.status_code))
 
-    def crosswalk_work(self, work, person_uri, person_surname, graph):
+    def crosswalk_work(self, work, person_uri, person_surname, graph, crossref_record=None):
+        """
+        :param crossref_record: the Crossref record for the work's DOI, if already fetched. Default is to fetch it.
+        """
         # Work metadata may be available from the orcid profile, bibtex contained in the orcid profile, and/or crossref
         # record. The preferred order (in general) for getting metadata is crossref, bibtex, orcid.
 
@@ -123,210 +238,304 @@ class WorksCrosswalk:
             # Extract
             # Get external identifiers so that can get DOI
             external_identifiers = WorksCrosswalk._get_work_identifiers(work)
-            doi = external_identifiers.get("DOI")
-            crossref_record = WorksCrosswalk._fetch_crossref_doi(doi) if doi else {}
-
-            # Bibtex
-            bibtex = WorksCrosswalk._parse_bibtex(work)
-            # Get title so that can construct work uri
-            title = WorksCrosswalk._get_crossref_title(crossref_record) or bibtex.get(
-                "title") or WorksCrosswalk._get_orcid_title(work)
-
-            # Work-type
-            work_class = work_type_map[work_type]
-            if work_type == "TRANSLATION" and bibtex and bibtex["ENTRYTYPE"] in bibtex_type_map:
-                work_class = bibtex_type_map[bibtex["ENTRYTYPE"]]
-
-            # Construct work uri
-            work_uri = self.identifier_strategy.to_uri(work_class, {"name": title})
-
-            graph.add((work_uri, RDF.type, work_class))
-
-            # Title
-            graph.add((work_uri, RDFS.label, Literal(title)))
-
-            # Publication date
-            (publication_year, publication_month, publication_day) = \
-                WorksCrosswalk._get_crossref_publication_date(crossref_record) \
-                or WorksCrosswalk._get_orcid_publication_date(work) \
-                or WorksCrosswalk._get_bibtext_publication_date(bibtex) or (None, None, None)
-            date_uri = add_date(publication_year, graph, self.identifier_strategy,
-                                publication_month, publication_day)
-            if date_uri:
-                graph.add((work_uri, VIVO.dateTimeValue, date_uri))
-
-            # Subjects
-            subjects = crossref_record["subject"] if crossref_record and "subject" in crossref_record else None
-            if subjects:
-                for subject in subjects:
-                    subject_uri = self.identifier_strategy.to_uri(SKOS.Concept, {"name": subject})
-                    graph.add((work_uri, VIVO.hasSubjectArea, subject_uri))
-                    if self.create_strategy.should_create(SKOS.Concept, subject_uri):
-                        graph.add((subject_uri, RDF.type, SKOS.Concept))
-                        graph.add((subject_uri, RDFS.label, Literal(subject)))
-
-            # Contributors (an array of (first_name, surname, VIVO type, e.g., VIVO.Authorship))
-            bibtex_contributors = []
-            bibtex_contributors.extend(WorksCrosswalk._get_bibtex_authors(bibtex))
-            bibtex_contributors.extend(WorksCrosswalk._get_bibtex_editors(bibtex))
-            # Orcid is better for translations because has translator role
-            if work_type == "TRANSLATION":
-                contributors = WorksCrosswalk._get_orcid_contributors(work)
+            if crossref_record is None:
+                doi = external_identifiers.get("DOI")
+                crossref_record = self._get_crossref_record(doi) if doi else {}
+
+            work_cache = self.context.work_cache
+            work_registry = self.context.work_registry
+            # A work that is shared with another person in the batch (e.g., a co-author) is only described once.
+            registry_key = self._work_registry_key(work, crossref_record) if work_registry is not None else None
+            if work_cache is None or (registry_key is not None and registry_key in work_registry):
+                self._crosswalk_work(work, crossref_record, external_identifiers, person_uri, person_surname, graph,
+                                     registry_key=registry_key)
             else:
-                contributors = WorksCrosswalk._get_crossref_authors(crossref_record) or bibtex_contributors \
-                               or WorksCrosswalk._get_orcid_contributors(work)
-            if not contributors:
-                # Add person as author or editor.
-                # None, None means this person.
-                if work_type in ("EDITED_BOOK",):
-                    contributors.append((None, None, VIVO.Editorship))
-                elif work_type == "TRANSLATION":
-                    # Translator is a predicate, not a -ship class.
-                    contributors.append((None, None, "TRANSLATOR"))
-                else:
-                    contributors.append((None, None, VIVO.Authorship))
+                # The triples for a work only depend on these inputs, so can be reused if they are unchanged.
+                key = self._work_cache_key(work, crossref_record, person_uri, person_surname)
+                work_triples = work_cache.get(WORK_KEY_PREFIX + key)
+                if work_triples is None:
+                    work_sink = SetSink()
+                    self._crosswalk_work(work, crossref_record, external_identifiers, person_uri, person_surname,
+                                         work_sink, registry_key=registry_key)
+                    work_triples = tuple(work_sink)
+                    work_cache[WORK_KEY_PREFIX + key] = work_triples
+                    if registry_key is not None:
+                        work_cache[DESCRIPTION_KEY_PREFIX + key] = work_registry.peek(registry_key)
+                elif registry_key is not None:
+                    # Other works with the same key are described as when this work was cached
+                    registered_work = work_cache.get(DESCRIPTION_KEY_PREFIX + key, count=False)
+                    if registered_work is not None:
+                        work_registry.setdefault(registry_key, registered_work)
+                for triple in work_triples:
+                    graph.add(triple)
+
+    def _work_cache_key(self, work, crossref_record, person_uri, person_surname):
+        return hashlib.md5("\n".join((
+            CROSSWALK_VERSION,
+            self.context.namespace,
+            person_uri,
+            person_surname,
+            repr(getattr(self.create_strategy, "cache_key", None)),
+            json.dumps(work, sort_keys=True),
+            json.dumps(crossref_record, sort_keys=True))).encode("utf-8")).hexdigest()
 
-            for (first_name, surname, vivo_type) in contributors:
-                if not surname or person_surname.lower() == surname.lower():
-                    contributor_uri = person_uri
-                else:
-                    contributor_uri = self.identifier_strategy.to_uri(FOAF.Person, {"first_name": first_name,
-                                                                                    "surname": surname})
-                    if self.create_strategy.should_create(FOAF.Person, contributor_uri):
-                        graph.add((contributor_uri, RDF.type, FOAF.Person))
-                        full_name = join_if_not_empty((first_name, surname))
-                        graph.add((contributor_uri, RDFS.label, Literal(full_name)))
-
-                # Translation is a special case
-                if vivo_type == "TRANSLATOR":
-                    graph.add((contributor_uri, BIBO.translator, work_uri))
-                # So is patent assignee
-                elif work_type == "PATENT":
-                    graph.add((contributor_uri, VIVO.assigneeFor, work_uri))
-                else:
-                    contributorship_uri = self.identifier_strategy.to_uri(vivo_type,
-                                                                          {"contributor_uri": contributor_uri,
-                                                                           "work_uri": work_uri})
-                    graph.add((contributorship_uri, RDF.type, vivo_type))
-                    graph.add((contributorship_uri, VIVO.relates, work_uri))
-                    graph.add((contributorship_uri, VIVO.relates, contributor_uri))
-
-            # Publisher
-            publisher = crossref_record.get("publisher") or bibtex.get("publisher")
-            if publisher:
-                publisher_uri = self.identifier_strategy.to_uri(FOAF.Organization, {"name": publisher})
-                graph.add((work_uri, VIVO.publisher, publisher_uri))
-                if self.create_strategy.should_create(FOAF.Organization, publisher_uri):
-                    graph.add((publisher_uri, RDF.type, FOAF.Organization))
-                    graph.add((publisher_uri, RDFS.label, Literal(publisher)))
-
-            # Volume
-            volume = crossref_record.get("volume") or bibtex.get("volume")
-            if volume:
-                graph.add((work_uri, BIBO.volume, Literal(volume)))
-
-            # Issue
-            issue = crossref_record.get("issue") or bibtex.get("number")
-            if issue:
-                graph.add((work_uri, BIBO.issue, Literal(issue)))
-
-            # Pages
-            pages = crossref_record.get("page") or bibtex.get("pages")
-            start_page = None
-            end_page = None
-            if pages and "-" in pages:
-                (start_page, end_page) = re.split(" *-+ *", pages, maxsplit=2)
-            if start_page:
-                graph.add((work_uri, BIBO.pageStart, Literal(start_page)))
-            if end_page:
-                graph.add((work_uri, BIBO.pageEnd, Literal(end_page)))
-
-            # Identifiers
-            # Add doi in bibtex, but not orcid profile
-            if bibtex and "doi" in bibtex and "DOI" not in external_identifiers:
-                external_identifiers["DOI"] = bibtex["doi"]
-            # Add isbn in bibtex, but not orcid profile
-            if bibtex and "isbn" in bibtex and "ISBN" not in external_identifiers:
-                external_identifiers["ISBN"] = bibtex["isbn"]
-
-            for identifier_type, identifier in external_identifiers.iteritems():
-                identifier_url = None
-                if identifier_type in ("PAT", "OTHER-ID") and work_type == "PATENT":
-                    identifier_predicate = VIVO.patentNumber
-                elif identifier_type == "ISBN":
-                    clean_isbn = identifier.replace("-", "")
-                    if len(clean_isbn) <= 10:
-                        identifier_predicate = BIBO.isbn10
-                    else:
-                        identifier_predicate = BIBO.isbn13
-                else:
-                    (identifier_predicate, url_template) = identifier_map.get(identifier_type, (None, None))
-                    if url_template:
-                        identifier_url = url_template % identifier
-
-                if identifier_predicate:
-                    graph.add((work_uri, identifier_predicate, Literal(identifier)))
-                if identifier_url:
-                    self._add_work_url(identifier_url, work_uri, graph)
-
-            orcid_url = (work.get("url", {}) or {}).get("value")
-            if orcid_url and WorksCrosswalk._use_url(orcid_url):
-                self._add_work_url(orcid_url, work_uri, graph)
-            bibtex_url = bibtex.get("link")
-            if bibtex_url and WorksCrosswalk._use_url(bibtex_url) and orcid_url != bibtex_url:
-                self._add_work_url(bibtex_url, work_uri, graph)
-
-            # Series
-            series = bibtex.get("series")
-            # TODO: Figure out how to model series in VIVO-ISF.
-
-            # Journal
-            # If Crossref has a journal use it
-            journal = WorksCrosswalk._get_crossref_journal(crossref_record)
-            issns = []
-            if journal:
-                issns = crossref_record.get("ISSN", [])
-            # Otherwise, only use for some work types.
-            elif work_type in journal_map:
-                journal = bibtex.get("journal")
-                if journal:
-                    if "issn" in bibtex:
-                        issns = [bibtex["issn"]]
-                else:
-                    journal = (work.get("journal-title", {}) or {}).get("value")
+    @staticmethod
+    def _work_registry_key(work, crossref_record):
+        # The put-code and path differ for each person's copy of a work, but are not part of the description
+        return hashlib.md5("\n".join((
+            json.dumps(dict((k, v) for k, v in work.items() if k not in ("put-code", "path")), sort_keys=True),
+            json.dumps(crossref_record, sort_keys=True))).encode("utf-8")).hexdigest()
+
+    def _crosswalk_work(self, work, crossref_record, external_identifiers, person_uri, person_surname, graph,
+                        registry_key=None):
+        """
+        :param registry_key: the key of the work in the work registry, if any.
+        """
+        work_type = work["type"]
+
+        # Bibtex
+        bibtex = WorksCrosswalk._parse_bibtex(work)
+
+        work_registry = self.context.work_registry
+        if work_registry is None:
+            work_uri = self._crosswalk_work_description(work, crossref_record, external_identifiers, bibtex, graph)
+        else:
+            key = registry_key or self._work_registry_key(work, crossref_record)
+            registered_work = work_registry.get(key)
+            if registered_work is None:
+                description_sink = SetSink()
+                registered_work = (self._crosswalk_work_description(work, crossref_record, external_identifiers,
+                                                                    bibtex, description_sink),
+                                   tuple(description_sink))
+                work_registry[key] = registered_work
+            (work_uri, description_triples) = registered_work
+            for triple in description_triples:
+                graph.add(triple)
+
+        # Contributors (an array of (first_name, surname, VIVO type, e.g., VIVO.Authorship))
+        bibtex_contributors = []
+        bibtex_contributors.extend(WorksCrosswalk._get_bibtex_authors(bibtex))
+        bibtex_contributors.extend(WorksCrosswalk._get_bibtex_editors(bibtex))
+        # Orcid is better for translations because has translator role
+        if work_type == "TRANSLATION":
+            contributors = WorksCrosswalk._get_orcid_contributors(work, name_cache=self.context.names)
+        else:
+            contributors = WorksCrosswalk._get_crossref_authors(crossref_record) or bibtex_contributors \
+                           or WorksCrosswalk._get_orcid_contributors(work, name_cache=self.context.names)
+        if not contributors:
+            # Add person as author or editor.
+            # None, None means this person.
+            if work_type in ("EDITED_BOOK",):
+                contributors.append((None, None, VIVO.Editorship))
+            elif work_type == "TRANSLATION":
+                # Translator is a predicate, not a -ship class.
+                contributors.append((None, None, "TRANSLATOR"))
+            else:
+                contributors.append((None, None, VIVO.Authorship))
+
+        for (first_name, surname, vivo_type) in contributors:
+            if not surname or person_surname.lower() == surname.lower():
+                contributor_uri = person_uri
+            else:
+                contributor_uri = self.identifier_strategy.to_uri(FOAF.Person, {"first_name": first_name,
+                                                                                "surname": surname})
+                if self.create_strategy.should_create(FOAF.Person, contributor_uri):
+                    graph.add((contributor_uri, RDF.type, FOAF.Person))
+                    full_name = join_if_not_empty((first_name, surname))
+                    graph.add((contributor_uri, RDFS.label, Literal(full_name)))
+
+            # Translation is a special case
+            if vivo_type == "TRANSLATOR":
+                graph.add((contributor_uri, BIBO.translator, work_uri))
+            # So is patent assignee
+            elif work_type == "PATENT":
+                graph.add((contributor_uri, VIVO.assigneeFor, work_uri))
+            else:
+                contributorship_uri = self.identifier_strategy.to_uri(vivo_type,
+                                                                      {"contributor_uri": contributor_uri,
+                                                                       "work_uri": work_uri})
+                graph.add((contributorship_uri, RDF.type, vivo_type))
+                graph.add((contributorship_uri, VIVO.relates, work_uri))
+                graph.add((contributorship_uri, VIVO.relates, contributor_uri))
+
+    def _get_work_uri(self, work, crossref_record, bibtex):
+        """
+        Returns the work uri, work class and title.
+        """
+        work_type = work["type"]
+
+        # Get title so that can construct work uri
+        title = WorksCrosswalk._get_crossref_title(crossref_record) or bibtex.get(
+            "title") or WorksCrosswalk._get_orcid_title(work)
 
+        # Work-type
+        work_class = work_type_map[work_type]
+        if work_type == "TRANSLATION" and bibtex and bibtex["ENTRYTYPE"] in bibtex_type_map:
+            work_class = bibtex_type_map[bibtex["ENTRYTYPE"]]
+
+        # Construct work uri
+        work_uri = self.identifier_strategy.to_uri(work_class, {"name": title})
+        return work_uri, work_class, title
+
+    def _crosswalk_work_description(self, work, crossref_record, external_identifiers, bibtex, graph):
+        """
+        Adds the triples that describe a work, i.e., all except for contributors.
+
+        Returns the work uri.
+        """
+        work_type = work["type"]
+        (work_uri, work_class, title) = self._get_work_uri(work, crossref_record, bibtex)
+
+        graph.add((work_uri, RDF.type, work_class))
+
+        # Title
+        graph.add((work_uri, RDFS.label, Literal(title)))
+
+        # Publication date
+        (publication_year, publication_month, publication_day) = \
+            WorksCrosswalk._get_crossref_publication_date(crossref_record) \
+            or WorksCrosswalk._get_orcid_publication_date(work) \
+            or WorksCrosswalk._get_bibtext_publication_date(bibtex) or (None, None, None)
+        date_uri = add_date(publication_year, graph, self.identifier_strategy,
+                            publication_month, publication_day, date_registry=self.context.dates)
+        if date_uri:
+            graph.add((work_uri, VIVO.dateTimeValue, date_uri))
+
+        # Subjects
+        subjects = crossref_record["subject"] if crossref_record and "subject" in crossref_record else None
+        if subjects:
+            for subject in subjects:
+                subject_uri = self.identifier_strategy.to_uri(SKOS.Concept, {"name": subject})
+                graph.add((work_uri, VIVO.hasSubjectArea, subject_uri))
+                if self.create_strategy.should_create(SKOS.Concept, subject_uri):
+                    graph.add((subject_uri, RDF.type, SKOS.Concept))
+                    graph.add((subject_uri, RDFS.label, Literal(subject)))
+
+        # Publisher
+        publisher = crossref_record.get("publisher") or bibtex.get("publisher")
+        if publisher:
+            publisher_uri = self.identifier_strategy.to_uri(FOAF.Organization, {"name": publisher})
+            graph.add((work_uri, VIVO.publisher, publisher_uri))
+            if self.create_strategy.should_create(FOAF.Organization, publisher_uri):
+                graph.add((publisher_uri, RDF.type, FOAF.Organization))
+                graph.add((publisher_uri, RDFS.label, Literal(publisher)))
+
+        # Volume
+        volume = crossref_record.get("volume") or bibtex.get("volume")
+        if volume:
+            graph.add((work_uri, BIBO.volume, Literal(volume)))
+
+        # Issue
+        issue = crossref_record.get("issue") or bibtex.get("number")
+        if issue:
+            graph.add((work_uri, BIBO.issue, Literal(issue)))
+
+        # Pages
+        pages = crossref_record.get("page") or bibtex.get("pages")
+        start_page = None
+        end_page = None
+        if pages and "-" in pages:
+            (start_page, end_page) = re.split(" *-+ *", pages, maxsplit=2)
+        if start_page:
+            graph.add((work_uri, BIBO.pageStart, Literal(start_page)))
+        if end_page:
+            graph.add((work_uri, BIBO.pageEnd, Literal(end_page)))
+
+        # Identifiers
+        # Add doi in bibtex, but not orcid profile
+        if bibtex and "doi" in bibtex and "DOI" not in external_identifiers:
+            external_identifiers["DOI"] = bibtex["doi"]
+        # Add isbn in bibtex, but not orcid profile
+        if bibtex and "isbn" in bibtex and "ISBN" not in external_identifiers:
+            external_identifiers["ISBN"] = bibtex["isbn"]
+
+        for identifier_type, identifier in external_identifiers.iteritems():
+            identifier_url = None
+            if identifier_type in ("PAT", "OTHER-ID") and work_type == "PATENT":
+                identifier_predicate = VIVO.patentNumber
+            elif identifier_type == "ISBN":
+                clean_isbn = identifier.replace("-", "")
+                if len(clean_isbn) <= 10:
+                    identifier_predicate = BIBO.isbn10
+                else:
+                    identifier_predicate = BIBO.isbn13
+            else:
+                (identifier_predicate, url_template) = identifier_map.get(identifier_type, (None, None))
+                if url_template:
+                    identifier_url = url_template % identifier
+
+            if identifier_predicate:
+                graph.add((work_uri, identifier_predicate, Literal(identifier)))
+            if identifier_url:
+                self._add_work_url(identifier_url, work_uri, graph)
+
+        orcid_url = (work.get("url", {}) or {}).get("value")
+        if orcid_url and WorksCrosswalk._use_url(orcid_url):
+            self._add_work_url(orcid_url, work_uri, graph)
+        bibtex_url = bibtex.get("link")
+        if bibtex_url and WorksCrosswalk._use_url(bibtex_url) and orcid_url != bibtex_url:
+            self._add_work_url(bibtex_url, work_uri, graph)
+
+        # Series
+        series = bibtex.get("series")
+        # TODO: Figure out how to model series in VIVO-ISF.
+
+        # Journal
+        # If Crossref has a journal use it
+        journal = WorksCrosswalk._get_crossref_journal(crossref_record)
+        issns = []
+        if journal:
+            issns = crossref_record.get("ISSN", [])
+        # Otherwise, only use for some work types.
+        elif work_type in journal_map:
+            journal = bibtex.get("journal")
             if journal:
-                journal_class = journal_map.get(work_type, BIBO.Journal)
-                journal_uri = self.identifier_strategy.to_uri(journal_class, {"name": journal})
-                graph.add((work_uri, VIVO.hasPublicationVenue, journal_uri))
-                if self.create_strategy.should_create(journal_class, journal_uri):
-                    graph.add((journal_uri, RDF.type, journal_class))
-                    graph.add((journal_uri, RDFS.label, Literal(journal)))
-                    for issn in issns:
-                        graph.add((journal_uri, BIBO.issn, Literal(issn)))
-
-            if work_type in ("BOOK_CHAPTER",):
-                book_title = bibtex.get("booktitle")
-                if book_title:
-                    book_uri = self.identifier_strategy.to_uri(BIBO.Book, {"name": book_title})
-                    graph.add((work_uri, VIVO.hasPublicationVenue, book_uri))
-                    if self.create_strategy.should_create(BIBO.Book, book_uri):
-                        graph.add((book_uri, RDF.type, BIBO.Book))
-                        graph.add((book_uri, RDFS.label, Literal(book_title)))
-
-            if work_type in ("CONFERENCE_PAPER",):
-                proceeding = bibtex.get("journal") or (work.get("journal-title", {}) or {}).get("value")
-                if proceeding:
-                    proceeding_uri = self.identifier_strategy.to_uri(BIBO.Proceedings, {"name": proceeding})
-                    graph.add((work_uri, VIVO.hasPublicationVenue, proceeding_uri))
-                    if self.create_strategy.should_create(BIBO.Proceedings, proceeding_uri):
-                        graph.add((proceeding_uri, RDF.type, BIBO.Proceedings))
-                        graph.add((proceeding_uri, RDFS.label, Literal(proceeding)))
+                if "issn" in bibtex:
+                    issns = [bibtex["issn"]]
+            else:
+                journal = (work.get("journal-title", {}) or {}).get("value")
+
+        if journal:
+            journal_class = journal_map.get(work_type, BIBO.Journal)
+            journal_uri = self.identifier_strategy.to_uri(journal_class, {"name": journal})
+            graph.add((work_uri, VIVO.hasPublicationVenue, journal_uri))
+            if self.create_strategy.should_create(journal_class, journal_uri):
+                graph.add((journal_uri, RDF.type, journal_class))
+                graph.add((journal_uri, RDFS.label, Literal(journal)))
+                for issn in issns:
+                    graph.add((journal_uri, BIBO.issn, Literal(issn)))
+
+        if work_type in ("BOOK_CHAPTER",):
+            book_title = bibtex.get("booktitle")
+            if book_title:
+                book_uri = self.identifier_strategy.to_uri(BIBO.Book, {"name": book_title})
+                graph.add((work_uri, VIVO.hasPublicationVenue, book_uri))
+                if self.create_strategy.should_create(BIBO.Book, book_uri):
+                    graph.add((book_uri, RDF.type, BIBO.Book))
+                    graph.add((book_uri, RDFS.label, Literal(book_title)))
+
+        if work_type in ("CONFERENCE_PAPER",):
+            proceeding = bibtex.get("journal") or (work.get("journal-title", {}) or {}).get("value")
+            if proceeding:
+                proceeding_uri = self.identifier_strategy.to_uri(BIBO.Proceedings, {"name": proceeding})
+                graph.add((work_uri, VIVO.hasPublicationVenue, proceeding_uri))
+                if self.create_strategy.should_create(BIBO.Proceedings, proceeding_uri):
+                    graph.add((proceeding_uri, RDF.type, BIBO.Proceedings))
+                    graph.add((proceeding_uri, RDFS.label, Literal(proceeding)))
+
+        return work_uri
+
+    def _get_crossref_record(self, doi):
+        crossref_record = self.context.crossref_records.get(doi)
+        if crossref_record is None:
+            crossref_record = WorksCrosswalk._fetch_crossref_doi(doi, session=self.context.session)
+            self.context.crossref_records[doi] = crossref_record
+        return crossref_record
 
     @staticmethod
-    def _fetch_crossref_doi(doi):
+    def _fetch_crossref_doi(doi, session=requests):
         # curl 'http://api.crossref.org/works/10.1177/1049732304268657' -L -i
-        r = requests.get('http://api.crossref.org/works/%s' % doi)
+        r = session.get('http://api.crossref.org/works/%s' % doi)
         if r.status_code == 404:
             # Not a crossref DOI.
             return {}
@@ -418,23 +627,44 @@ class WorksCrosswalk:
         return authors
 
     @staticmethod
-    def _get_orcid_contributors(work):
-        contributors = []
+    def _get_orcid_contributors(work, name_cache=None):
+        credit_names = []
+        roles = []
         for contributor in (work.get("contributors") or {}).get("contributor", []):
             # Last name, first name
-            credit_name = (contributor.get("credit-name") or {}).get("value")
-            # Some entries will not have a credit name, meaning the entry is for the person.
-            # Using None, None to indicate the person.
-            first_name = None
-            surname = None
-            if credit_name:
-                # Normalize with BibtexParser's getnames()
-                clean_name = bibtexparser.customization.getnames([credit_name])[0]
-                (first_name, surname) = WorksCrosswalk._parse_reversed_name(clean_name)
-            role = (contributor.get("contributor-attributes", {}) or {}).get("contributor-role")
+            credit_names.append((contributor.get("credit-name") or {}).get("value"))
+            roles.append((contributor.get("contributor-attributes", {}) or {}).get("contributor-role"))
+        # Some entries will not have a credit name, meaning the entry is for the person.
+        # Using None, None to indicate the person.
+        contributors = []
+        for (first_name, surname), role in zip(WorksCrosswalk._normalize_names(credit_names, name_cache), roles):
             contributors.append((first_name, surname, contributor_map.get(role, VIVO.Authorship)))
         return contributors
 
+    @staticmethod
+    def _normalize_names(names, name_cache=None):
+        """
+        Normalizes reversed names (last name, first name) with BibtexParser's getnames() and splits them.
+
+        Names that are not cached are normalized with a single call to getnames().
+        :param name_cache: a LRUCache of name to (first name, surname) to check and add to.
+        :return: list of (first name, surname), with (None, None) for empty names.
+        """
+        parsed_names = {}
+        uncached_names = []
+        for name in names:
+            if name and name not in parsed_names:
+                parsed_name = name_cache.get(name) if name_cache is not None else None
+                if parsed_name is None:
+                    uncached_names.append(name)
+                parsed_names[name] = parsed_name
+        if uncached_names:
+            for name, clean_name in zip(uncached_names, bibtexparser.customization.getnames(uncached_names)):
+                parsed_names[name] = WorksCrosswalk._parse_reversed_name(clean_name)
+                if name_cache is not None:
+                    name_cache[name] = parsed_names[name]
+        return [parsed_names[name] if name else (None, None) for name in names]
+
     @staticmethod
     def _get_bibtex_authors(bibtex):
         authors = []
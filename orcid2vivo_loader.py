@@ -4,17 +4,32 @@ import argparse
 import sqlite3
 import os
 import logging
-import codecs
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from rdflib import Graph
-from rdflib.compare import graph_diff
-from orcid2vivo import default_execute
-from orcid2vivo_app.vivo_namespace import ns_manager
-from orcid2vivo_app.utility import sparql_insert, sparql_delete
+import requests
+from rdflib import URIRef
+from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE
+from orcid2vivo import BatchCrosswalk, SECTIONS, check_sections, parse_sections, fetch_orcid_profile
+from orcid2vivo_app.utility import sparql_insert, sparql_delete, sparql_delete_insert, SPARQL_MAX_TRIPLES, \
+    SPARQL_FATAL_ERRORS
+from orcid2vivo_app.cache import SubgraphCache
+from orcid2vivo_app.snapshot import NTriplesSnapshots, SqliteSnapshots, union_graph
+from orcid2vivo_app.fingerprint import profile_fingerprints, changed_items
+from orcid2vivo_app.works import CROSSWALK_VERSION
+from orcid2vivo_app.shared_entities import SharedEntities
+from orcid2vivo_app.uri_index import UriIndex
+from orcid2vivo_app.pipeline import Pipeline, Stage
+import orcid2vivo_app.vivo_namespace as ns
 
 log = logging.getLogger(__name__)
 
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+WORK_CACHE_FILENAME = "works.cache"
+URI_INDEX_FILENAME = "uris.index"
+# Seconds to wait for another connection (e.g., of another worker) to release a lock on the db
+DB_TIMEOUT = 60.0
 
 
 class Store:
@@ -22,9 +37,10 @@ class Store:
         self.db_filepath = os.path.join(data_path, "orcid2vivo.db")
         log.debug("Db filepath is %s", self.db_filepath)
         create_db = not os.path.exists(self.db_filepath)
-        self._conn = sqlite3.connect(self.db_filepath)
+        self._conn = sqlite3.connect(self.db_filepath, timeout=DB_TIMEOUT)
         if create_db:
             self._create_db()
+        self._create_fingerprints_table()
 
     def _create_db(self):
         logging.info("Creating db")
@@ -38,6 +54,22 @@ class Store:
 
         self._conn.commit()
 
+    def _create_fingerprints_table(self):
+        # Also added to dbs created by earlier versions.
+        c = self._conn.cursor()
+        c.execute("""
+            create table if not exists fingerprints (orcid_id, section, item, fingerprint,
+            primary key (orcid_id, section, item));
+        """)
+        c.execute("""
+            create table if not exists graph_fingerprints (orcid_id, section, fingerprint,
+            primary key (orcid_id, section));
+        """)
+        c.execute("""
+            create table if not exists shared_entities (uri primary key);
+        """)
+        self._conn.commit()
+
     def __contains__(self, orcid_id):
         """
         Returns True if there is a record for the orcid id and it is active.
@@ -143,6 +175,86 @@ class Store:
 
         self._conn.commit()
 
+    def get_fingerprints(self, orcid_id):
+        """
+        Returns the fingerprints of the orcid profile sections last loaded for orcid id as a map of section to a map
+        of item to fingerprint.
+        """
+        c = self._conn.cursor()
+        c.execute("""
+            select section, item, fingerprint from fingerprints where orcid_id=?
+        """, (orcid_id,))
+        fingerprints = {}
+        for section, item, fingerprint in c.fetchall():
+            fingerprints.setdefault(section, {})[item] = fingerprint
+        return fingerprints
+
+    def set_fingerprints(self, orcid_id, fingerprints):
+        """
+        Replaces the fingerprints for the sections of orcid id.
+        :param fingerprints: a map of section to a map of item to fingerprint.
+        """
+        c = self._conn.cursor()
+        for section, section_fingerprints in fingerprints.items():
+            c.execute("""
+                delete from fingerprints where orcid_id=? and section=?
+            """, (orcid_id, section))
+            c.executemany("""
+                insert into fingerprints (orcid_id, section, item, fingerprint) values (?, ?, ?, ?)
+            """, [(orcid_id, section, item, fingerprint) for item, fingerprint in section_fingerprints.items()])
+
+        self._conn.commit()
+
+    def get_graph_fingerprints(self, orcid_id):
+        """
+        Returns the fingerprints of the graphs last loaded for orcid id as a map of section to fingerprint.
+        """
+        c = self._conn.cursor()
+        c.execute("""
+            select section, fingerprint from graph_fingerprints where orcid_id=?
+        """, (orcid_id,))
+        return dict(c.fetchall())
+
+    def set_graph_fingerprints(self, orcid_id, graph_fingerprints):
+        """
+        Replaces the fingerprints of the graphs for the sections of orcid id.
+        :param graph_fingerprints: a map of section to fingerprint.
+        """
+        c = self._conn.cursor()
+        c.executemany("""
+            insert or replace into graph_fingerprints (orcid_id, section, fingerprint) values (?, ?, ?)
+        """, [(orcid_id, section, fingerprint) for section, fingerprint in graph_fingerprints.items()])
+
+        self._conn.commit()
+
+    def add_shared_entities(self, uris):
+        """
+        Records the uris of shared entities that were loaded. (Their triples are not in the graphs last loaded for
+        people.)
+        """
+        c = self._conn.cursor()
+        c.executemany("""
+            insert or ignore into shared_entities (uri) values (?)
+        """, [(unicode(uri),) for uri in uris])
+
+        self._conn.commit()
+
+    def shared_entities(self):
+        """
+        Returns the uris of the shared entities that were loaded.
+        """
+        c = self._conn.cursor()
+        c.execute("""
+            select uri from shared_entities
+        """)
+        return [URIRef(uri) for (uri,) in c.fetchall()]
+
+    def snapshots(self):
+        """
+        Returns SqliteSnapshots that keep the graphs last loaded in the db.
+        """
+        return SqliteSnapshots(self._conn)
+
     def __iter__(self):
         c = self._conn.cursor()
         c.execute("""
@@ -166,54 +278,595 @@ class Store:
         self._conn.close()
 
 
-def load_single(orcid_id, person_uri, person_id, person_class, data_path, endpoint, username, password,
-                namespace=None, skip_person=False, confirmed_orcid_id=False):
-    with Store(data_path) as store:
-        # Crosswalk
-        (graph, profile, person_uri) = default_execute(orcid_id, namespace=namespace, person_uri=person_uri,
-                                                       person_id=person_id, skip_person=skip_person,
-                                                       person_class=person_class, confirmed_orcid_id=confirmed_orcid_id)
+class KeyedLocks:
+    """
+    Locks by key, e.g., so that an orcid id is not loaded by two workers at once.
+
+    Thread safe.
+    """
+    def __init__(self):
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """
+        Waits for and acquires the lock for the key. It may be released by another thread.
+        """
+        with self._lock:
+            (key_lock, count) = self._locks.get(key, (None, 0))
+            if key_lock is None:
+                key_lock = threading.Lock()
+            self._locks[key] = (key_lock, count + 1)
+        key_lock.acquire()
+
+    def release(self, key):
+        with self._lock:
+            (key_lock, count) = self._locks[key]
+            if count == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (key_lock, count - 1)
+        key_lock.release()
+
+    @contextmanager
+    def lock(self, key):
+        self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def __len__(self):
+        return len(self._locks)
+
 
-        graph_filepath = os.path.join(data_path, "%s.ttl" % orcid_id.lower())
-        previous_graph = Graph(namespace_manager=ns_manager)
-        # Load last graph
-        if os.path.exists(graph_filepath):
-            log.debug("Loading previous graph %s", graph_filepath)
-            previous_graph.parse(graph_filepath, format="turtle")
+orcid_id_locks = KeyedLocks()
 
-        # Diff against last graph
-        (both_graph, delete_graph, add_graph) = graph_diff(previous_graph, graph)
 
-        # SPARQL Update
-        log.info("Adding %s, deleting %s triples for %s", len(add_graph), len(delete_graph), orcid_id)
-        sparql_delete(delete_graph, endpoint, username, password)
-        sparql_insert(add_graph, endpoint, username, password)
+class PersonLoad:
+    """
+    The state of loading a person, as it passes through the stages of a PersonLoader.
+    """
+    def __init__(self, orcid_id, person_uri=None, person_id=None, person_class=None, confirmed_orcid_id=False):
+        self.orcid_id = orcid_id
+        self.person_uri = person_uri
+        self.person_id = person_id
+        self.person_class = person_class
+        self.confirmed_orcid_id = confirmed_orcid_id
+        # Set by fetch()
+        self.sections = None
+        self.saved_sections = None
+        self.profile = None
+        self.fingerprints = None
+        self.changed_sections = None
+        # The work and Crossref records, if works changed (see BatchCrosswalk.fetch_works()). Released by crosswalk().
+        self.works = None
+        # Set by crosswalk()
+        self.section_graphs = {}
+        self.graph_fingerprints = {}
+        self.add_graph = None
+        self.delete_graph = None
+        # Whether the section graphs differ from the last saved graphs, so must be saved
+        self.snapshot_changed = False
+        # Set if the changes were accumulated with the changes for other people (see PersonLoader.flush())
+        self.batched = False
+        # Set if the update of a batch of people that the person belongs to failed
+        self.exception = None
 
-        # Save new last graph
-        log.debug("Saving new graph %s", graph_filepath)
-        with codecs.open(graph_filepath, "w") as out:
-            graph.serialize(format="turtle", destination=out)
+    @property
+    def changed(self):
+        return bool(self.add_graph or self.delete_graph)
 
-        # Touch
-        store.touch(orcid_id)
+    def clear(self):
+        """
+        Releases the profile and graphs, once the person has been loaded.
+        """
+        self.profile = None
+        self.works = None
+        self.section_graphs = {}
+        self.add_graph = None
+        self.delete_graph = None
 
-        return graph, add_graph, delete_graph
 
+class PersonLoader:
+    """
+    Loads people in stages: fetch() fetches the orcid profile, determines which sections changed and, if the works
+    changed, fetches the work and Crossref records; crosswalk() crosswalks the changed sections and diffs them against
+    the last graphs; and update() makes the SPARQL Update and saves the new last graphs.
 
-def load(data_path, endpoint, username, password, limit=None, before_datetime=None, namespace=None, skip_person=False):
+    Optionally, update() accumulates the changes for many people and makes a SPARQL Update for all of them once enough
+    triples or time has accumulated (or flush() is called). The new last graphs for the people are only saved once
+    the SPARQL Update succeeds.
+
+    The stages may be performed for different people at the same time (see load()), but for one person they must be
+    performed in order. Each stage opens its own connection to the db.
+    """
+    def __init__(self, data_path, endpoint, username, password, batch, skip_person=False, sections=None, force=False,
+                 sqlite_snapshots=False, combined_update=False, batch_triples=None, batch_seconds=None):
+        """
+        :param batch: a BatchCrosswalk to crosswalk with, so that caches and shared entities can be shared with other
+        people.
+        :param sections: the sections (see orcid2vivo.SECTIONS) to crosswalk and load. Triples for other sections are
+        left as they were last loaded. Default is all sections.
+        :param force: crosswalk the sections even if the orcid profile has not changed, e.g., to pick up changes to
+        Crossref records.
+        :param sqlite_snapshots: keep the graphs last loaded in the db (see SqliteSnapshots) rather than in files (see
+        NTriplesSnapshots). Graphs in files are moved to the db.
+        :param combined_update: delete and insert the triples for a person with a single SPARQL Update request (see
+        sparql_delete_insert()).
+        :param batch_triples: accumulate the changes for people until there are this many triples to delete and insert.
+        :param batch_seconds: accumulate the changes for people for no more than this many seconds.
+        """
+        self.data_path = data_path
+        self.endpoint = endpoint
+        self.username = username
+        self.password = password
+        self.batch = batch
+        self.skip_person = skip_person
+        self.sections = check_sections(sections)
+        self.force = force
+        self.sqlite_snapshots = sqlite_snapshots
+        self.combined_update = combined_update
+        self.batch_triples = batch_triples
+        self.batch_seconds = batch_seconds
+        if batch_seconds and not batch_triples:
+            self.batch_triples = SPARQL_MAX_TRIPLES
+        self._pending_people = []
+        self._pending_delete_triples = set()
+        self._pending_add_triples = set()
+        self._pending_since = None
+        self._flushed_people = []
+        self._flushed_lock = threading.Lock()
+
+    def _snapshots(self, store):
+        if self.sqlite_snapshots:
+            return store.snapshots()
+        return NTriplesSnapshots(self.data_path)
+
+    def fetch(self, person):
+        with Store(self.data_path) as store:
+            snapshots = self._snapshots(store)
+            if self.sqlite_snapshots:
+                snapshots.migrate(person.orcid_id, NTriplesSnapshots(self.data_path), SECTIONS)
+            else:
+                snapshots.migrate(person.orcid_id, SECTIONS)
+            person.saved_sections = snapshots.saved_sections(person.orcid_id, SECTIONS)
+            person.sections = self.sections
+            if None in person.saved_sections and set(person.sections) != set(SECTIONS):
+                # Last graph is not by section, so can't tell which triples belong to the other sections.
+                log.info("Crosswalking all sections for %s", person.orcid_id)
+                person.sections = SECTIONS
+
+            # Fingerprint the orcid profile to determine which sections changed
+            person.profile = fetch_orcid_profile(person.orcid_id, session=self.batch.context.session,
+                                                 sections=person.sections)
+            person.fingerprints = profile_fingerprints(person.profile, person.sections,
+                                                       settings=(CROSSWALK_VERSION,
+                                                                 unicode(self.batch.context.namespace),
+                                                                 person.person_uri, person.person_id,
+                                                                 person.person_class, self.skip_person,
+                                                                 bool(person.confirmed_orcid_id),
+                                                                 self.batch.uri_index.checksum
+                                                                 if self.batch.uri_index is not None else None))
+            previous_fingerprints = store.get_fingerprints(person.orcid_id)
+        person.changed_sections = []
+        for section in person.sections:
+            changed = changed_items(person.fingerprints[section], previous_fingerprints.get(section, {}))
+            if self.force or changed or section not in person.saved_sections:
+                person.changed_sections.append(section)
+            log.debug("%s of %s items changed in %s for %s", len(changed), len(person.fingerprints[section]),
+                      section, person.orcid_id)
+        log.info("Crosswalking %s for %s", ", ".join(person.changed_sections) or "no sections", person.orcid_id)
+        if "works" in person.changed_sections:
+            # Fetched here rather than while crosswalking, since fetching is bound by I/O rather than CPU
+            person.works = self.batch.fetch_works(person.profile)
+
+    def crosswalk(self, person):
+        batch = self.batch
+        if person.changed_sections:
+            (person.section_graphs, person.profile, person_uri, person.graph_fingerprints) = batch.execute_sections(
+                person.orcid_id, person_uri=person.person_uri, person_id=person.person_id,
+                skip_person=self.skip_person, person_class=person.person_class,
+                confirmed_orcid_id=person.confirmed_orcid_id, sections=person.changed_sections,
+                orcid_profile=person.profile, works=person.works)
+            person.works = None
+
+        with Store(self.data_path) as store:
+            # Sections whose graphs are the same as last loaded are left as they are
+            previous_graph_fingerprints = store.get_graph_fingerprints(person.orcid_id)
+            for section in list(person.section_graphs):
+                if section in person.saved_sections \
+                        and person.graph_fingerprints[section] == previous_graph_fingerprints.get(section):
+                    del person.section_graphs[section]
+
+            if not person.section_graphs:
+                person.add_graph = union_graph([])
+                person.delete_graph = union_graph([])
+                return
+
+            # Diff against last graphs
+            (person.add_graph, person.delete_graph) = self._snapshots(store).diff(
+                person.orcid_id, person.section_graphs, person.saved_sections)
+            # A file for all sections is replaced by files for sections
+            person.snapshot_changed = person.changed or None in person.saved_sections
+
+        # Shared entities may be in previous graphs, but are not deleted since they are used by other people.
+        # (Their defining triples are never in new graphs, so they are all deleted.)
+        previous_entity_uris = SharedEntities.entity_uris(person.delete_graph)
+        for triple in list(person.delete_graph):
+            if triple[0] in previous_entity_uris or (batch.shared_entities is not None
+                                                     and triple in batch.shared_entities):
+                person.delete_graph.remove(triple)
+
+    def update(self, person):
+        batch = self.batch
+        if batch.work_registry is not None:
+            # Descriptions of works shared with people already loaded in the batch are added once
+            for triple in list(person.add_graph):
+                if triple in batch.work_registry.loaded_triples:
+                    person.add_graph.remove(triple)
+
+        # Shared entities are added once per batch.
+        shared_graph = batch.shared_entities.pop_new() if batch.shared_entities is not None else None
+
+        if person.changed and self.batch_triples:
+            self._add_pending(person, shared_graph)
+            return
+        if person.changed:
+            # SPARQL Update
+            if shared_graph:
+                try:
+                    self.insert_shared_entities(shared_graph)
+                except Exception:
+                    # To be added with other people
+                    batch.shared_entities.restore(shared_graph)
+                    raise
+            log.info("Adding %s, deleting %s triples for %s", len(person.add_graph), len(person.delete_graph),
+                     person.orcid_id)
+            self._sparql_update(person.delete_graph, person.add_graph)
+            if batch.work_registry is not None:
+                batch.work_registry.mark_loaded(person.add_graph)
+        else:
+            log.info("No changes for %s", person.orcid_id)
+            if shared_graph:
+                # The shared entities that the person links to were added when the person was last loaded, but the
+                # shared entities may also be linked to by people still being loaded.
+                batch.shared_entities.restore(shared_graph)
+        self._save(person)
+
+    def insert_shared_entities(self, shared_graph):
+        """
+        Inserts the triples of shared entities and records the entities as loaded (see Store.add_shared_entities()).
+        """
+        log.info("Adding %s triples for shared entities", len(shared_graph))
+        sparql_insert(shared_graph, self.endpoint, self.username, self.password)
+        self._add_shared_entities(shared_graph)
+
+    def _add_shared_entities(self, graph):
+        entity_uris = SharedEntities.entity_uris(graph)
+        if entity_uris:
+            with Store(self.data_path) as store:
+                store.add_shared_entities(entity_uris)
+
+    def _sparql_update(self, delete_graph, add_graph):
+        if self.combined_update:
+            sparql_delete_insert(delete_graph, add_graph, self.endpoint, self.username, self.password)
+        else:
+            # No empty DELETE DATA or INSERT DATA requests
+            if delete_graph:
+                sparql_delete(delete_graph, self.endpoint, self.username, self.password)
+            if add_graph:
+                sparql_insert(add_graph, self.endpoint, self.username, self.password)
+
+    def _add_pending(self, person, shared_graph):
+        if not self._pending_people:
+            self._pending_since = time.time()
+        person.batched = True
+        self._pending_people.append(person)
+        # Deletes are made before inserts, so a triple added by an earlier person and deleted by this person must not
+        # be inserted.
+        self._pending_add_triples.difference_update(person.delete_graph)
+        self._pending_delete_triples.update(person.delete_graph)
+        self._pending_add_triples.update(person.add_graph)
+        if shared_graph:
+            self._pending_add_triples.update(shared_graph)
+        if len(self._pending_delete_triples) + len(self._pending_add_triples) >= self.batch_triples \
+                or (self.batch_seconds and time.time() - self._pending_since >= self.batch_seconds):
+            self.flush()
+
+    def flush(self):
+        """
+        Makes the SPARQL Update for the changes accumulated for people and saves their new last graphs.
+
+        If the SPARQL Update is rejected (see SPARQL_FATAL_ERRORS), e.g., because of a triple of one of the people, a
+        SPARQL Update is made for each of the people. If the SPARQL Update fails, the exception is recorded for each of
+        the people that it was for. Either way, the people are returned by the next call to pop_flushed().
+        """
+        if not self._pending_people:
+            return
+        (people, delete_triples, add_triples) = (self._pending_people, self._pending_delete_triples,
+                                                 self._pending_add_triples)
+        self._pending_people = []
+        self._pending_delete_triples = set()
+        self._pending_add_triples = set()
+        try:
+            self._flush(people, delete_triples, add_triples)
+        except Exception, e:
+            for person in people:
+                person.exception = person.exception or e
+            raise
+        finally:
+            with self._flushed_lock:
+                self._flushed_people.extend(people)
+
+    def pop_flushed(self):
+        """
+        Returns the people whose accumulated changes were flushed since the last call.
+        """
+        with self._flushed_lock:
+            (people, self._flushed_people) = (self._flushed_people, [])
+        return people
+
+    def _flush(self, people, delete_triples, add_triples):
+        log.info("Adding %s, deleting %s triples for %s people", len(add_triples), len(delete_triples), len(people))
+        add_graph = union_graph([add_triples])
+        try:
+            self._sparql_update(union_graph([delete_triples]), add_graph)
+        except Exception, e:
+            if isinstance(e, SPARQL_FATAL_ERRORS) and len(people) > 1:
+                log.warning("SPARQL Update for %s people was rejected, so updating them one at a time", len(people),
+                            exc_info=True)
+                self._flush_each(people, add_triples)
+                return
+            log.exception("SPARQL Update for %s failed", ", ".join(person.orcid_id for person in people))
+            self._fail(people, add_triples, e)
+            return
+        if self.batch.work_registry is not None:
+            self.batch.work_registry.mark_loaded(add_triples)
+        # Shared entities are added with the people
+        self._add_shared_entities(add_graph)
+        self._save_all(people)
+
+    def _flush_each(self, people, add_triples):
+        if self.batch.shared_entities is not None:
+            shared_graph = union_graph([[triple for triple in add_triples if triple in self.batch.shared_entities]])
+            if shared_graph:
+                try:
+                    self.insert_shared_entities(shared_graph)
+                except Exception, e:
+                    log.exception("Adding shared entities for %s failed",
+                                  ", ".join(person.orcid_id for person in people))
+                    self._fail(people, add_triples, e)
+                    return
+        # In the order that the people were accumulated, so that later deletes are made after earlier inserts
+        for person in people:
+            try:
+                self._sparql_update(person.delete_graph, person.add_graph)
+            except Exception, e:
+                log.exception("SPARQL Update for %s failed", person.orcid_id)
+                person.exception = e
+                continue
+            if self.batch.work_registry is not None:
+                self.batch.work_registry.mark_loaded(person.add_graph)
+            self._save_all([person])
+
+    def _fail(self, people, add_triples, exception):
+        for person in people:
+            person.exception = exception
+        if self.batch.shared_entities is not None:
+            # To be added with other people
+            self.batch.shared_entities.restore(triple for triple in add_triples
+                                               if triple in self.batch.shared_entities)
+
+    def _save_all(self, people):
+        for person in people:
+            try:
+                self._save(person)
+            except Exception, e:
+                log.exception("Saving %s failed", person.orcid_id)
+                person.exception = e
+
+    def _save(self, person):
+        with Store(self.data_path) as store:
+            # Save new last graphs and fingerprints. Graphs that are the same as last saved are not rewritten.
+            if person.section_graphs:
+                if person.snapshot_changed:
+                    self._snapshots(store).save(person.orcid_id, person.section_graphs)
+                store.set_graph_fingerprints(person.orcid_id, dict((section, person.graph_fingerprints[section])
+                                                                   for section in person.section_graphs))
+            store.set_fingerprints(person.orcid_id, dict((section, person.fingerprints[section])
+                                                         for section in person.changed_sections))
+
+            # Touch
+            store.touch(person.orcid_id)
+
+    def graph(self, person):
+        """
+        Returns the graph for the person as last loaded.
+        """
+        # Sections that were not crosswalked (or did not change) are as last saved
+        unchanged_sections = [section for section in SECTIONS
+                              if section not in person.section_graphs and section in person.saved_sections]
+        if None in person.saved_sections and not person.section_graphs:
+            unchanged_sections.append(None)
+        with Store(self.data_path) as store:
+            return union_graph(person.section_graphs.values() + self._snapshots(store).load(
+                person.orcid_id, unchanged_sections).values())
+
+
+def load_single(orcid_id, person_uri, person_id, person_class, data_path, endpoint, username, password,
+                namespace=None, skip_person=False, confirmed_orcid_id=False, batch=None, sections=None, force=False,
+                sqlite_snapshots=False, combined_update=False):
+    """
+    Crosswalks a person and loads the changes since the last load to VIVO.
+
+    Only sections whose part of the orcid profile changed since the last load are crosswalked. Only sections whose
+    graph changed since the last load are diffed and loaded.
+    :param batch: a BatchCrosswalk to crosswalk with, so that caches and shared entities can be shared with other
+    people. If provided, namespace is ignored.
+    :param sections: the sections (see orcid2vivo.SECTIONS) to crosswalk and load. Triples for other sections are
+    left as they were last loaded. Default is all sections.
+    :param force: crosswalk the sections even if the orcid profile has not changed, e.g., to pick up changes to
+    Crossref records.
+    :param sqlite_snapshots: keep the graphs last loaded in the db (see SqliteSnapshots) rather than in files (see
+    NTriplesSnapshots). Graphs in files are moved to the db.
+    :param combined_update: delete and insert the triples with a single SPARQL Update request.
+    """
+    if batch is None:
+        uri_index = load_uri_index(data_path)
+        with open_work_cache(data_path, namespace, uri_index) as work_cache:
+            return load_single(orcid_id, person_uri, person_id, person_class, data_path, endpoint, username,
+                               password, skip_person=skip_person, confirmed_orcid_id=confirmed_orcid_id,
+                               batch=BatchCrosswalk(namespace, work_cache=work_cache, share_entities=True,
+                                                    uri_index=uri_index),
+                               sections=sections,
+                               force=force,
+                               sqlite_snapshots=sqlite_snapshots,
+                               combined_update=combined_update)
+
+    loader = PersonLoader(data_path, endpoint, username, password, batch, skip_person=skip_person,
+                          sections=sections, force=force, sqlite_snapshots=sqlite_snapshots,
+                          combined_update=combined_update)
+    person = PersonLoad(orcid_id, person_uri=person_uri, person_id=person_id, person_class=person_class,
+                        confirmed_orcid_id=confirmed_orcid_id)
+    with orcid_id_locks.lock(orcid_id):
+        loader.fetch(person)
+        loader.crosswalk(person)
+        loader.update(person)
+        return loader.graph(person), person.add_graph, person.delete_graph
+
+
+def load(data_path, endpoint, username, password, limit=None, before_datetime=None, namespace=None, skip_person=False,
+         sections=None, force=False, sqlite_snapshots=False, workers=1, fetchers=None, combined_update=False,
+         batch_triples=None, batch_seconds=None):
+    """
+    Loads the people that were least recently loaded.
+
+    People are loaded by a pipeline (see PersonLoader): the orcid profiles are fetched, crosswalked and diffed
+    concurrently, while the SPARQL Updates are made one at a time in the order of the people.
+    :param workers: number of people to crosswalk and diff concurrently.
+    :param fetchers: number of people to fetch the orcid profiles (and work and Crossref records) for concurrently.
+    Default is workers.
+    :param combined_update: delete and insert the triples for each person with a single SPARQL Update request.
+    :param batch_triples: make SPARQL Updates for many people at once, accumulating changes until there are this many
+    triples. A person's last load is only recorded once the SPARQL Update for the person succeeds.
+    :param batch_seconds: accumulate changes for no more than this many seconds.
+    :return: the orcid ids of the people with changes that were loaded, of the people that failed, and of the people
+    without changes.
+    """
+    fetchers = fetchers or workers
     orcid_ids = []
     failed_orcid_ids = []
-    with Store(data_path) as store:
+    unchanged_orcid_ids = []
+    uri_index = load_uri_index(data_path)
+    with Store(data_path) as store, open_work_cache(data_path, namespace, uri_index) as work_cache:
+        # Share an HTTP session and caches across people
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max(workers + fetchers, DEFAULT_POOLSIZE))
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        batch = BatchCrosswalk(namespace, session=session, work_cache=work_cache, share_entities=True,
+                               uri_index=uri_index, dedupe_works=True)
+        loader = PersonLoader(data_path, endpoint, username, password, batch, skip_person=skip_person,
+                              sections=sections, force=force, sqlite_snapshots=sqlite_snapshots,
+                              combined_update=combined_update, batch_triples=batch_triples,
+                              batch_seconds=batch_seconds)
+
+        def fetch(person):
+            # Released when the person leaves the pipeline
+            orcid_id_locks.acquire(person.orcid_id)
+            loader.fetch(person)
+
+        pipeline = Pipeline([Stage("fetch", fetch, workers=fetchers),
+                             Stage("crosswalk", loader.crosswalk, workers=workers),
+                             Stage("update", loader.update, ordered=True)])
+        def finish(person, exception=None):
+            orcid_id_locks.release(person.orcid_id)
+            if exception is not None or person.exception is not None:
+                failed_orcid_ids.append(person.orcid_id)
+            elif person.changed:
+                orcid_ids.append(person.orcid_id)
+            else:
+                unchanged_orcid_ids.append(person.orcid_id)
+            # Only the orcid ids are kept for the people that were loaded
+            person.clear()
+
         # Get the orcid ids to update
-        results = store.get_least_recent(limit=limit, before_datetime=before_datetime)
-        for (orcid_id, person_uri, person_id, person_class, confirmed) in results:
-            try:
-                load_single(orcid_id, person_uri, person_id, person_class, data_path, endpoint, username, password,
-                            namespace, skip_person, confirmed)
-                orcid_ids.append(orcid_id)
-            except Exception:
-                failed_orcid_ids.append(orcid_id)
-    return orcid_ids, failed_orcid_ids
+        people = (PersonLoad(orcid_id, person_uri=person_uri, person_id=person_id, person_class=person_class,
+                             confirmed_orcid_id=confirmed)
+                  for (orcid_id, person_uri, person_id, person_class, confirmed)
+                  in store.get_least_recent(limit=limit, before_datetime=before_datetime))
+        for person, exception in pipeline.run(people):
+            # People whose changes were accumulated are finished once their changes are flushed
+            if not person.batched:
+                finish(person, exception)
+            for flushed_person in loader.pop_flushed():
+                finish(flushed_person)
+        loader.flush()
+        for flushed_person in loader.pop_flushed():
+            finish(flushed_person)
+
+        # Shared entities that were not added with a person
+        shared_graph = batch.shared_entities.pop_new()
+        if shared_graph:
+            loader.insert_shared_entities(shared_graph)
+        for stage in pipeline.stages:
+            log.info("%s stage: %s people, %.2f utilization, %.1f seconds waiting for the next stage", stage.name,
+                     stage.count, stage.utilization(pipeline.elapsed), stage.blocked)
+        log.info("Work cache hit rate is %.2f (%s hits, %s misses)", work_cache.hit_rate, work_cache.hits,
+                 work_cache.misses)
+        log.info("Name cache hit rate is %.2f (%s hits, %s misses)", batch.context.names.hit_rate,
+                 batch.context.names.hits, batch.context.names.misses)
+        log.info("%s of %s work descriptions were shared with other people in the batch",
+                 batch.work_registry.hits, batch.work_registry.hits + batch.work_registry.misses)
+        log.info("Loaded %s people, %s without changes, %s failed", len(orcid_ids), len(unchanged_orcid_ids),
+                 len(failed_orcid_ids))
+    return orcid_ids, failed_orcid_ids, unchanged_orcid_ids
+
+def open_work_cache(data_path, namespace, uri_index):
+    """
+    Returns the SubgraphCache of works. It is cleared if the crosswalk version, namespace or index of entities already
+    in VIVO changed since it was written, since its entries could no longer be used.
+    """
+    return SubgraphCache(os.path.join(data_path, WORK_CACHE_FILENAME),
+                         settings=(CROSSWALK_VERSION, unicode(namespace or ns.D),
+                                   uri_index.checksum if uri_index is not None else None))
+
+
+def load_uri_index(data_path):
+    """
+    Returns the UriIndex of entities already in VIVO or None if it has not been built.
+    """
+    uri_index_filepath = os.path.join(data_path, URI_INDEX_FILENAME)
+    if os.path.exists(uri_index_filepath):
+        log.debug("Loading uri index %s", uri_index_filepath)
+        return UriIndex.load(uri_index_filepath)
+    return None
+
+
+def build_uri_index(data_path, nt_filepaths=(), capacity=1000000):
+    """
+    Builds the index of entities already in VIVO from the stored RDF, the shared entities that were loaded and,
+    optionally, N-Triples dumps of VIVO.
+    """
+    uri_index = UriIndex(capacity=capacity)
+    for nt_filepath in nt_filepaths:
+        log.info("Indexing %s", nt_filepath)
+        uri_index.add_from_nt(nt_filepath)
+    snapshots = NTriplesSnapshots(data_path)
+    snapshots.migrate()
+    for graph in snapshots:
+        uri_index.add_from_graph(graph)
+    with Store(data_path) as store:
+        for graph in store.snapshots():
+            uri_index.add_from_graph(graph)
+        # Shared entities are not in the graphs for people
+        for uri in store.shared_entities():
+            uri_index.add(uri)
+    uri_index.save(os.path.join(data_path, URI_INDEX_FILENAME))
+    log.info("Indexed %s uris", len(uri_index))
+    return uri_index
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -223,8 +876,8 @@ if __name__ == "__main__":
     orcid_id_parent_parser = argparse.ArgumentParser(add_help=False)
     orcid_id_parent_parser.add_argument("orcid_id")
     data_path_parent_parser = argparse.ArgumentParser(add_help=False)
-    data_path_parent_parser.add_argument("--data-path", dest="data_path", help="Path where db and ttl files will be "
-                                                                               "stored. Default is ./data.",
+    data_path_parent_parser.add_argument("--data-path", dest="data_path", help="Path where db and snapshot files will "
+                                                                               "be stored. Default is ./data.",
                                          default="./data")
 
     subparsers = parser.add_subparsers(dest="command")
@@ -265,6 +918,47 @@ if __name__ == "__main__":
                                               "YYYY-MM-DD HH:MM:SS in UTC.")
     load_parser.add_argument("--skip-person", dest="skip_person", action="store_true",
                              help="Skip adding triples declaring the person and the person's name.")
+    load_parser.add_argument("--sections", type=parse_sections, default=SECTIONS,
+                             help="Comma separated sections to crosswalk and load, e.g., bio,affiliations. Sections "
+                                  "are %s. Triples for other sections are left as last loaded. Default is all "
+                                  "sections." % ", ".join(SECTIONS))
+    load_parser.add_argument("--force", action="store_true",
+                             help="Crosswalk sections even if the orcid profile has not changed since the last load, "
+                                  "e.g., to pick up changes to Crossref records.")
+    load_parser.add_argument("--sqlite-snapshots", dest="sqlite_snapshots", action="store_true",
+                             help="Keep the RDF last loaded for people in the db rather than in files. RDF in files "
+                                  "is moved to the db.")
+    load_parser.add_argument("--workers", type=int, default=1,
+                             help="Number of people to crosswalk concurrently when loading multiple orcid ids. "
+                                  "Default is 1.")
+    load_parser.add_argument("--fetchers", type=int,
+                             help="Number of people to fetch the orcid profiles (and work and Crossref records) for "
+                                  "concurrently when loading multiple orcid ids. Default is the number of workers.")
+    load_parser.add_argument("--combined-update", dest="combined_update", action="store_true",
+                             help="Delete and insert the triples for a person with a single SPARQL Update request, so "
+                                  "that the change is applied at once. Falls back to separate requests if the "
+                                  "endpoint rejects it.")
+    load_parser.add_argument("--batch-triples", dest="batch_triples", type=int,
+                             help="Make SPARQL Updates for many people at once, accumulating changes until there are "
+                                  "this many triples to delete and insert. People are only recorded as loaded once "
+                                  "the SPARQL Update succeeds.")
+    load_parser.add_argument("--batch-seconds", dest="batch_seconds", type=float,
+                             help="Accumulate changes for people for no more than this many seconds. Default "
+                                  "--batch-triples is %s." % SPARQL_MAX_TRIPLES)
+
+    index_parser = subparsers.add_parser("index", help="Builds the index of entities already in VIVO, so that loads do "
+                                                       "not create them again. Indexes the entities in the stored RDF "
+                                                       "and, optionally, in N-Triples dumps of VIVO. Rebuild to "
+                                                       "refresh.",
+                                         parents=[data_path_parent_parser])
+    index_parser.add_argument("nt_filepath", nargs="*", help="N-Triples dump of VIVO.")
+    index_parser.add_argument("--capacity", type=int, default=1000000,
+                              help="Expected number of entities. Default is 1,000,000.")
+
+    migrate_parser = subparsers.add_parser("migrate", help="Converts the Turtle files of the stored RDF kept by "
+                                                           "earlier versions to sorted, gzipped N-Triples. Otherwise, "
+                                                           "converted when each person is loaded.",
+                                           parents=[data_path_parent_parser])
 
     list_parser = subparsers.add_parser("list", help="Lists orcid_id records in the db.",
                                         parents=[data_path_parent_parser])
@@ -289,6 +983,11 @@ if __name__ == "__main__":
         elif args.command == "delete-all":
             print "Deleting all"
             main_store.delete_all()
+        elif args.command == "index":
+            print "Indexing"
+            build_uri_index(args.data_path, nt_filepaths=args.nt_filepath, capacity=args.capacity)
+        elif args.command == "migrate":
+            print "Migrated %s files" % NTriplesSnapshots(args.data_path).migrate()
         elif args.command == "list":
             for main_orcid_id, main_active, main_last_update, main_person_uri, \
                     main_person_id, main_person_class, main_confirmed in main_store:
@@ -313,16 +1012,20 @@ if __name__ == "__main__":
                     print "Loading %s to %s" % (args.orcid_id, args.endpoint)
                     load_single(main_orcid_id, main_person_uri, main_person_id, main_person_class, args.data_path,
                                 args.endpoint, args.username, main_password,
-                                namespace=args.namespace, skip_person=args.skip_person)
+                                namespace=args.namespace, skip_person=args.skip_person,
+                                sections=args.sections, force=args.force,
+                                sqlite_snapshots=args.sqlite_snapshots, combined_update=args.combined_update)
             else:
                 main_before_datetime = datetime.strptime(args.before, DATETIME_FORMAT) if args.before else None
                 print "Loading to %s" % args.endpoint
-                main_orcid_ids, main_failed_orcid_ids = load(args.data_path, args.endpoint, args.username,
-                                                             main_password, limit=args.limit,
-                                                             before_datetime=main_before_datetime,
-                                                             namespace=args.namespace,
-                                                             skip_person=args.skip_person)
+                main_orcid_ids, main_failed_orcid_ids, main_unchanged_orcid_ids = load(
+                    args.data_path, args.endpoint, args.username, main_password, limit=args.limit,
+                    before_datetime=main_before_datetime, namespace=args.namespace, skip_person=args.skip_person,
+                    sections=args.sections, force=args.force, sqlite_snapshots=args.sqlite_snapshots,
+                    workers=args.workers, fetchers=args.fetchers, combined_update=args.combined_update,
+                    batch_triples=args.batch_triples, batch_seconds=args.batch_seconds)
                 print "Loaded: %s" % ", ".join(main_orcid_ids)
                 print "Failed: %s" % ", ".join(main_failed_orcid_ids)
+                print "Unchanged: %s people" % len(main_unchanged_orcid_ids)
 
     print "Done"
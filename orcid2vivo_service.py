@@ -4,7 +4,7 @@ from flask import Flask, render_template, request, session, Response, flash, Mar
 import argparse
 import json
 import urllib
-from orcid2vivo import default_execute
+from orcid2vivo import default_execute, SECTIONS, parse_sections
 import orcid2vivo_app.utility as utility
 
 app = Flask(__name__)
@@ -19,6 +19,7 @@ def_output = "serialize"
 def_output_html = True
 def_output_profile = False
 def_confirmed = False
+def_sections = SECTIONS
 
 content_types = {
     "xml": "application/rdf+xml",
@@ -40,6 +41,8 @@ def crosswalk_form(rdf=None, orcid_profile=None):
                            person_class=session.get("person_class") or def_person_class,
                            skip_person=session.get("skip_person") or def_skip_person,
                            confirmed=session.get("confirmed") or def_confirmed,
+                           all_sections=SECTIONS,
+                           sections=session.get("sections") or def_sections,
                            output=session.get("output") or def_output,
                            output_html=session.get("output_html") or def_output_html,
                            output_profile=session.get("output_profile") or def_output_profile,
@@ -57,6 +60,8 @@ def crosswalk():
     session["person_class"] = person_class
     session["skip_person"] = True if "skip_person" in request.form else False
     session["confirmed"] = True if "confirmed" in request.form else False
+    sections = request.form.getlist("sections")
+    session["sections"] = sections
     session["output"] = request.form.get("output")
     session["output_html"] = True if "output_html" in request.form else False
     session["output_profile"] = True if "output_profile" in request.form else False
@@ -68,7 +73,9 @@ def crosswalk():
                                       person_id=request.form["person_id"],
                                       skip_person=True if "skip_person" in request.form else False,
                                       person_class=person_class if person_class != "Person" else None,
-                                      confirmed_orcid_id=True if "confirmed" in request.form else False)
+                                      confirmed_orcid_id=True if "confirmed" in request.form else False,
+                                      sections=sections,
+                                      keep_profile="output_profile" in request.form)
 
     if "output" in request.form and request.form["output"] == "vivo":
         utility.sparql_insert(g, endpoint, request.form["username"], request.form["password"])
@@ -106,6 +113,9 @@ if __name__ == "__main__":
     parser.add_argument("--skip-person", dest="skip_person", action="store_true",
                         help="Skip adding triples declaring the person and the person's name.")
     parser.add_argument("--confirmed", action="store_true", help="Mark the orcid id as confirmed.")
+    parser.add_argument("--sections", type=parse_sections, default=SECTIONS,
+                        help="Comma separated sections to select by default, e.g., bio,affiliations. Sections are %s. "
+                             "Default is all sections." % ", ".join(SECTIONS))
     parser.add_argument("--debug", action="store_true")
     parser.add_argument("--port", type=int, default="5000", help="The port the service should run on. Default is 5000.")
 
@@ -120,6 +130,7 @@ if __name__ == "__main__":
     def_person_class = args.person_class
     def_skip_person = args.skip_person
     def_confirmed = args.confirmed
+    def_sections = args.sections
 
     app.debug = args.debug
     app.secret_key = "orcid2vivo"
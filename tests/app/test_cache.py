@@ -0,0 +1,68 @@
+from unittest import TestCase
+import tempfile
+import shutil
+import os
+from rdflib import RDF
+import orcid2vivo_app.vivo_namespace as ns
+from orcid2vivo_app.vivo_namespace import FOAF
+from orcid2vivo_app.cache import LRUCache, SubgraphCache
+
+
+class TestLRUCache(TestCase):
+    def test_cache(self):
+        cache = LRUCache(maxsize=2)
+        self.assertIsNone(cache.get("a"))
+        cache["a"] = 1
+        cache["b"] = 2
+        self.assertEqual(1, cache.get("a"))
+        # b is least recently used
+        cache["c"] = 3
+        self.assertEqual(2, len(cache))
+        self.assertFalse("b" in cache)
+        self.assertTrue("a" in cache)
+        self.assertTrue("c" in cache)
+        self.assertEqual("missing", cache.get("b", "missing"))
+
+    def test_hit_rate(self):
+        cache = LRUCache()
+        self.assertEqual(0.0, cache.hit_rate)
+        cache.get("a")
+        cache["a"] = 1
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+        self.assertEqual(2, cache.hits)
+        self.assertEqual(2, cache.misses)
+        self.assertEqual(0.5, cache.hit_rate)
+
+
+class TestSubgraphCache(TestCase):
+    def setUp(self):
+        self.data_path = tempfile.mkdtemp()
+        self.triples = ((ns.D["test"], RDF.type, FOAF.Person),)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_path, ignore_errors=True)
+
+    def test_persist(self):
+        filepath = os.path.join(self.data_path, "test.cache")
+        with SubgraphCache(filepath) as cache:
+            self.assertIsNone(cache.get("key"))
+            cache["key"] = list(self.triples)
+        with SubgraphCache(filepath) as cache:
+            self.assertEqual(self.triples, cache.get("key"))
+            self.assertEqual(1, cache.hits)
+            self.assertEqual(0, cache.misses)
+            self.assertEqual(1.0, cache.hit_rate)
+
+    def test_settings(self):
+        filepath = os.path.join(self.data_path, "test.cache")
+        with SubgraphCache(filepath, settings=("1", "http://vivo.mydomain.edu/individual/")) as cache:
+            cache["key"] = list(self.triples)
+            self.assertEqual(1, len(cache))
+        with SubgraphCache(filepath, settings=("1", "http://vivo.mydomain.edu/individual/")) as cache:
+            self.assertEqual(self.triples, cache.get("key"))
+        # Cleared when the settings change
+        with SubgraphCache(filepath, settings=("2", "http://vivo.mydomain.edu/individual/")) as cache:
+            self.assertIsNone(cache.get("key"))
+            self.assertEqual(0, len(cache))
@@ -0,0 +1,32 @@
+from unittest import TestCase
+from rdflib import Graph, Literal, RDF, RDFS, BNode
+import orcid2vivo_app.vivo_namespace as ns
+from orcid2vivo_app.vivo_namespace import BIBO, FOAF
+from orcid2vivo_app.diff import has_bnodes, sorted_diff
+
+
+class TestDiff(TestCase):
+    def setUp(self):
+        self.triples = [(ns.D["work"], RDF.type, BIBO.AcademicArticle),
+                        (ns.D["work"], RDFS.label, Literal("Persistent identifiers")),
+                        (ns.D["test"], RDF.type, FOAF.Person),
+                        (ns.D["test"], RDFS.label, Literal("Littman, Justin"))]
+
+    @staticmethod
+    def _graph(triples):
+        graph = Graph()
+        for triple in triples:
+            graph.add(triple)
+        return graph
+
+    def test_has_bnodes(self):
+        self.assertTrue(has_bnodes(self._graph(self.triples[:1] + [(BNode(), RDFS.label, Literal("Littman, Justin"))])))
+        self.assertFalse(has_bnodes(self._graph(self.triples)))
+
+    def test_sorted_diff(self):
+        old_lines = ["a", "b", "b", "d", "f"]
+        new_lines = ["b", "c", "d", "d", "g"]
+        self.assertEqual([(False, "a"), (True, "c"), (False, "f"), (True, "g")],
+                         list(sorted_diff(iter(old_lines), iter(new_lines))))
+        self.assertEqual([(True, "a")], list(sorted_diff([], ["a"])))
+        self.assertEqual([], list(sorted_diff(["a"], ["a"])))
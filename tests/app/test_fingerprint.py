@@ -0,0 +1,58 @@
+from unittest import TestCase
+import copy
+import json
+from orcid2vivo_app.fingerprint import profile_fingerprints, changed_items
+from orcid2vivo_app.utility import prune_orcid_summary_pairs
+
+
+class TestFingerprint(TestCase):
+    def setUp(self):
+        self.profile = {
+            "person": {"name": {"family-name": {"value": "Littman"}}},
+            "activities-summary": {
+                "works": {"group": [{"work-summary": [{"put-code": 1, "title": "Work 1"}]},
+                                    {"work-summary": [{"put-code": 2, "title": "Work 2"}]}]},
+                "educations": {"education-summary": [{"put-code": 3, "role-title": "MLS"}]},
+                "fundings": {"group": [{"funding-summary": [{"put-code": 4, "type": "GRANT"}]}]}
+            }
+        }
+        self.sections = ("bio", "works", "affiliations", "fundings")
+
+    def test_profile_fingerprints(self):
+        fingerprints = profile_fingerprints(self.profile, self.sections)
+        self.assertEqual(["person"], fingerprints["bio"].keys())
+        self.assertEqual({"family-name", "1", "2"}, set(fingerprints["works"].keys()))
+        self.assertEqual(["3"], fingerprints["affiliations"].keys())
+        self.assertEqual(["4"], fingerprints["fundings"].keys())
+        self.assertEqual(fingerprints, profile_fingerprints(copy.deepcopy(self.profile), self.sections))
+
+    def test_changed(self):
+        fingerprints = profile_fingerprints(self.profile, self.sections)
+        profile = copy.deepcopy(self.profile)
+        profile["activities-summary"]["works"]["group"][1]["work-summary"][0]["title"] = "Work Two"
+        profile["activities-summary"]["works"]["group"].append({"work-summary": [{"put-code": 5}]})
+        new_fingerprints = profile_fingerprints(profile, self.sections)
+        self.assertEqual({"2", "5"}, changed_items(new_fingerprints["works"], fingerprints["works"]))
+        for section in ("bio", "affiliations", "fundings"):
+            self.assertEqual(set(), changed_items(new_fingerprints[section], fingerprints[section]))
+
+    def test_last_modified(self):
+        profile_json = """
+{
+  "activities-summary": {
+    "works": {"group": [{"work-summary": [{"put-code": 1, "title": "Work 1",
+                                           "last-modified-date": {"value": %s}}]}]}
+  }
+}
+        """
+        fingerprints = profile_fingerprints(json.loads(profile_json % 1459281416371,
+                                                       object_pairs_hook=prune_orcid_summary_pairs), ["works"])
+        # Only the full record of the work changed, e.g., its contributors
+        new_fingerprints = profile_fingerprints(json.loads(profile_json % 1459281416372,
+                                                           object_pairs_hook=prune_orcid_summary_pairs), ["works"])
+        self.assertEqual({"1"}, changed_items(new_fingerprints["works"], fingerprints["works"]))
+
+    def test_settings(self):
+        fingerprints = profile_fingerprints(self.profile, ["bio"], settings=("http://vivo.mydomain.edu/", None))
+        self.assertNotEqual(fingerprints, profile_fingerprints(self.profile, ["bio"],
+                                                               settings=("http://vivo.otherdomain.edu/", None)))
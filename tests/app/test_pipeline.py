@@ -0,0 +1,89 @@
+from unittest import TestCase
+import random
+import time
+from orcid2vivo_app.pipeline import Pipeline, Stage
+
+
+class TestPipeline(TestCase):
+    def test_run(self):
+        updated = []
+
+        def fetch(item):
+            time.sleep(random.random() / 100)
+            item.append("fetched")
+
+        def crosswalk(item):
+            if item[0] == 3:
+                raise ValueError("Bad item")
+            item.append("crosswalked")
+
+        pipeline = Pipeline([Stage("fetch", fetch, workers=4),
+                             Stage("crosswalk", crosswalk, workers=2),
+                             Stage("update", lambda item: updated.append(item[0]), ordered=True)])
+        results = list(pipeline.run([[i] for i in range(10)]))
+
+        self.assertEqual(10, len(results))
+        # Ordered stage processes items in order
+        self.assertEqual([0, 1, 2, 4, 5, 6, 7, 8, 9], updated)
+        for item, exception in results:
+            if item[0] == 3:
+                self.assertIsInstance(exception, ValueError)
+                self.assertEqual([3, "fetched"], item)
+            else:
+                self.assertIsNone(exception)
+                self.assertEqual([item[0], "fetched", "crosswalked"], item)
+
+        self.assertEqual([10, 10, 9], [stage.count for stage in pipeline.stages])
+        self.assertTrue(pipeline.elapsed > 0)
+        self.assertTrue(0 < pipeline.stages[0].utilization(pipeline.elapsed) <= 1)
+
+    def test_backpressure(self):
+        fed = []
+
+        def items():
+            for i in range(10):
+                fed.append(i)
+                yield i
+
+        pipeline = Pipeline([Stage("slow", lambda item: time.sleep(0.01))], maxsize=1)
+        results = pipeline.run(items())
+        results.next()
+        # The feeder waits for the slow stage
+        self.assertTrue(len(fed) < 10)
+        self.assertEqual(9, len(list(results)))
+
+    def test_ordered_backpressure(self):
+        fed = []
+        fed_while_slow = []
+
+        def items():
+            for i in range(100):
+                fed.append(i)
+                yield i
+
+        def fetch(item):
+            if item == 0:
+                time.sleep(0.2)
+                fed_while_slow.append(len(fed))
+
+        pipeline = Pipeline([Stage("fetch", fetch, workers=4),
+                             Stage("update", lambda item: None, ordered=True)], maxsize=1)
+        results = list(pipeline.run(items()))
+
+        self.assertEqual(100, len(results))
+        # The ordered stage does not collect the items after the slow item without limit
+        self.assertTrue(fed_while_slow[0] <= 1 + 4 + 1 + 1 + 1)
+
+    def test_items_failed(self):
+        def items():
+            yield 0
+            raise ValueError("Bad items")
+
+        pipeline = Pipeline([Stage("update", lambda item: None, ordered=True)])
+        results = pipeline.run(items())
+        # Items before the failure finish
+        self.assertEqual((0, None), results.next())
+        self.assertRaises(ValueError, results.next)
+
+    def test_ordered_workers(self):
+        self.assertRaises(ValueError, Stage, "update", None, workers=2, ordered=True)
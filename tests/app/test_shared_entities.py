@@ -0,0 +1,45 @@
+from unittest import TestCase
+from rdflib import Graph, Literal, RDF, RDFS
+import orcid2vivo_app.vivo_namespace as ns
+from orcid2vivo_app.vivo_namespace import VIVO, BIBO, FOAF
+from orcid2vivo_app.shared_entities import SharedEntities
+
+
+class TestSharedEntities(TestCase):
+    def setUp(self):
+        self.work_uri = ns.D["work"]
+        self.journal_uri = ns.D["journal"]
+        self.publisher_uri = ns.D["publisher"]
+        self.link_triples = [(self.work_uri, RDF.type, BIBO.AcademicArticle),
+                             (self.work_uri, VIVO.hasPublicationVenue, self.journal_uri),
+                             (self.work_uri, VIVO.publisher, self.publisher_uri)]
+        self.entity_triples = [(self.journal_uri, RDF.type, BIBO.Journal),
+                               (self.journal_uri, RDFS.label, Literal("Nature")),
+                               (self.publisher_uri, RDF.type, FOAF.Organization),
+                               (self.publisher_uri, RDFS.label, Literal("Elsevier"))]
+
+    def _graph(self):
+        graph = Graph()
+        for triple in self.link_triples + self.entity_triples:
+            graph.add(triple)
+        return graph
+
+    def test_extract(self):
+        shared_entities = SharedEntities()
+        graph1 = self._graph()
+        self.assertEqual(set(self.entity_triples), set(shared_entities.extract(graph1)))
+        self.assertEqual(set(self.link_triples), set(graph1))
+        self.assertEqual(4, len(shared_entities))
+        self.assertTrue(self.entity_triples[0] in shared_entities)
+        self.assertFalse(self.link_triples[0] in shared_entities)
+        self.assertEqual(set(self.entity_triples), set(shared_entities.pop_new()))
+
+        # Entities for another person are extracted, but are not new.
+        graph2 = self._graph()
+        shared_entities.extract(graph2)
+        self.assertEqual(set(self.link_triples), set(graph2))
+        self.assertEqual(0, len(shared_entities.pop_new()))
+
+        # Restored triples are popped again
+        shared_entities.restore(self.entity_triples)
+        self.assertEqual(set(self.entity_triples), set(shared_entities.pop_new()))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+from StringIO import StringIO
+from rdflib import Graph, Literal, RDF, RDFS, URIRef
+import orcid2vivo_app.vivo_namespace as ns
+from orcid2vivo_app.vivo_namespace import FOAF
+from orcid2vivo_app.sink import GraphSink, SetSink, NTriplesSink, HashSink, TeeSink
+
+
+class TestSinks(TestCase):
+    def setUp(self):
+        self.person_uri = ns.D["test"]
+        self.triples = [(self.person_uri, RDF.type, FOAF.Person),
+                        (self.person_uri, RDFS.label, Literal(u"Jos\xe9 Smith")),
+                        (self.person_uri, RDFS.label, Literal("Line 1\nLine 2"))]
+
+    def _add_all(self, sink, triples):
+        for triple in triples:
+            sink.add(triple)
+
+    def test_graph_sink(self):
+        graph = Graph()
+        sink = GraphSink(graph)
+        self._add_all(sink, self.triples + self.triples)
+        self.assertEqual(3, len(sink))
+        self.assertEqual(3, len(graph))
+        self.assertTrue(self.triples[0] in sink)
+
+    def test_set_sink(self):
+        sink = SetSink()
+        self._add_all(sink, self.triples + self.triples)
+        self.assertEqual(3, len(sink))
+        self.assertTrue(self.triples[1] in sink)
+        self.assertEqual(3, len(sink.to_graph()))
+
+    def test_ntriples_sink(self):
+        stream = StringIO()
+        sink = NTriplesSink(stream)
+        self._add_all(sink, self.triples + self.triples)
+        self.assertEqual(3, len(sink))
+        self.assertEqual(3, len(stream.getvalue().splitlines()))
+        graph = Graph()
+        graph.parse(data=stream.getvalue(), format="nt")
+        self.assertEqual(set(self.triples), set(graph))
+
+        # Written again once reset
+        sink.reset()
+        self._add_all(sink, self.triples[:1])
+        self.assertEqual(4, len(sink))
+        self.assertEqual(4, len(stream.getvalue().splitlines()))
+
+    def test_nquads_sink(self):
+        stream = StringIO()
+        sink = NTriplesSink(stream, context=URIRef("http://vitro.mannlib.cornell.edu/default/vitro-kb-2"))
+        self._add_all(sink, self.triples)
+        for line in stream.getvalue().splitlines():
+            self.assertTrue(line.endswith("<http://vitro.mannlib.cornell.edu/default/vitro-kb-2> ."))
+
+    def test_hash_sink(self):
+        sink1 = HashSink()
+        self._add_all(sink1, self.triples)
+        sink2 = HashSink()
+        # Order and duplicates do not matter
+        self._add_all(sink2, list(reversed(self.triples)) + self.triples)
+        self.assertEqual(sink1.hexdigest(), sink2.hexdigest())
+        self.assertEqual(3, len(sink2))
+        sink3 = HashSink()
+        self._add_all(sink3, self.triples[:2])
+        self.assertNotEqual(sink1.hexdigest(), sink3.hexdigest())
+        # Removing is the same as not adding
+        sink1.remove(self.triples[2])
+        sink1.remove(self.triples[2])
+        self.assertEqual(sink3.hexdigest(), sink1.hexdigest())
+        self.assertEqual(2, len(sink1))
+
+    def test_tee_sink(self):
+        set_sink = SetSink()
+        hash_sink = HashSink()
+        self._add_all(TeeSink(set_sink, hash_sink), self.triples)
+        self.assertEqual(3, len(set_sink))
+        self.assertEqual(3, len(hash_sink))
@@ -0,0 +1,143 @@
+import tempfile
+import shutil
+import os
+import sqlite3
+from unittest import TestCase
+from mock import patch
+from rdflib import Graph, Literal, RDF, RDFS
+import orcid2vivo_app.vivo_namespace as ns
+from orcid2vivo_app.vivo_namespace import FOAF, BIBO
+from orcid2vivo_app.snapshot import NTriplesSnapshots, SqliteSnapshots, sorted_nt_lines, parse_nt_lines
+
+
+class TestNTriplesSnapshots(TestCase):
+    def setUp(self):
+        self.data_path = tempfile.mkdtemp()
+        self.bio_graph = Graph()
+        self.bio_graph.add((ns.D["test"], RDF.type, FOAF.Person))
+        self.bio_graph.add((ns.D["test"], RDFS.label, Literal(u"Ren\u00e9e")))
+        self.works_graph = Graph()
+        self.works_graph.add((ns.D["work"], RDF.type, BIBO.AcademicArticle))
+
+    def tearDown(self):
+        shutil.rmtree(self.data_path, ignore_errors=True)
+
+    def test_save_and_load(self):
+        snapshots = NTriplesSnapshots(self.data_path)
+        self.assertEqual(set(), snapshots.saved_sections("0000-0003-1527-0030", ["bio", "works"]))
+        snapshots.save("0000-0003-1527-0030", {"bio": self.bio_graph, "works": self.works_graph})
+        self.assertTrue(os.path.exists(os.path.join(self.data_path, "0000-0003-1527-0030.bio.nt.gz")))
+        self.assertEqual({"bio", "works"},
+                         snapshots.saved_sections("0000-0003-1527-0030", ["bio", "works", "fundings"]))
+
+        section_graphs = snapshots.load("0000-0003-1527-0030", ["bio", "fundings"])
+        self.assertEqual(["bio"], section_graphs.keys())
+        self.assertEqual(set(self.bio_graph), set(section_graphs["bio"]))
+
+        # Lines are sorted
+        lines = list(snapshots.lines("0000-0003-1527-0030", "bio"))
+        self.assertEqual(sorted_nt_lines(self.bio_graph), lines)
+        self.assertEqual(sorted(lines), lines)
+        self.assertEqual(set(self.bio_graph), set(parse_nt_lines(lines)))
+
+        self.assertEqual(2, len(list(snapshots)))
+
+    def test_save_failed(self):
+        snapshots = NTriplesSnapshots(self.data_path)
+        snapshots.save("0000-0003-1527-0030", {"bio": self.bio_graph})
+
+        def lines(graph):
+            yield sorted_nt_lines(graph)[0]
+            raise IOError()
+
+        # Interrupted while writing
+        with patch("orcid2vivo_app.snapshot.sorted_nt_lines", side_effect=lines):
+            self.assertRaises(IOError, snapshots.save, "0000-0003-1527-0030", {"bio": self.works_graph})
+        # The last saved graph is intact
+        self.assertEqual(set(self.bio_graph), set(snapshots.load("0000-0003-1527-0030", ["bio"])["bio"]))
+
+    def test_migrate(self):
+        with open(os.path.join(self.data_path, "0000-0003-1527-0030.ttl"), "w") as out:
+            self.bio_graph.serialize(format="turtle", destination=out)
+        with open(os.path.join(self.data_path, "0000-0003-1527-0031.works.ttl"), "w") as out:
+            self.works_graph.serialize(format="turtle", destination=out)
+        snapshots = NTriplesSnapshots(self.data_path)
+
+        self.assertEqual(1, snapshots.migrate("0000-0003-1527-0030", ["bio", "works"]))
+        self.assertEqual(0, snapshots.migrate("0000-0003-1527-0031", ["bio"]))
+        self.assertEqual({None}, snapshots.saved_sections("0000-0003-1527-0030", ["bio", "works"]))
+        self.assertEqual(set(self.bio_graph), set(snapshots.load("0000-0003-1527-0030", ["bio"])[None]))
+        self.assertFalse(os.path.exists(os.path.join(self.data_path, "0000-0003-1527-0030.ttl")))
+
+        self.assertEqual(1, snapshots.migrate())
+        self.assertEqual({"works"}, snapshots.saved_sections("0000-0003-1527-0031", ["bio", "works"]))
+
+        # Saving sections removes the file for all sections
+        snapshots.save("0000-0003-1527-0030", {"bio": self.bio_graph})
+        self.assertEqual({"bio"}, snapshots.saved_sections("0000-0003-1527-0030", ["bio", "works"]))
+        self.assertFalse(os.path.exists(os.path.join(self.data_path, "0000-0003-1527-0030.nt.gz")))
+
+
+class TestSqliteSnapshots(TestCase):
+    def setUp(self):
+        self.data_path = tempfile.mkdtemp()
+        self.conn = sqlite3.connect(os.path.join(self.data_path, "orcid2vivo.db"))
+        self.bio_graph = Graph()
+        self.bio_graph.add((ns.D["test"], RDF.type, FOAF.Person))
+        self.bio_graph.add((ns.D["test"], RDFS.label, Literal(u"Ren\u00e9e")))
+        self.works_graph = Graph()
+        self.works_graph.add((ns.D["work"], RDF.type, BIBO.AcademicArticle))
+        self.works_graph.add((ns.D["work"], RDFS.label, Literal("Persistent identifiers", lang="en")))
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.data_path, ignore_errors=True)
+
+    def test_save_and_load(self):
+        snapshots = SqliteSnapshots(self.conn)
+        self.assertEqual(set(), snapshots.saved_sections("0000-0003-1527-0030", ["bio", "works"]))
+        snapshots.save("0000-0003-1527-0030", {"bio": self.bio_graph, "works": Graph()})
+        self.assertEqual({"bio", "works"},
+                         snapshots.saved_sections("0000-0003-1527-0030", ["bio", "works", "fundings"]))
+        section_graphs = snapshots.load("0000-0003-1527-0030", ["bio", "works"])
+        self.assertEqual(set(self.bio_graph), set(section_graphs["bio"]))
+        self.assertEqual(0, len(section_graphs["works"]))
+
+        # Replaced
+        snapshots.save("0000-0003-1527-0030", {"works": self.works_graph})
+        self.assertEqual(set(self.works_graph),
+                         set(snapshots.load("0000-0003-1527-0030", ["works"])["works"]))
+        self.assertEqual(2, len(list(snapshots)))
+
+        self.assertEqual({"0000-0003-1527-0030"}, snapshots.orcid_ids(ns.D["work"]))
+        self.assertEqual(set(), snapshots.orcid_ids(ns.D["not_a_work"]))
+
+    def test_diff(self):
+        snapshots = SqliteSnapshots(self.conn)
+        snapshots.save("0000-0003-1527-0030", {"bio": self.bio_graph, "works": self.works_graph})
+        new_works_graph = Graph()
+        new_works_graph.add((ns.D["work"], RDF.type, BIBO.AcademicArticle))
+        new_works_graph.add((ns.D["work2"], RDF.type, BIBO.AcademicArticle))
+        saved_sections = snapshots.saved_sections("0000-0003-1527-0030", ["bio", "works"])
+        (add_graph, delete_graph) = snapshots.diff("0000-0003-1527-0030", {"works": new_works_graph}, saved_sections)
+        self.assertEqual({(ns.D["work2"], RDF.type, BIBO.AcademicArticle)}, set(add_graph))
+        self.assertEqual({(ns.D["work"], RDFS.label, Literal("Persistent identifiers", lang="en"))},
+                         set(delete_graph))
+
+        # Same as for files
+        nt_snapshots = NTriplesSnapshots(self.data_path)
+        nt_snapshots.save("0000-0003-1527-0030", {"bio": self.bio_graph, "works": self.works_graph})
+        (nt_add_graph, nt_delete_graph) = nt_snapshots.diff("0000-0003-1527-0030", {"works": new_works_graph},
+                                                            saved_sections)
+        self.assertEqual(set(nt_add_graph), set(add_graph))
+        self.assertEqual(set(nt_delete_graph), set(delete_graph))
+
+    def test_migrate(self):
+        nt_snapshots = NTriplesSnapshots(self.data_path)
+        nt_snapshots.save("0000-0003-1527-0030", {"bio": self.bio_graph, "works": self.works_graph})
+        snapshots = SqliteSnapshots(self.conn)
+        self.assertTrue(snapshots.migrate("0000-0003-1527-0030", nt_snapshots, ["bio", "works"]))
+        self.assertEqual(set(), nt_snapshots.saved_sections("0000-0003-1527-0030", ["bio", "works"]))
+        self.assertEqual(set(self.works_graph),
+                         set(snapshots.load("0000-0003-1527-0030", ["works"])["works"]))
+        self.assertFalse(snapshots.migrate("0000-0003-1527-0030", nt_snapshots, ["bio", "works"]))
@@ -0,0 +1,59 @@
+from unittest import TestCase
+from rdflib import Graph, Literal, RDF, RDFS
+from rdflib.compare import to_isomorphic, graph_diff
+import orcid2vivo_app.vivo_namespace as ns
+from orcid2vivo_app.vivo_namespace import FOAF
+from orcid2vivo_app.triple_store import AddOptimizedStore, STORE_NAME
+
+
+class TestAddOptimizedStore(TestCase):
+    def setUp(self):
+        self.graph = Graph(store=STORE_NAME, namespace_manager=ns.ns_manager)
+        self.person1_uri = ns.D["person1"]
+        self.person2_uri = ns.D["person2"]
+        self.triples = [(self.person1_uri, RDF.type, FOAF.Person),
+                        (self.person1_uri, RDFS.label, Literal("Person 1")),
+                        (self.person2_uri, RDF.type, FOAF.Person),
+                        (self.person2_uri, RDFS.label, Literal("Person 2"))]
+        for triple in self.triples:
+            self.graph.add(triple)
+        self.default_graph = Graph()
+        for triple in self.triples:
+            self.default_graph.add(triple)
+
+    def test_store(self):
+        self.assertTrue(isinstance(self.graph.store, AddOptimizedStore))
+
+    def test_add(self):
+        # Duplicate
+        self.graph.add(self.triples[0])
+        self.assertEqual(4, len(self.graph))
+        self.assertEqual(set(self.triples), set(self.graph))
+
+    def test_triples(self):
+        self.assertTrue(self.triples[0] in self.graph)
+        self.assertFalse((self.person1_uri, RDF.type, FOAF.Organization) in self.graph)
+        self.assertEqual({self.person1_uri, self.person2_uri}, set(self.graph.subjects(RDF.type, FOAF.Person)))
+        self.assertEqual(Literal("Person 1"), self.graph.value(self.person1_uri, RDFS.label))
+        # Index is maintained after it is built
+        self.graph.add((self.person1_uri, RDFS.label, Literal("Person One")))
+        self.assertEqual(2, len(list(self.graph.objects(self.person1_uri, RDFS.label))))
+
+    def test_remove(self):
+        self.graph.remove((self.person1_uri, None, None))
+        self.assertEqual(2, len(self.graph))
+        self.assertEqual([], list(self.graph.triples((self.person1_uri, None, None))))
+        self.assertEqual([self.person2_uri], list(self.graph.subjects(RDF.type, FOAF.Person)))
+
+    def test_compare(self):
+        self.assertEqual(to_isomorphic(self.default_graph), to_isomorphic(self.graph))
+        (both_graph, first_graph, second_graph) = graph_diff(self.default_graph, self.graph)
+        self.assertEqual(4, len(both_graph))
+        self.assertEqual(0, len(first_graph))
+        self.assertEqual(0, len(second_graph))
+
+    def test_serialize(self):
+        for rdf_format in ("turtle", "nt", "xml"):
+            graph = Graph()
+            graph.parse(data=self.graph.serialize(format=rdf_format), format=rdf_format)
+            self.assertEqual(set(self.triples), set(graph))
@@ -0,0 +1,52 @@
+from unittest import TestCase
+import tempfile
+import shutil
+import os
+import codecs
+from rdflib import Graph, Literal, RDF, RDFS
+import orcid2vivo_app.vivo_namespace as ns
+from orcid2vivo_app.vivo_namespace import FOAF
+from orcid2vivo_app.uri_index import UriIndex
+
+
+class TestUriIndex(TestCase):
+    def setUp(self):
+        self.data_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_path, ignore_errors=True)
+
+    def test_contains(self):
+        uri_index = UriIndex(capacity=1000)
+        checksum = uri_index.checksum
+        uri_index.add(ns.D["organization1"])
+        self.assertTrue(ns.D["organization1"] in uri_index)
+        self.assertFalse(ns.D["organization2"] in uri_index)
+        self.assertEqual(1, len(uri_index))
+        self.assertNotEqual(checksum, uri_index.checksum)
+
+    def test_save_and_load(self):
+        uri_index = UriIndex(capacity=1000)
+        uri_index.add(ns.D["organization1"])
+        filepath = os.path.join(self.data_path, "uris.index")
+        uri_index.save(filepath)
+        loaded_uri_index = UriIndex.load(filepath)
+        self.assertTrue(ns.D["organization1"] in loaded_uri_index)
+        self.assertFalse(ns.D["organization2"] in loaded_uri_index)
+        self.assertEqual(uri_index.checksum, loaded_uri_index.checksum)
+        self.assertEqual(1, len(loaded_uri_index))
+
+    def test_add_from_nt(self):
+        graph = Graph()
+        graph.add((ns.D["organization1"], RDF.type, FOAF.Organization))
+        graph.add((ns.D["organization1"], RDFS.label, Literal(u"Universit\u00e9")))
+        graph.add((ns.D["person1"], FOAF.member, ns.D["organization2"]))
+        filepath = os.path.join(self.data_path, "vivo.nt")
+        with codecs.open(filepath, "w") as out:
+            graph.serialize(format="nt", destination=out)
+        uri_index = UriIndex(capacity=1000)
+        uri_index.add_from_nt(filepath)
+        self.assertTrue(ns.D["organization1"] in uri_index)
+        # Not typed
+        self.assertFalse(ns.D["person1"] in uri_index)
+        self.assertFalse(ns.D["organization2"] in uri_index)
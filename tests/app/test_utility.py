@@ -1,5 +1,14 @@
 from unittest import TestCase
-from orcid2vivo_app.utility import clean_orcid, is_valid_orcid
+from mock import MagicMock, patch
+from rdflib import Graph, RDF, RDFS, XSD, Literal, URIRef, BNode
+from rdflib.compare import to_isomorphic
+from orcid2vivo_app.vivo_namespace import VIVO, FOAF
+import json
+from SPARQLWrapper.SPARQLExceptions import QueryBadFormed
+from orcid2vivo_app.utility import clean_orcid, is_valid_orcid, add_date, DateRegistry, prune_orcid_pairs, \
+    prune_orcid_summary_pairs, chunk_graph, sparql_insert, sparql_delete_insert, sparql_data_query
+from orcid2vivo_app.vivo_uri import HashIdentifierStrategy
+from orcid2vivo_app.sink import SetSink
 
 
 class TestUtility(TestCase):
@@ -20,3 +29,178 @@ class TestUtility(TestCase):
         self.assertTrue(is_valid_orcid("0000-0003-1527-003X"))
         self.assertFalse(is_valid_orcid("0000-0003-1527-00301"))
         self.assertFalse(is_valid_orcid("0000-0003-1527-003"))
+
+    def test_prune_orcid_pairs(self):
+        record = json.loads("""
+{
+  "last-modified-date": {"value": 1459281416371},
+  "name": {
+    "created-date": {"value": 1460757617078},
+    "family-name": {"value": "Littman"},
+    "visibility": "PUBLIC",
+    "source": null
+  }
+}
+        """, object_pairs_hook=prune_orcid_pairs)
+        self.assertEqual({"name": {"family-name": {"value": "Littman"}}}, record)
+
+    def test_prune_orcid_summary_pairs(self):
+        record = json.loads("""
+{
+  "last-modified-date": {"value": 1459281416371},
+  "work-summary": [{
+    "put-code": 15643384,
+    "last-modified-date": {"value": 1459281416372},
+    "source": null
+  }]
+}
+        """, object_pairs_hook=prune_orcid_summary_pairs)
+        # Kept for activities
+        self.assertEqual({"work-summary": [{"put-code": 15643384, "last-modified-date": {"value": 1459281416372}}]},
+                         record)
+
+    def test_chunk_graph(self):
+        graph = Graph()
+        for s in range(3):
+            for o in range(3):
+                graph.add((URIRef("http://example.com/%s" % s), RDFS.label, Literal(o)))
+        # Not split
+        self.assertEqual([graph], chunk_graph(graph))
+
+        # Triples about a subject are kept together
+        chunks = chunk_graph(graph, max_triples=4)
+        self.assertEqual([3, 3, 3], [len(chunk) for chunk in chunks])
+        for chunk in chunks:
+            self.assertEqual(1, len(set(chunk.subjects())))
+        self.assertEqual(set(graph), set(triple for chunk in chunks for triple in chunk))
+
+        # Unless they alone exceed the limit
+        self.assertEqual([2, 1, 2, 1, 2, 1], [len(chunk) for chunk in chunk_graph(graph, max_triples=2)])
+
+        # By bytes
+        self.assertEqual(9, len(chunk_graph(graph, max_bytes=10)))
+
+        # Blank nodes are not split
+        graph.add((BNode(), RDFS.label, Literal("bnode")))
+        self.assertEqual(1, len(chunk_graph(graph, max_triples=4)))
+
+    @patch("orcid2vivo_app.utility.time.sleep")
+    @patch("orcid2vivo_app.utility.sparql_update")
+    def test_sparql_insert(self, mock_sparql_update, mock_sleep):
+        graph = Graph()
+        for s in range(2):
+            graph.add((URIRef("http://example.com/%s" % s), RDFS.label, Literal("label")))
+        # First attempt at first chunk fails
+        mock_sparql_update.side_effect = [IOError(), None, None]
+        sparql_insert(graph, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password", max_triples=1)
+
+        self.assertEqual(3, mock_sparql_update.call_count)
+        self.assertEqual(1, mock_sleep.call_count)
+        queries = [args[0] for args, kwargs in mock_sparql_update.call_args_list]
+        # First chunk is retried on its own
+        self.assertEqual(queries[0], queries[1])
+        self.assertNotEqual(queries[1], queries[2])
+        for query in queries:
+            self.assertTrue("INSERT DATA" in query)
+
+    def test_sparql_data_query(self):
+        graph = Graph()
+        person_uri = URIRef("http://vivo.mydomain.edu/individual/n123")
+        graph.add((person_uri, RDF.type, FOAF.Person))
+        graph.add((person_uri, RDFS.label, Literal(u"Litt\u00e9man, \"Justin\"\nLine")))
+        graph.add((person_uri, RDFS.label, Literal("Justin", lang="en")))
+        graph.add((person_uri, VIVO.dateTime, Literal("2015-01-01T00:00:00", datatype=XSD.dateTime)))
+        graph.add((person_uri, RDFS.seeAlso, URIRef("http://example.com/a/b.c")))
+
+        for prefixes in (None, {"foaf": FOAF, "vivo": VIVO, "rdfs": RDFS, "rdf": RDF}):
+            query = sparql_data_query((("DELETE", []), ("INSERT", graph)), prefixes=prefixes)
+            self.assertIsInstance(query, str)
+            header, delete_data, insert_data = query.decode("utf-8").split("DATA {")
+            self.assertTrue(delete_data.endswith("}};\nINSERT "))
+            # The data is the same triples as the graph
+            data = insert_data[insert_data.index("{") + 1:-2]
+            self.assertEqual(to_isomorphic(graph), to_isomorphic(Graph().parse(
+                data="\n".join(["@prefix %s: <%s> ." % (prefix, namespace)
+                                 for prefix, namespace in (prefixes or {}).items()] + [data]),
+                format="turtle")))
+            if prefixes:
+                self.assertTrue("PREFIX foaf: <http://xmlns.com/foaf/0.1/>" in header)
+                self.assertTrue("rdf:type foaf:Person" in data)
+
+    @patch("orcid2vivo_app.utility.sparql_update")
+    def test_sparql_delete_insert(self, mock_sparql_update):
+        delete_graph = Graph()
+        delete_graph.add((URIRef("http://example.com/0"), RDFS.label, Literal("old")))
+        insert_graph = Graph()
+        insert_graph.add((URIRef("http://example.com/0"), RDFS.label, Literal("new")))
+        sparql_delete_insert(delete_graph, insert_graph, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu",
+                             "password")
+
+        self.assertEqual(1, mock_sparql_update.call_count)
+        query = mock_sparql_update.call_args[0][0]
+        self.assertTrue(query.index("DELETE DATA") < query.index(";") < query.index("INSERT DATA"))
+
+        # Too large to combine
+        mock_sparql_update.reset_mock()
+        sparql_delete_insert(delete_graph, insert_graph, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu",
+                             "password", max_triples=1)
+        self.assertEqual(2, mock_sparql_update.call_count)
+
+    @patch("orcid2vivo_app.utility.sparql_update")
+    def test_sparql_delete_insert_rejected(self, mock_sparql_update):
+        delete_graph = Graph()
+        delete_graph.add((URIRef("http://example.com/0"), RDFS.label, Literal("old")))
+        insert_graph = Graph()
+        insert_graph.add((URIRef("http://example.com/0"), RDFS.label, Literal("new")))
+        mock_sparql_update.side_effect = [QueryBadFormed(), None, None, None, None]
+        sparql_delete_insert(delete_graph, insert_graph, "http://rejecting.mydomain.edu/sparql",
+                             "vivo@mydomain.edu", "password")
+
+        # Not retried, but falls back to separate requests
+        self.assertEqual(3, mock_sparql_update.call_count)
+        queries = [args[0] for args, kwargs in mock_sparql_update.call_args_list]
+        self.assertFalse("INSERT DATA" in queries[1])
+        self.assertFalse("DELETE DATA" in queries[2])
+
+        # Which are used from then on
+        sparql_delete_insert(delete_graph, insert_graph, "http://rejecting.mydomain.edu/sparql",
+                             "vivo@mydomain.edu", "password")
+        self.assertEqual(5, mock_sparql_update.call_count)
+
+    @patch("orcid2vivo_app.utility.sparql_update")
+    def test_sparql_delete_insert_rejected_triples(self, mock_sparql_update):
+        delete_graph = Graph()
+        delete_graph.add((URIRef("http://example.com/0"), RDFS.label, Literal("old")))
+        insert_graph = Graph()
+        insert_graph.add((URIRef("http://example.com/0"), RDFS.label, Literal("new")))
+        mock_sparql_update.side_effect = [QueryBadFormed(), None, QueryBadFormed(), None, None]
+        self.assertRaises(QueryBadFormed, sparql_delete_insert, delete_graph, insert_graph,
+                          "http://strict.mydomain.edu/sparql", "vivo@mydomain.edu", "password")
+        self.assertEqual(3, mock_sparql_update.call_count)
+
+        # The endpoint is still sent combined requests
+        sparql_delete_insert(delete_graph, insert_graph, "http://strict.mydomain.edu/sparql", "vivo@mydomain.edu",
+                             "password")
+        self.assertEqual(4, mock_sparql_update.call_count)
+
+    def test_date_registry(self):
+        identifier_strategy = HashIdentifierStrategy()
+        date_registry = DateRegistry()
+        graph = Graph()
+        date_uri = add_date(2015, graph, identifier_strategy, 3, 2, date_registry=date_registry)
+        self.assertEqual(date_uri, add_date(2015, Graph(), identifier_strategy, 3, 2))
+        self.assertEqual(4, len(graph))
+        self.assertTrue((date_uri, RDFS.label, Literal("March 2, 2015")) in graph)
+        self.assertIsNone(add_date(None, graph, identifier_strategy, date_registry=date_registry))
+
+        # Triples are only added once to a sink
+        mock_sink = MagicMock()
+        self.assertEqual(date_uri, add_date(2015, mock_sink, identifier_strategy, 3, 2, date_registry=date_registry))
+        self.assertEqual(date_uri, add_date(2015, mock_sink, identifier_strategy, 3, 2, date_registry=date_registry))
+        self.assertEqual(4, mock_sink.add.call_count)
+
+        # But are added to other sinks
+        sink = SetSink()
+        add_date(2015, sink, identifier_strategy, 3, 2, date_registry=date_registry)
+        self.assertEqual(set(graph), sink.triples)
+        self.assertEqual(1, len(date_registry))
@@ -1,6 +1,7 @@
 from unittest import TestCase
 from orcid2vivo_app.vivo_uri import HashIdentifierStrategy
 from orcid2vivo_app.vivo_namespace import VIVO, OBO
+from orcid2vivo_app.context import CrosswalkContext
 
 
 class TestHashIdentifierStrategy(TestCase):
@@ -36,3 +37,11 @@ class TestHashIdentifierStrategy(TestCase):
         self.assertEqual("grant", HashIdentifierStrategy._class_to_prefix(VIVO.Grant))
         self.assertEqual("ro_0000052", HashIdentifierStrategy._class_to_prefix(OBO.RO_0000052))
         self.assertIsNone(HashIdentifierStrategy._class_to_prefix(None))
+
+    def test_context(self):
+        strategy = HashIdentifierStrategy(CrosswalkContext("http://vivo.otherdomain.edu/individual/"))
+        self.assertEqual("http://vivo.otherdomain.edu/individual/grant-3c73b079585811b9cbb23c3253a0796a",
+                         str(strategy.to_uri(VIVO.Grant, {"foo": "My Foo", "bar": "My Bar"})))
+        # Default namespace is unchanged
+        self.assertEqual("http://vivo.mydomain.edu/individual/grant-3c73b079585811b9cbb23c3253a0796a",
+                         str(self.strategy.to_uri(VIVO.Grant, {"foo": "My Foo", "bar": "My Bar"})))
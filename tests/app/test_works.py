@@ -3,11 +3,13 @@
 
 from unittest import TestCase
 import json
-from orcid2vivo_app.works import WorksCrosswalk
+from orcid2vivo_app.works import WorksCrosswalk, WorkRegistry
 import orcid2vivo_app.vivo_namespace as ns
 from rdflib import Graph, Literal, RDFS, RDF
 from orcid2vivo_app.vivo_namespace import VIVO
 from orcid2vivo_app.vivo_uri import HashIdentifierStrategy
+from orcid2vivo_app.cache import SubgraphCache, LRUCache
+from orcid2vivo_app.context import CrosswalkContext
 from orcid2vivo import SimpleCreateEntitiesStrategy
 
 # Saving this because will be monkey patching
@@ -26,6 +28,9 @@ class TestWorks(TestCase):
         self.crosswalker = WorksCrosswalk(identifier_strategy=self.create_strategy,
                                           create_strategy=self.create_strategy)
 
+    def tearDown(self):
+        WorksCrosswalk._fetch_crossref_doi = staticmethod(orig_fetch_crossref_doi)
+
     def test_no_works(self):
         orcid_profile = json.loads("""
 {
@@ -74,6 +79,166 @@ class TestWorks(TestCase):
             }
         """)))
 
+    def test_work_cache(self):
+        work_profile = json.loads("""
+{
+  "path": "/0000-0001-5109-3700/work/15643392",
+  "title": {
+    "title": {
+      "value": "Persistent identifiers can improve provenance and attribution and encourage sharing of research results"
+    },
+    "subtitle": null,
+    "translated-title": null
+  },
+  "publication-date": {
+    "year": {
+      "value": "2015"
+    }
+  },
+  "type": "JOURNAL_ARTICLE"
+}
+        """)
+        self.crosswalker.crosswalk_work(work_profile, self.person_uri, "Haak", self.graph)
+
+        work_cache = SubgraphCache()
+        context = CrosswalkContext(work_cache=work_cache)
+        crosswalker = WorksCrosswalk(identifier_strategy=self.create_strategy, create_strategy=self.create_strategy,
+                                     context=context)
+        cold_graph = Graph()
+        crosswalker.crosswalk_work(work_profile, self.person_uri, "Haak", cold_graph)
+        warm_graph = Graph()
+        crosswalker.crosswalk_work(work_profile, self.person_uri, "Haak", warm_graph)
+        self.assertEqual(set(self.graph), set(cold_graph))
+        self.assertEqual(set(self.graph), set(warm_graph))
+        self.assertEqual(1, work_cache.hits)
+        self.assertEqual(1, work_cache.misses)
+
+        # A different person is a miss
+        crosswalker.crosswalk_work(work_profile, ns.D["test2"], "Haak", Graph())
+        self.assertEqual(2, work_cache.misses)
+
+    def test_work_registry(self):
+        work_profile = json.loads("""
+{
+  "path": "/0000-0001-5109-3700/work/15643384",
+  "title": {
+    "title": {
+      "value": "Are race, ethnicity, and medical school affiliation associated with NIH R01 type 1 award probability for physician investigators?"
+    },
+    "subtitle": null,
+    "translated-title": null
+  },
+  "type": "JOURNAL_ARTICLE",
+  "external-ids": {
+    "external-id": [
+      {
+        "external-id-type": "doi",
+        "external-id-value": "10.1097/ACM.0b013e31826d726b",
+        "external-id-url": null,
+        "external-id-relationship": "SELF"
+      }
+    ]
+  }
+}
+        """)
+        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi, session=None: {})
+
+        work_registry = WorkRegistry()
+        context = CrosswalkContext(work_registry=work_registry)
+        crosswalker = WorksCrosswalk(identifier_strategy=self.create_strategy, create_strategy=self.create_strategy,
+                                     context=context)
+        crosswalker.crosswalk_work(work_profile, self.person_uri, "Haak", self.graph)
+        self.assertEqual(1, work_registry.misses)
+        self.assertEqual(0, work_registry.hits)
+
+        # A co-author reuses the description
+        graph2 = Graph(namespace_manager=ns.ns_manager)
+        crosswalker.crosswalk_work(work_profile, ns.D["test2"], "Haak", graph2)
+        self.assertEqual(1, work_registry.hits)
+        self.assertEqual(1, len(work_registry))
+        self.assertTrue(work_registry.triples <= set(self.graph))
+        self.assertTrue(work_registry.triples <= set(graph2))
+        self.assertTrue(bool(graph2.query("""
+            ask where {
+                ?doc a bibo:AcademicArticle .
+                ?doc bibo:doi "10.1097/ACM.0b013e31826d726b" .
+                ?auth a vivo:Authorship .
+                ?auth vivo:relates ?doc, d:test2 .
+            }
+        """)))
+
+        # Same as without a registry
+        graph = Graph()
+        self.crosswalker.crosswalk_work(work_profile, ns.D["test2"], "Haak", graph)
+        self.assertEqual(set(graph), set(graph2))
+
+        work_registry.mark_loaded(graph2)
+        self.assertEqual(work_registry.triples, work_registry.loaded_triples)
+
+        # A co-author's own record of the work has a different description, which is not reused
+        work_profile3 = dict(work_profile, **{"path": "/0000-0003-1527-0030/work/15643385",
+                                              "journal-title": {"value": "Academic Medicine"}})
+        graph3 = Graph()
+        crosswalker.crosswalk_work(work_profile3, ns.D["test3"], "Haak", graph3)
+        self.assertEqual(2, len(work_registry))
+        graph = Graph()
+        self.crosswalker.crosswalk_work(work_profile3, ns.D["test3"], "Haak", graph)
+        self.assertEqual(set(graph), set(graph3))
+
+    def test_work_registry_work_cache(self):
+        work_profile = json.loads("""
+{
+  "path": "/0000-0001-5109-3700/work/15643384",
+  "title": {
+    "title": {
+      "value": "Persistent identifiers can improve provenance and attribution and encourage sharing of research results"
+    }
+  },
+  "type": "JOURNAL_ARTICLE",
+  "external-ids": {
+    "external-id": [
+      {
+        "external-id-type": "doi",
+        "external-id-value": "10.1097/ACM.0b013e31826d726b",
+        "external-id-relationship": "SELF"
+      }
+    ]
+  }
+}
+        """)
+        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi, session=None: {})
+        work_cache = SubgraphCache()
+
+        graphs = []
+        for _ in range(2):
+            # A new batch with the same work cache
+            work_registry = WorkRegistry()
+            crosswalker = WorksCrosswalk(identifier_strategy=self.create_strategy,
+                                         create_strategy=self.create_strategy,
+                                         context=CrosswalkContext(work_cache=work_cache, work_registry=work_registry))
+            crosswalker.crosswalk_work(work_profile, self.person_uri, "Haak", Graph())
+            # The description of a work from the cache is registered, so a co-author reuses it
+            self.assertEqual(1, len(work_registry))
+            graph = Graph()
+            crosswalker.crosswalk_work(work_profile, ns.D["test2"], "Haak", graph)
+            self.assertEqual(1, work_registry.hits)
+            graphs.append(set(graph))
+        self.assertEqual(1, work_cache.hits)
+        self.assertEqual(graphs[0], graphs[1])
+
+    def test_normalize_names(self):
+        name_cache = LRUCache()
+        names = [u"Littman, Justin", None, u"Haak, Laurel L.", u"Littman, Justin"]
+        self.assertEqual([(u"Justin", u"Littman"), (None, None), (u"Laurel L.", u"Haak"), (u"Justin", u"Littman")],
+                         WorksCrosswalk._normalize_names(names, name_cache))
+        self.assertEqual(2, len(name_cache))
+        self.assertEqual(2, name_cache.misses)
+        self.assertEqual(0, name_cache.hits)
+        self.assertEqual([(u"Justin", u"Littman")], WorksCrosswalk._normalize_names([u"Littman, Justin"], name_cache))
+        self.assertEqual(1, name_cache.hits)
+        # Same as without a cache
+        self.assertEqual(WorksCrosswalk._normalize_names(names), WorksCrosswalk._normalize_names(names, name_cache))
+
     def test_orcid_title_no_subtitle(self):
         work_profile = json.loads("""
 {
@@ -176,7 +341,7 @@ class TestWorks(TestCase):
         
         """)
 
-        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi: json.loads("""
+        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi, session=None: json.loads("""
 {
     "title": [
         "Are Race, Ethnicity, and Medical School Affiliation Associated With NIH R01 Type 1 Award Probability for Physician Investigators?"
@@ -241,7 +406,7 @@ class TestWorks(TestCase):
         
         """)
 
-        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi: json.loads("""
+        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi, session=None: json.loads("""
 {
     "publisher": "Ovid Technologies (Wolters Kluwer Health)"
 }
@@ -302,7 +467,7 @@ class TestWorks(TestCase):
 }
         
         """)
-        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi: json.loads("""
+        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi, session=None: json.loads("""
 {
     "page": "1516-1524",
     "issue": "87",
@@ -422,7 +587,7 @@ class TestWorks(TestCase):
 }
 """)
 
-        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi: json.loads("""
+        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi, session=None: json.loads("""
 {
     "issued":{"date-parts":[[2012,10,31]]}
 }
@@ -473,7 +638,7 @@ class TestWorks(TestCase):
         }
         """)
 
-        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi: json.loads("""
+        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi, session=None: json.loads("""
 {
     "issued":{"date-parts":[[2012]]}
 }
@@ -603,7 +768,7 @@ class TestWorks(TestCase):
 }
         
         """)
-        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi: json.loads("""
+        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi, session=None: json.loads("""
 {
     "subject":["Health(social science)","Public Health, Environmental and Occupational Health","Health Policy"]
 }
@@ -658,7 +823,7 @@ class TestWorks(TestCase):
                 }
                 """)
 
-        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi: json.loads("""
+        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi, session=None: json.loads("""
         {
             "author":[{"affiliation":[],"family":"Ginther","given":"Donna K."},{"affiliation":[],"family":"Haak","given":"Laurel L."},{"affiliation":[],"family":"Schaffer","given":"Walter T."},{"affiliation":[],"family":"Kington","given":"Raynard"}]
         }
@@ -1081,7 +1246,7 @@ class TestWorks(TestCase):
         
         """)
 
-        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi: json.loads("""
+        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi, session=None: json.loads("""
 {
 }
         """))
@@ -1400,7 +1565,7 @@ class TestWorks(TestCase):
 
                 """)
 
-        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi: json.loads("""
+        WorksCrosswalk._fetch_crossref_doi = staticmethod(lambda doi, session=None: json.loads("""
         {
             "container-title": ["Academic Medicine", "Acad. Med."],
             "ISSN": ["1040-2446", "1938-808X"]
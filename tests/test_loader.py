@@ -1,14 +1,21 @@
 from __future__ import absolute_import
 import tempfile
 import shutil
-from orcid2vivo_loader import Store, load_single
+from orcid2vivo_loader import Store, KeyedLocks, PersonLoad, PersonLoader, load_single, load, build_uri_index, \
+    orcid_id_locks
 import os
 import tests
 import time
 import datetime
 import vcr
-from mock import patch, call
+from mock import patch, call, ANY
+from rdflib import Graph, RDF, URIRef, Literal
+from SPARQLWrapper.SPARQLExceptions import QueryBadFormed
 from rdflib.compare import to_isomorphic
+from orcid2vivo import SECTIONS, BatchCrosswalk
+from orcid2vivo_app.works import WorksCrosswalk
+from orcid2vivo_app.snapshot import NTriplesSnapshots
+from orcid2vivo_app.vivo_namespace import FOAF
 
 my_vcr = vcr.VCR(
     cassette_library_dir=tests.FIXTURE_PATH,
@@ -148,6 +155,21 @@ class TestStore(tests.TestCase):
                 self.assertTrue(orcid_id in ("0000-0003-1527-0030", "0000-0003-1527-0031"))
             self.assertEqual(2, len(list(store)))
 
+    def test_fingerprints(self):
+        with Store(self.data_path) as store:
+            self.assertEqual({}, store.get_fingerprints("0000-0003-1527-0030"))
+            store.set_fingerprints("0000-0003-1527-0030", {"bio": {"person": "abc"}, "works": {"1": "def"}})
+            store.set_fingerprints("0000-0003-1527-0030", {"works": {"2": "ghi"}})
+            self.assertEqual({"bio": {"person": "abc"}, "works": {"2": "ghi"}},
+                             store.get_fingerprints("0000-0003-1527-0030"))
+
+    def test_graph_fingerprints(self):
+        with Store(self.data_path) as store:
+            self.assertEqual({}, store.get_graph_fingerprints("0000-0003-1527-0030"))
+            store.set_graph_fingerprints("0000-0003-1527-0030", {"bio": "abc", "works": "def"})
+            store.set_graph_fingerprints("0000-0003-1527-0030", {"works": "ghi"})
+            self.assertEqual({"bio": "abc", "works": "ghi"}, store.get_graph_fingerprints("0000-0003-1527-0030"))
+
     def test_delete_all(self):
         with Store(self.data_path) as store:
             store.add("0000-0003-1527-0030")
@@ -177,7 +199,7 @@ class TestLoad(tests.TestCase):
                                                         "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu",
                                                         "password")
 
-        self.assertEqual(319, len(add_graph1))
+        self.assertEqual(288, len(add_graph1))
         self.assertEqual(0, len(delete_graph1))
 
         self.assertEqual(to_isomorphic(graph1), to_isomorphic(add_graph1))
@@ -188,8 +210,9 @@ class TestLoad(tests.TestCase):
                 store["0000-0003-1527-0030"]
             self.assertIsNotNone(last_update)
 
-        # Make sure turtle file created
-        self.assertTrue(os.path.exists(os.path.join(self.data_path, "0000-0003-1527-0030.ttl")))
+        # Make sure snapshot files created
+        for section in SECTIONS:
+            self.assertTrue(os.path.exists(os.path.join(self.data_path, "0000-0003-1527-0030.%s.nt.gz" % section)))
 
         # Now change a fact and run again. Changed fact is provided by vcr recording.
         # Changed year of Amherst degree.
@@ -201,13 +224,376 @@ class TestLoad(tests.TestCase):
                                                         self.data_path, "http://vivo.mydomain.edu/sparql",
                                                         "vivo@mydomain.edu", "password")
 
-        self.assertEqual(319, len(graph2))
+        self.assertEqual(288, len(graph2))
         self.assertEqual(17, len(add_graph2))
         self.assertEqual(17, len(delete_graph2))
 
+        # Shared entities are inserted separately
         mock_sparql_insert.assert_has_calls([
+            call(ANY, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password"),
             call(add_graph1, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password"),
+            call(ANY, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password"),
             call(add_graph2, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password")])
-        mock_sparql_delete.assert_has_calls([
-            call(delete_graph1, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password"),
-            call(delete_graph2, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password")])
+        self.assertEqual(31, len(mock_sparql_insert.call_args_list[0][0][0]))
+        # Nothing to delete the first time
+        mock_sparql_delete.assert_called_once_with(delete_graph2, "http://vivo.mydomain.edu/sparql",
+                                                   "vivo@mydomain.edu", "password")
+
+    @my_vcr.use_cassette('loader/load_single.yaml')
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_single_sections(self, mock_sparql_delete, mock_sparql_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+
+        # Previous graph from before graphs were kept by section, as Turtle
+        graph1, add_graph1, delete_graph1 = load_single("0000-0003-1527-0030", None, None, None, self.data_path,
+                                                        "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu",
+                                                        "password")
+        for section in SECTIONS:
+            os.remove(os.path.join(self.data_path, "0000-0003-1527-0030.%s.nt.gz" % section))
+        with open(os.path.join(self.data_path, "0000-0003-1527-0030.ttl"), "w") as out:
+            graph1.serialize(format="turtle", destination=out)
+
+        # All sections are crosswalked, since can't tell sections apart in previous graph.
+        graph2, add_graph2, delete_graph2 = load_single("0000-0003-1527-0030", None, None, None, self.data_path,
+                                                        "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu",
+                                                        "password", sections=["affiliations"])
+        self.assertEqual(288, len(graph2))
+        self.assertEqual(17, len(add_graph2))
+        self.assertEqual(17, len(delete_graph2))
+        self.assertFalse(os.path.exists(os.path.join(self.data_path, "0000-0003-1527-0030.ttl")))
+        self.assertFalse(os.path.exists(os.path.join(self.data_path, "0000-0003-1527-0030.nt.gz")))
+
+        section_graphs = NTriplesSnapshots(self.data_path).load("0000-0003-1527-0030", SECTIONS)
+        works_graph = section_graphs["works"]
+        affiliations_graph = section_graphs["affiliations"]
+
+        # Only affiliations, which are now empty.
+        with patch("orcid2vivo_loader.fetch_orcid_profile", return_value={"activities-summary": {}}) as mock_fetch:
+            graph3, add_graph3, delete_graph3 = load_single("0000-0003-1527-0030", None, None, None,
+                                                            self.data_path, "http://vivo.mydomain.edu/sparql",
+                                                            "vivo@mydomain.edu", "password",
+                                                            sections=["affiliations"])
+            self.assertEqual(("affiliations",), tuple(mock_fetch.call_args[1]["sections"]))
+        self.assertEqual(0, len(add_graph3))
+        self.assertTrue(len(delete_graph3) > 0)
+        # Deleted triples are from affiliations and other sections are untouched.
+        for triple in delete_graph3:
+            self.assertTrue(triple in affiliations_graph)
+        for triple in works_graph:
+            self.assertTrue(triple in graph3)
+
+    @my_vcr.use_cassette('loader/load_single.yaml')
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_single_changed_sections(self, mock_sparql_delete, mock_sparql_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+
+        load_single("0000-0003-1527-0030", None, None, None, self.data_path, "http://vivo.mydomain.edu/sparql",
+                    "vivo@mydomain.edu", "password")
+
+        # Only the year of the Amherst degree changed, so works are not crosswalked.
+        with patch.object(WorksCrosswalk, "crosswalk") as mock_works_crosswalk:
+            graph2, add_graph2, delete_graph2 = load_single("0000-0003-1527-0030", None, None, None,
+                                                            self.data_path, "http://vivo.mydomain.edu/sparql",
+                                                            "vivo@mydomain.edu", "password")
+            self.assertFalse(mock_works_crosswalk.called)
+
+        self.assertEqual(288, len(graph2))
+        self.assertEqual(17, len(add_graph2))
+        self.assertEqual(17, len(delete_graph2))
+
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_single_unchanged_graph(self, mock_sparql_delete, mock_sparql_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+
+        with my_vcr.use_cassette('loader/load_single.yaml'):
+            graph1 = load_single("0000-0003-1527-0030", None, None, None, self.data_path,
+                                 "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password")[0]
+        with Store(self.data_path) as store:
+            self.assertEqual(set(SECTIONS), set(store.get_graph_fingerprints("0000-0003-1527-0030")))
+        insert_call_count = mock_sparql_insert.call_count
+
+        # Crosswalked again, but the graphs are unchanged so the last graphs are not diffed or rewritten.
+        with my_vcr.use_cassette('loader/load_single.yaml'), \
+                patch("orcid2vivo_loader.NTriplesSnapshots.diff") as mock_diff, \
+                patch("orcid2vivo_loader.NTriplesSnapshots.save") as mock_save:
+            graph2, add_graph2, delete_graph2 = load_single("0000-0003-1527-0030", None, None, None,
+                                                            self.data_path, "http://vivo.mydomain.edu/sparql",
+                                                            "vivo@mydomain.edu", "password", force=True)
+            self.assertFalse(mock_diff.called)
+            self.assertFalse(mock_save.called)
+        # The graph as last loaded
+        self.assertEqual(set(graph1), set(graph2))
+        self.assertEqual(0, len(add_graph2))
+        self.assertEqual(0, len(delete_graph2))
+        # No SPARQL Update
+        self.assertEqual(0, mock_sparql_delete.call_count)
+        self.assertEqual(insert_call_count, mock_sparql_insert.call_count)
+
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_single_unchanged_snapshot(self, mock_sparql_delete, mock_sparql_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+
+        with my_vcr.use_cassette('loader/load_single.yaml'):
+            load_single("0000-0003-1527-0030", None, None, None, self.data_path, "http://vivo.mydomain.edu/sparql",
+                        "vivo@mydomain.edu", "password")
+        with Store(self.data_path) as store:
+            # E.g., when the graph fingerprints were not recorded
+            store.set_graph_fingerprints("0000-0003-1527-0030", dict((section, "") for section in SECTIONS))
+
+        # Diffed, but the graphs are the same as last saved so are not rewritten
+        with my_vcr.use_cassette('loader/load_single.yaml'), \
+                patch("orcid2vivo_loader.NTriplesSnapshots.save") as mock_save:
+            (graph, add_graph, delete_graph) = load_single("0000-0003-1527-0030", None, None, None, self.data_path,
+                                                           "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu",
+                                                           "password", force=True)
+            self.assertFalse(mock_save.called)
+        self.assertEqual(0, len(add_graph))
+        self.assertEqual(0, len(delete_graph))
+        with Store(self.data_path) as store:
+            self.assertNotIn("", store.get_graph_fingerprints("0000-0003-1527-0030").values())
+
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_unchanged(self, mock_sparql_delete, mock_sparql_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+
+        with my_vcr.use_cassette('loader/load_single.yaml'):
+            self.assertEqual((["0000-0003-1527-0030"], [], []),
+                             load(self.data_path, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password"))
+        with my_vcr.use_cassette('loader/load_single.yaml'):
+            self.assertEqual(([], [], ["0000-0003-1527-0030"]),
+                             load(self.data_path, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password",
+                                  force=True))
+        self.assertFalse(mock_sparql_delete.called)
+
+    @my_vcr.use_cassette('loader/load_single.yaml')
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_workers(self, mock_sparql_delete, mock_sparql_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+            store.add("not-an-orcid")
+
+        self.assertEqual((["0000-0003-1527-0030"], ["not-an-orcid"], []),
+                         load(self.data_path, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password",
+                              workers=2))
+        with Store(self.data_path) as store:
+            self.assertIsNotNone(store["0000-0003-1527-0030"][2])
+            self.assertIsNone(store["not-an-orcid"][2])
+
+    @my_vcr.use_cassette('loader/load_single.yaml')
+    @patch("orcid2vivo_loader.sparql_delete_insert")
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_single_combined_update(self, mock_sparql_delete, mock_sparql_insert, mock_sparql_delete_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+
+        graph, add_graph, delete_graph = load_single("0000-0003-1527-0030", None, None, None, self.data_path,
+                                                     "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu",
+                                                     "password", combined_update=True)
+        mock_sparql_delete_insert.assert_called_once_with(delete_graph, add_graph, "http://vivo.mydomain.edu/sparql",
+                                                          "vivo@mydomain.edu", "password")
+        self.assertFalse(mock_sparql_delete.called)
+        # Shared entities
+        self.assertEqual(1, mock_sparql_insert.call_count)
+
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_batch(self, mock_sparql_delete, mock_sparql_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+
+        with my_vcr.use_cassette('loader/load_single.yaml'):
+            self.assertEqual((["0000-0003-1527-0030"], [], []),
+                             load(self.data_path, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password",
+                                  batch_triples=10000))
+        # Shared entities are added with the people
+        self.assertEqual(1, mock_sparql_insert.call_count)
+        # Nothing to delete
+        self.assertFalse(mock_sparql_delete.called)
+        with Store(self.data_path) as store:
+            self.assertIsNotNone(store["0000-0003-1527-0030"][2])
+        self.assertEqual(0, len(orcid_id_locks))
+
+    @my_vcr.use_cassette('loader/load_single.yaml')
+    @patch.object(PersonLoad, "clear", autospec=True)
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_batch_flushed(self, mock_sparql_delete, mock_sparql_insert, mock_clear):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+            store.add("not-an-orcid")
+
+        # Flushed during the update of the person
+        self.assertEqual((["0000-0003-1527-0030"], ["not-an-orcid"], []),
+                         load(self.data_path, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password",
+                              batch_triples=1))
+        self.assertEqual(1, mock_sparql_insert.call_count)
+        # Both people are released once finished
+        self.assertEqual({"0000-0003-1527-0030", "not-an-orcid"},
+                         set(call_args[0][0].orcid_id for call_args in mock_clear.call_args_list))
+        self.assertEqual(0, len(orcid_id_locks))
+
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_batch_failed(self, mock_sparql_delete, mock_sparql_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+
+        mock_sparql_insert.side_effect = [IOError(), None]
+        with my_vcr.use_cassette('loader/load_single.yaml'):
+            self.assertEqual(([], ["0000-0003-1527-0030"], []),
+                             load(self.data_path, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password",
+                                  batch_triples=10000))
+        # Not recorded as loaded
+        with Store(self.data_path) as store:
+            self.assertIsNone(store["0000-0003-1527-0030"][2])
+            self.assertEqual({}, store.get_fingerprints("0000-0003-1527-0030"))
+        # Shared entities are added at the end of the load
+        self.assertEqual(2, mock_sparql_insert.call_count)
+
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_shared_entities_failed(self, mock_sparql_delete, mock_sparql_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+
+        # Adding the shared entities with the person fails
+        mock_sparql_insert.side_effect = [IOError(), None]
+        with my_vcr.use_cassette('loader/load_single.yaml'):
+            self.assertEqual(([], ["0000-0003-1527-0030"], []),
+                             load(self.data_path, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password"))
+        # They are added at the end of the load
+        self.assertEqual(2, mock_sparql_insert.call_count)
+        self.assertEqual(set(mock_sparql_insert.call_args_list[0][0][0]),
+                         set(mock_sparql_insert.call_args_list[1][0][0]))
+
+    @my_vcr.use_cassette('loader/load_single.yaml')
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_build_uri_index(self, mock_sparql_delete, mock_sparql_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+
+        load_single("0000-0003-1527-0030", None, None, None, self.data_path, "http://vivo.mydomain.edu/sparql",
+                    "vivo@mydomain.edu", "password")
+        # Shared entities are added first
+        shared_graph = mock_sparql_insert.call_args_list[0][0][0]
+        organization_uris = set(shared_graph.subjects(RDF.type, FOAF.Organization))
+        self.assertTrue(organization_uris)
+
+        uri_index = build_uri_index(self.data_path)
+        for organization_uri in organization_uris:
+            self.assertTrue(organization_uri in uri_index)
+
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_single_rebuilt_uri_index(self, mock_sparql_delete, mock_sparql_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+
+        with my_vcr.use_cassette('loader/load_single.yaml'):
+            load_single("0000-0003-1527-0030", None, None, None, self.data_path, "http://vivo.mydomain.edu/sparql",
+                        "vivo@mydomain.edu", "password")
+        build_uri_index(self.data_path)
+        # The orcid profile is unchanged, but the index changed so the sections are crosswalked.
+        with my_vcr.use_cassette('loader/load_single.yaml'), \
+                patch.object(BatchCrosswalk, "execute_sections", autospec=True,
+                             side_effect=BatchCrosswalk.execute_sections) as mock_execute_sections:
+            load_single("0000-0003-1527-0030", None, None, None, self.data_path, "http://vivo.mydomain.edu/sparql",
+                        "vivo@mydomain.edu", "password")
+            self.assertTrue(mock_execute_sections.called)
+
+    @my_vcr.use_cassette('loader/load_single.yaml')
+    def test_fetch_works(self):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+        loader = PersonLoader(self.data_path, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password",
+                              BatchCrosswalk())
+        person = PersonLoad("0000-0003-1527-0030")
+        loader.fetch(person)
+        self.assertTrue(person.works)
+
+        # The records for works are fetched by fetch(), not while crosswalking
+        with patch.object(WorksCrosswalk, "_fetch_work") as mock_fetch_work, \
+                patch.object(WorksCrosswalk, "_fetch_crossref_doi") as mock_fetch_crossref_doi:
+            loader.crosswalk(person)
+            self.assertFalse(mock_fetch_work.called)
+            self.assertFalse(mock_fetch_crossref_doi.called)
+        self.assertTrue(person.section_graphs["works"])
+        self.assertIsNone(person.works)
+
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_flush_rejected(self, mock_sparql_delete, mock_sparql_insert):
+        bad_triple = (URIRef("http://vivo.mydomain.edu/individual/b"), FOAF.name, Literal("Bad"))
+
+        def insert(graph, endpoint, username, password):
+            if bad_triple in graph:
+                raise QueryBadFormed()
+
+        mock_sparql_insert.side_effect = insert
+        loader = PersonLoader(self.data_path, "http://vivo.mydomain.edu/sparql", "vivo@mydomain.edu", "password",
+                              BatchCrosswalk(), batch_triples=10000)
+        people = []
+        for orcid_id, triple in (("0000-0003-1527-0030", (URIRef("http://vivo.mydomain.edu/individual/a"),
+                                                            FOAF.name, Literal("Good"))),
+                                 ("0000-0003-1527-0031", bad_triple)):
+            with Store(self.data_path) as store:
+                store.add(orcid_id)
+            person = PersonLoad(orcid_id)
+            person.fingerprints = {}
+            person.changed_sections = []
+            person.add_graph = Graph()
+            person.add_graph.add(triple)
+            person.delete_graph = Graph()
+            loader.update(person)
+            people.append(person)
+        loader.flush()
+
+        # Updated one at a time, so only the person with the rejected triple failed
+        self.assertEqual(3, mock_sparql_insert.call_count)
+        self.assertIsNone(people[0].exception)
+        self.assertIsInstance(people[1].exception, QueryBadFormed)
+        self.assertEqual(people, loader.pop_flushed())
+        with Store(self.data_path) as store:
+            self.assertIsNotNone(store["0000-0003-1527-0030"][2])
+            self.assertIsNone(store["0000-0003-1527-0031"][2])
+
+    def test_keyed_locks(self):
+        locks = KeyedLocks()
+        with locks.lock("0000-0003-1527-0030"):
+            with locks.lock("0000-0003-1527-0031"):
+                self.assertEqual(2, len(locks))
+        self.assertEqual(0, len(locks))
+
+    @my_vcr.use_cassette('loader/load_single.yaml')
+    @patch("orcid2vivo_loader.sparql_insert")
+    @patch("orcid2vivo_loader.sparql_delete")
+    def test_load_single_sqlite_snapshots(self, mock_sparql_delete, mock_sparql_insert):
+        with Store(self.data_path) as store:
+            store.add("0000-0003-1527-0030")
+
+        # Last graphs in files are moved to the db
+        load_single("0000-0003-1527-0030", None, None, None, self.data_path, "http://vivo.mydomain.edu/sparql",
+                    "vivo@mydomain.edu", "password")
+        graph2, add_graph2, delete_graph2 = load_single("0000-0003-1527-0030", None, None, None,
+                                                        self.data_path, "http://vivo.mydomain.edu/sparql",
+                                                        "vivo@mydomain.edu", "password", sqlite_snapshots=True)
+        self.assertEqual(288, len(graph2))
+        self.assertEqual(17, len(add_graph2))
+        self.assertEqual(17, len(delete_graph2))
+        for section in SECTIONS:
+            self.assertFalse(os.path.exists(os.path.join(self.data_path, "0000-0003-1527-0030.%s.nt.gz" % section)))
+        with Store(self.data_path) as store:
+            self.assertEqual(set(SECTIONS), store.snapshots().saved_sections("0000-0003-1527-0030", SECTIONS))
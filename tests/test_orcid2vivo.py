@@ -1,8 +1,21 @@
 from unittest import TestCase
+import sys
+import traceback
 from rdflib import Graph, URIRef, RDF, OWL
+from mock import MagicMock
 import orcid2vivo_app.vivo_namespace as ns
-from orcid2vivo import PersonCrosswalk
-from orcid2vivo_app.vivo_namespace import VIVO
+from orcid2vivo import PersonCrosswalk, BatchCrosswalk, default_execute_many, fetch_orcid_profile, SECTIONS, \
+    IndexedCreateEntitiesStrategy
+from orcid2vivo_app.vivo_uri import HashIdentifierStrategy
+from orcid2vivo_app.uri_index import UriIndex
+from orcid2vivo_app.sink import HashSink
+from orcid2vivo_app.vivo_namespace import VIVO, FOAF
+import tests
+import vcr
+
+my_vcr = vcr.VCR(
+    cassette_library_dir=tests.FIXTURE_PATH,
+)
 
 
 class TestPersonCrosswalk(TestCase):
@@ -24,3 +37,90 @@ class TestPersonCrosswalk(TestCase):
         self.assertEqual(3, len(self.graph))
 
         self.assertTrue((self.orcid_id_uriref, VIVO.confirmedOrcidId, self.person_uri) in self.graph)
+
+
+class TestDefaultExecute(TestCase):
+    @my_vcr.use_cassette('loader/load_single.yaml')
+    def test_default_execute_many(self):
+        results = list(default_execute_many(["0000-0003-1527-0030",
+                                             {"orcid_id": "0000-0003-1527-0030", "person_id": "me"}]))
+        self.assertEqual(2, len(results))
+        person_uris = set()
+        for (graph, profile, person_uri) in results:
+            self.assertEqual(319, len(graph))
+            person_uris.add(person_uri)
+        self.assertEqual({ns.D["person-53e4096d5bf17f776300c4e2e8d237ee"],
+                          ns.D["person-ab86a1e1ef70dff97959067b723c5c24"]}, person_uris)
+
+    @my_vcr.use_cassette('loader/load_single.yaml')
+    def test_default_execute_many_error(self):
+        errors = []
+        results = list(default_execute_many(["0000-0003-1527-0030", "not-an-orcid"],
+                                            on_error=lambda spec, e: errors.append(spec)))
+        self.assertEqual(1, len(results))
+        self.assertEqual(["not-an-orcid"], errors)
+
+    @my_vcr.use_cassette('loader/load_single.yaml')
+    def test_default_execute_many_raise(self):
+        try:
+            list(default_execute_many(["not-an-orcid"]))
+            self.fail("Expected exception")
+        except Exception:
+            # Raised with the original traceback
+            self.assertTrue("_execute_spec" in [frame[2] for frame in traceback.extract_tb(sys.exc_info()[2])])
+
+
+class TestSections(TestCase):
+    @my_vcr.use_cassette('loader/load_single.yaml')
+    def test_execute_sections(self):
+        (section_graphs, profile, person_uri, graph_fingerprints) = BatchCrosswalk().execute_sections(
+            "0000-0003-1527-0030")
+        self.assertEqual(set(SECTIONS), set(section_graphs.keys()))
+        for section, section_graph in section_graphs.items():
+            hash_sink = HashSink()
+            for triple in section_graph:
+                hash_sink.add(triple)
+            self.assertEqual(hash_sink.hexdigest(), graph_fingerprints[section])
+        graph = Graph()
+        for section_graph in section_graphs.values():
+            graph += section_graph
+        self.assertEqual(319, len(graph))
+        self.assertTrue((person_uri, VIVO.orcidId, URIRef("http://orcid.org/0000-0003-1527-0030"))
+                        in section_graphs["bio"])
+
+    def test_fetch_orcid_profile_sections(self):
+        mock_session = MagicMock()
+        mock_session.get.return_value.json.return_value = {"group": []}
+        profile = fetch_orcid_profile("0000-0003-1527-0030", session=mock_session, sections=["fundings", "works"])
+        self.assertEqual(["https://pub.orcid.org/v2.0/0000-0003-1527-0030/fundings",
+                          "https://pub.orcid.org/v2.0/0000-0003-1527-0030/person",
+                          "https://pub.orcid.org/v2.0/0000-0003-1527-0030/works"],
+                         [args[0] for args, kwargs in mock_session.get.call_args_list])
+        self.assertEqual({"group": []}, profile["person"])
+        self.assertEqual({"fundings": {"group": []}, "works": {"group": []}}, profile["activities-summary"])
+
+    def test_keep_profile(self):
+        with my_vcr.use_cassette('loader/load_single.yaml'):
+            (graph, profile, person_uri) = BatchCrosswalk().execute("0000-0003-1527-0030")
+        with my_vcr.use_cassette('loader/load_single.yaml'):
+            (kept_graph, kept_profile, person_uri) = BatchCrosswalk(keep_profile=True).execute(
+                "0000-0003-1527-0030")
+        self.assertEqual(set(kept_graph), set(graph))
+        self.assertTrue("last-modified-date" in kept_profile["person"])
+        self.assertFalse("last-modified-date" in profile["person"])
+        self.assertEqual(kept_profile["person"]["name"]["family-name"], profile["person"]["name"]["family-name"])
+
+    def test_unknown_section(self):
+        self.assertRaises(ValueError, BatchCrosswalk().execute, "0000-0003-1527-0030", sections=["grants"])
+
+
+class TestIndexedCreateEntitiesStrategy(TestCase):
+    def test_should_create(self):
+        uri_index = UriIndex(capacity=1000)
+        uri_index.add(ns.D["organization1"])
+        uri_index.add(ns.D["person1"])
+        create_strategy = IndexedCreateEntitiesStrategy(HashIdentifierStrategy(), uri_index)
+        self.assertFalse(create_strategy.should_create(FOAF.Organization, ns.D["organization1"]))
+        self.assertTrue(create_strategy.should_create(FOAF.Organization, ns.D["organization2"]))
+        # Only shared entities
+        self.assertTrue(create_strategy.should_create(FOAF.Person, ns.D["person1"]))